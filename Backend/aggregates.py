@@ -0,0 +1,171 @@
+"""Incrementally maintained per-student counters (the student_aggregates table).
+
+Write endpoints describe each changed row as a ``(student_id, contribution)``
+pair before and after the change and call ``apply_change`` before committing,
+so the counters move in the same transaction as the raw rows. Readers use
+``get_student_aggregates`` instead of counting attendance, activity and
+assessment history.
+
+Backfill or repair the table with:
+
+    python -m Backend.aggregates
+"""
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, func, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from Backend import models
+
+Contribution = Tuple[int, Dict[str, float]]
+
+COUNTER_FIELDS = [
+    "attendance_total", "attendance_present",
+    "activity_total", "activity_completed", "activity_score_sum", "activity_score_count",
+    "activity_duration_sum",
+    "assessment_total", "assessment_score_sum", "assessment_score_count"
+]
+
+
+def attendance_contribution(record: models.Attendance) -> Optional[Contribution]:
+    """What one attendance row adds to its student's counters"""
+    if record is None or record.student_id is None:
+        return None
+    return record.student_id, {
+        "attendance_total": 1,
+        "attendance_present": 1 if record.present else 0
+    }
+
+
+def activity_contribution(activity: models.LearningActivity) -> Optional[Contribution]:
+    """What one learning activity row adds to its student's counters"""
+    if activity is None or activity.student_id is None:
+        return None
+    return activity.student_id, {
+        "activity_total": 1,
+        "activity_completed": 1 if activity.completed else 0,
+        "activity_score_sum": activity.score if activity.score is not None else 0,
+        "activity_score_count": 1 if activity.score is not None else 0,
+        "activity_duration_sum": activity.duration or 0
+    }
+
+
+def _counters_from_history(db: Session, student_id: int) -> Dict[str, float]:
+    """Counters for one student computed from the raw tables"""
+    counters = grouped_counters(db, student_id=student_id)
+    return counters.get(student_id, {field: 0 for field in COUNTER_FIELDS})
+
+
+def grouped_counters(db: Session, student_id: Optional[int] = None) -> Dict[int, Dict[str, float]]:
+    """Counters for every student (or one student), one grouped query per table"""
+    A, LA, AS = models.Attendance, models.LearningActivity, models.Assessment
+    counters = defaultdict(lambda: {field: 0 for field in COUNTER_FIELDS})
+
+    attendance = db.query(
+        A.student_id, func.count(A.id), func.sum(case((A.present == True, 1), else_=0))
+    )
+    activities = db.query(
+        LA.student_id,
+        func.count(LA.id),
+        func.sum(case((LA.completed == True, 1), else_=0)),
+        func.coalesce(func.sum(LA.score), 0),
+        func.count(LA.score),
+        func.coalesce(func.sum(LA.duration), 0)
+    )
+    valid_assessment = AS.max_score > 0
+    assessments = db.query(
+        AS.student_id,
+        func.count(AS.id),
+        func.coalesce(func.sum(case((valid_assessment, AS.score * 100.0 / AS.max_score))), 0),
+        func.sum(case((valid_assessment, 1), else_=0))
+    )
+    if student_id is not None:
+        attendance = attendance.filter(A.student_id == student_id)
+        activities = activities.filter(LA.student_id == student_id)
+        assessments = assessments.filter(AS.student_id == student_id)
+
+    for sid, total, present in attendance.group_by(A.student_id):
+        counters[sid].update(attendance_total=total, attendance_present=present)
+    for sid, total, completed, score_sum, score_count, duration_sum in activities.group_by(LA.student_id):
+        counters[sid].update(
+            activity_total=total, activity_completed=completed,
+            activity_score_sum=score_sum, activity_score_count=score_count,
+            activity_duration_sum=duration_sum
+        )
+    for sid, total, score_sum, score_count in assessments.group_by(AS.student_id):
+        counters[sid].update(
+            assessment_total=total, assessment_score_sum=score_sum, assessment_score_count=score_count
+        )
+
+    counters.pop(None, None)
+    return counters
+
+
+def apply_change(db: Session, before: Optional[Contribution], after: Optional[Contribution]):
+    """Move the counters from a row's old contribution to its new one.
+
+    Call this after changing the ORM object but before ``db.commit()``. A
+    student without a counters row yet is seeded from the history as it was
+    before this change, which is why the seed query runs without autoflush.
+    """
+    deltas = defaultdict(lambda: defaultdict(float))
+    if before:
+        for field, value in before[1].items():
+            deltas[before[0]][field] -= value
+    if after:
+        for field, value in after[1].items():
+            deltas[after[0]][field] += value
+
+    table = models.StudentAggregates.__table__
+    for student_id, fields in deltas.items():
+        if not any(fields.values()):
+            continue
+        if db.query(table.c.student_id).filter(table.c.student_id == student_id).first() is None:
+            with db.no_autoflush:
+                seed = _counters_from_history(db, student_id)
+            # A concurrent writer may seed the same student first; its row already counts this history
+            db.execute(sqlite_insert(table).values(student_id=student_id, **seed)
+                       .on_conflict_do_nothing(index_elements=[table.c.student_id]))
+        # Added in SQL so that concurrent writers do not overwrite each other's increments
+        db.execute(update(table).where(table.c.student_id == student_id).values({
+            field: table.c[field] + delta for field, delta in fields.items() if delta
+        }))
+
+
+def get_student_aggregates(db: Session, student_id: int) -> models.StudentAggregates:
+    """Counters for a student; computed on the fly (not stored) if never backfilled"""
+    row = db.get(models.StudentAggregates, student_id)
+    if row is None:
+        row = models.StudentAggregates(student_id=student_id, **_counters_from_history(db, student_id))
+    return row
+
+
+def remove_student(db: Session, student_id: int):
+    """Drop a student's counters before the student is deleted (call before ``db.commit()``)"""
+    db.query(models.StudentAggregates).filter(models.StudentAggregates.student_id == student_id).delete(
+        synchronize_session="fetch"
+    )
+
+
+def rebuild_student_aggregates(db: Session) -> int:
+    """Recompute the whole table from the raw history, returning the row count"""
+    counters = grouped_counters(db)
+    db.query(models.StudentAggregates).delete()
+    db.bulk_insert_mappings(models.StudentAggregates, [
+        {"student_id": student_id, **fields} for student_id, fields in counters.items()
+    ])
+    db.commit()
+    return len(counters)
+
+
+if __name__ == "__main__":
+    from Backend.database import SessionLocal, engine, Base
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt aggregates for {rebuild_student_aggregates(db)} students")
+    finally:
+        db.close()
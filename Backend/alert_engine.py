@@ -0,0 +1,86 @@
+"""Set-based evaluation of the student alert rules.
+
+Checking one student at a time costs one query per rule and student, so a
+summary over N students used to take 3N queries. ``evaluate`` runs the
+rules of ``alert_rules.rule_book`` for all students (or for a given list)
+with one grouped query per (table, window) group and returns the alert
+dictionaries keyed by student, in rule order:
+
+    {"type", "message", "severity", "recommendation"}
+
+The default rules (``data/alert_rules.json``) flag attendance below 70% and
+fewer than 3 learning activities in the last ``days`` days, and a mean below
+50% over the 5 most recent assessments.
+
+Attendance and session metrics over day windows come from the in-memory
+``window_counters`` when they cover the window, so with the default rules
+only the assessment query reaches SQLite.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from Backend import models
+from Backend.alert_rules import METRICS, RuleSet, rule_book
+from Backend.window_counters import COUNTER_METRICS, window_counters
+
+SEVERITIES = ("warning", "critical")
+
+
+def metric_values(db: Session, rules: RuleSet, days: int, now: datetime,
+                  student_ids: Optional[List[int]] = None) -> Dict:
+    """{(metric, window): {student_id: value}} for every metric the rules use"""
+    values = {}
+    for table, window, metrics, query in rules.queries(db, days, now, student_ids):
+        if window[0] == "days" and all(COUNTER_METRICS.get(m, (None,))[0] == table for m in metrics):
+            window_counters.ensure_current(db)
+            if window_counters.covers(window[1], now.date()):
+                columns = window_counters.metric_values(metrics, window[1], student_ids)
+                for metric in metrics:
+                    values[(metric, window)] = columns[metric]
+                continue
+        columns = {metric: {} for metric in metrics}
+        for student_id, *row in query:
+            for metric, value in zip(metrics, row):
+                columns[metric][student_id] = value
+        for metric in metrics:
+            values[(metric, window)] = columns[metric]
+    return values
+
+
+def evaluate(db: Session, days: int = 7, student_ids: Optional[List[int]] = None,
+             now: Optional[datetime] = None, rules: Optional[RuleSet] = None) -> Dict[int, List[Dict]]:
+    """Alerts of every student (or of ``student_ids``), one grouped query per table and window"""
+    rules = rules or rule_book.current()
+    now = now or datetime.now()
+    ids = [student_id for (student_id,) in db.query(models.Student.id)] if student_ids is None else list(student_ids)
+    values = metric_values(db, rules, days, now, student_ids)
+
+    alerts = {}
+    for student_id in ids:
+        student_alerts = []
+        for rule in rules.rules:
+            value = values[(rule.metric, rule.resolve(days))].get(student_id, METRICS[rule.metric].empty)
+            alert = rule.check(value, days)
+            if alert is not None:
+                student_alerts.append(alert)
+        alerts[student_id] = student_alerts
+    return alerts
+
+
+def summarize(alerts: Dict[int, List[Dict]], rules: Optional[RuleSet] = None) -> Dict:
+    """Counts by alert type and severity over ``evaluate`` output"""
+    rules = rules or rule_book.current()
+    alert_types = dict.fromkeys(rules.types, 0)
+    by_severity = dict.fromkeys(SEVERITIES, 0)
+    for student_alerts in alerts.values():
+        for alert in student_alerts:
+            alert_types[alert["type"]] = alert_types.get(alert["type"], 0) + 1
+            by_severity[alert["severity"]] = by_severity.get(alert["severity"], 0) + 1
+    return {
+        "total_students": len(alerts),
+        "students_with_alerts": sum(1 for student_alerts in alerts.values() if student_alerts),
+        "alert_types": alert_types,
+        "by_severity": by_severity
+    }
@@ -0,0 +1,255 @@
+"""The alerts table: student alerts materialized on write, with history.
+
+Every open alert is one row with ``resolved_at`` NULL; a partial unique
+index keeps at most one open row per student and alert type, so an alert
+that keeps firing is updated in place (message, severity) instead of being
+raised again. When a rule stops firing its row gets ``resolved_at`` and
+stays as history; if it fires again later a new row is raised.
+
+* Write endpoints call ``alert_inbox.update(db, student_id)`` after
+  committing (after ``window_counters.update``). Only that student's rules
+  are re-evaluated: day-window attendance and session metrics from the
+  window counters, the other grouped rule queries of ``alert_engine``
+  restricted to one student. Assessments have no
+  write endpoint; scripts that import them should call ``update`` too.
+* Time windows also move without any write: a student with no sessions
+  this week starts to fire without anything being written. ``sync``
+  re-evaluates everyone (one grouped query per table and window) at
+  startup, when the rule file changed, and every
+  ``ALERT_INBOX_SWEEP_MINUTES`` in a daemon thread.
+
+Reads (``open_alerts``, ``summary``, ``history``) are indexed lookups on
+the table. The inbox holds alerts for the ``ALERT_INBOX_DAYS`` window; the
+read endpoints evaluate other windows live.
+
+``update`` and ``sync`` return the raised and resolved alerts as events
+(with the student's name, grade and school) and pass them to the
+``on_events`` listeners, which feed the live alert stream.
+
+Configuration (environment variables):
+    ALERT_INBOX_DAYS           window of the materialized alerts (default 7)
+    ALERT_INBOX_SWEEP_MINUTES  full re-evaluation interval, 0 disables it (default 60)
+"""
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from Backend import alert_engine, models
+from Backend.alert_rules import RuleSet, rule_book
+
+
+def alert_payload(row: models.Alert) -> Dict:
+    return {
+        "id": row.id,
+        "student_id": row.student_id,
+        "type": row.type,
+        "message": row.message,
+        "severity": row.severity,
+        "recommendation": row.recommendation,
+        "raised_at": row.raised_at.isoformat() if row.raised_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+        "resolved_at": row.resolved_at.isoformat() if row.resolved_at else None
+    }
+
+
+class AlertInbox:
+    def __init__(self, days: Optional[int] = None):
+        self.days = days if days is not None else int(os.environ.get("ALERT_INBOX_DAYS", 7))
+        self._rules: Optional[RuleSet] = None  # rules of the last sync
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._listeners: List[Callable[[List[Dict]], None]] = []
+        self.last_sync: Optional[Dict] = None
+
+    def on_events(self, listener: Callable[[List[Dict]], None]):
+        """Call ``listener(events)`` after every update or sync that raised or resolved alerts"""
+        self._listeners.append(listener)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def sync(self, db: Session) -> List[Dict]:
+        """Re-evaluate every student and bring the table in line"""
+        with self._lock:
+            rules = rule_book.current()
+            started = datetime.now()
+            alerts = alert_engine.evaluate(db, days=self.days, rules=rules)
+            events = self._apply(db, alerts, partial=False)
+            self._rules = rules
+            self.last_sync = {
+                "at": started.isoformat(),
+                "students": len(alerts),
+                "raised": sum(1 for event in events if event["event"] == "raised"),
+                "resolved": sum(1 for event in events if event["event"] == "resolved"),
+                "seconds": round((datetime.now() - started).total_seconds(), 3)
+            }
+        return events
+
+    def update(self, db: Session, *student_ids: Optional[int]) -> List[Dict]:
+        """Re-evaluate students whose rows were just committed (resolving alerts of deleted ones)"""
+        ids = {student_id for student_id in student_ids if student_id is not None}
+        if not ids:
+            return []
+        if rule_book.current() is not self._rules:
+            # New rules apply to everyone, not just these students
+            return self.sync(db)
+        with self._lock:
+            existing = [
+                student_id for (student_id,) in db.query(models.Student.id).filter(models.Student.id.in_(ids))
+            ]
+            alerts = alert_engine.evaluate(db, days=self.days, student_ids=existing, rules=self._rules)
+            for student_id in ids.difference(existing):
+                alerts[student_id] = []
+            return self._apply(db, alerts, partial=True)
+
+    def ensure_current(self, db: Session):
+        """Sync once before the first read and after the rule file changed"""
+        if rule_book.current() is not self._rules:
+            self.sync(db)
+
+    def _apply(self, db: Session, alerts: Dict[int, List[Dict]], partial: bool) -> List[Dict]:
+        now = datetime.now()
+        query = db.query(models.Alert).filter(models.Alert.resolved_at.is_(None))
+        if partial:
+            query = query.filter(models.Alert.student_id.in_(list(alerts)))
+        still_open = {(row.student_id, row.type): row for row in query}
+
+        raised, resolved = [], []
+        for student_id, student_alerts in alerts.items():
+            for alert in student_alerts:
+                row = still_open.pop((student_id, alert["type"]), None)
+                if row is None:
+                    row = models.Alert(student_id=student_id, type=alert["type"], severity=alert["severity"],
+                                       message=alert["message"], recommendation=alert["recommendation"],
+                                       raised_at=now, updated_at=now)
+                    db.add(row)
+                    raised.append(row)
+                elif (row.severity, row.message, row.recommendation) != (
+                    alert["severity"], alert["message"], alert["recommendation"]
+                ):
+                    row.severity, row.message, row.recommendation = (
+                        alert["severity"], alert["message"], alert["recommendation"]
+                    )
+                    row.updated_at = now
+        # Open rows that no longer fire (or whose student or rule is gone)
+        for row in still_open.values():
+            row.resolved_at = now
+            resolved.append(row)
+        # Payloads before the commit expires the rows (flush assigns the new ids)
+        db.flush()
+        events = [{"event": "raised", "alert": alert_payload(row)} for row in raised] + \
+                 [{"event": "resolved", "alert": alert_payload(row)} for row in resolved]
+        db.commit()
+        if events:
+            self._notify(db, events)
+        return events
+
+    def _notify(self, db: Session, events: List[Dict]):
+        ids = list({event["alert"]["student_id"] for event in events})
+        students = {}
+        for offset in range(0, len(ids), 500):
+            students.update({
+                row.id: row for row in db.query(
+                    models.Student.id, models.Student.name, models.Student.grade, models.Student.school
+                ).filter(models.Student.id.in_(ids[offset:offset + 500]))
+            })
+        for event in events:
+            student = students.get(event["alert"]["student_id"])
+            event["alert"].update(
+                student_name=student.name if student else None,
+                grade=student.grade if student else None,
+                school=student.school if student else None
+            )
+        for listener in list(self._listeners):
+            try:
+                listener(events)
+            except Exception as e:
+                print(f"❌ Alert event listener failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def open_alerts(self, db: Session, student_id: int) -> List[Dict]:
+        self.ensure_current(db)
+        rows = db.query(models.Alert).filter(
+            models.Alert.student_id == student_id, models.Alert.resolved_at.is_(None)
+        ).order_by(models.Alert.id)
+        return [alert_payload(row) for row in rows]
+
+    def history(self, db: Session, student_id: int, limit: int = 100) -> List[Dict]:
+        """Open and resolved alerts of a student, newest first"""
+        self.ensure_current(db)
+        rows = db.query(models.Alert).filter(models.Alert.student_id == student_id).order_by(
+            models.Alert.raised_at.desc(), models.Alert.id.desc()
+        ).limit(limit)
+        return [alert_payload(row) for row in rows]
+
+    def summary(self, db: Session) -> Dict:
+        """Counts and flagged students from the open alerts"""
+        self.ensure_current(db)
+        A = models.Alert
+        alert_types = dict.fromkeys(self._rules.types, 0)
+        by_severity = dict.fromkeys(alert_engine.SEVERITIES, 0)
+        for alert_type, severity, count in db.query(A.type, A.severity, func.count(A.id)).filter(
+            A.resolved_at.is_(None)
+        ).group_by(A.type, A.severity):
+            alert_types[alert_type] = alert_types.get(alert_type, 0) + count
+            by_severity[severity] = by_severity.get(severity, 0) + count
+
+        students = {}
+        rows = db.query(A, models.Student.name, models.Student.grade).join(
+            models.Student, models.Student.id == A.student_id
+        ).filter(A.resolved_at.is_(None)).order_by(A.student_id, A.id)
+        for row, name, grade in rows:
+            entry = students.setdefault(row.student_id, {
+                "student_id": row.student_id, "student_name": name, "grade": grade, "alerts": []
+            })
+            entry["alerts"].append(alert_payload(row))
+        return {
+            "total_students": db.query(func.count(models.Student.id)).scalar(),
+            "students_with_alerts": len(students),
+            "alert_types": alert_types,
+            "by_severity": by_severity,
+            "students": list(students.values())
+        }
+
+    # ------------------------------------------------------------------
+    # Periodic sweep
+    # ------------------------------------------------------------------
+
+    def _sweep(self, interval: float, session_factory):
+        while not self._stop.wait(interval):
+            db = session_factory()
+            try:
+                self.sync(db)
+            except Exception as e:
+                db.rollback()
+                print(f"❌ Alert inbox sweep failed: {e}")
+            finally:
+                db.close()
+
+    def start_sweeper(self, session_factory, minutes: Optional[float] = None) -> bool:
+        """Run ``sync`` every ``minutes`` in a daemon thread"""
+        if minutes is None:
+            minutes = float(os.environ.get("ALERT_INBOX_SWEEP_MINUTES", 60))
+        if minutes <= 0 or (self._sweeper is not None and self._sweeper.is_alive()):
+            return False
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep, args=(minutes * 60, session_factory),
+                                         name="alert-inbox-sweep", daemon=True)
+        self._sweeper.start()
+        return True
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+
+# Shared inbox of the app
+alert_inbox = AlertInbox()
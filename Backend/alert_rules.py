@@ -0,0 +1,297 @@
+"""Declarative alert rules, compiled to grouped SQL and reloaded on change.
+
+Rules live in a JSON file (``data/alert_rules.json`` by default)::
+
+    {"rules": [{"type": "attendance_low", "metric": "attendance_rate",
+                "window": "request", "comparator": "<", "threshold": 70,
+                "severity": "warning",
+                "message": "Low attendance rate: {value:.1f}% in last {days} days",
+                "recommendation": "Try to attend more regularly"}]}
+
+``metric`` is one of ``METRICS``; each reads one table. ``window`` is
+``"request"`` (the ``days`` of the request), ``{"days": N}``, ``{"last": N}``
+(each student's N most recent rows) or ``"all"``. Day windows are calendar
+days, ``today - N`` through today, like the day rollups and
+``window_counters``. A rule fires when
+``value <comparator> threshold``; ``message`` may use ``{value}``,
+``{threshold}``, ``{days}`` and ``{last}``. Types must be unique.
+
+``RuleSet.queries`` groups the rules by (table, window) and builds one
+grouped aggregate query per group, so rules over the same table and window
+share a scan: ten attendance rules over the request window still read the
+attendance table once.
+
+``rule_book.current()`` checks the file's modification time on every call
+and reloads it when it changed, so edits apply without a restart. A file
+that fails to parse or validate is reported in ``rule_book.status()`` and
+the previous rules stay in force.
+
+Configuration (environment variables):
+    ALERT_RULES_PATH  rule file (default data/alert_rules.json in the repository)
+"""
+import json
+import operator
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from Backend import models
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "alert_rules.json")
+
+
+@dataclass(frozen=True)
+class Table:
+    model: type
+    time_column: str
+    valid: Optional[Callable] = None  # row filter applied before windowing
+
+
+@dataclass(frozen=True)
+class Metric:
+    table: str
+    aggregate: Callable  # columns -> SQL aggregate
+    empty: Optional[float] = None  # value without rows in the window (None: rules do not apply)
+
+
+TABLES = {
+    "attendance": Table(models.Attendance, "date"),
+    "activities": Table(models.LearningActivity, "start_time"),
+    # Assessments without a positive max_score have no percentage
+    "assessments": Table(models.Assessment, "date", lambda c: c.max_score > 0),
+}
+
+METRICS = {
+    "attendance_rate": Metric("attendance", lambda c: func.sum(case((c.present == True, 1), else_=0)) * 100.0 / func.count(c.id)),
+    "attendance_records": Metric("attendance", lambda c: func.count(c.id), 0),
+    "absences": Metric("attendance", lambda c: func.sum(case((c.present == True, 0), else_=1)), 0),
+    "sessions": Metric("activities", lambda c: func.count(c.id), 0),
+    "completed_sessions": Metric("activities", lambda c: func.sum(case((c.completed == True, 1), else_=0)), 0),
+    "study_minutes": Metric("activities", lambda c: func.coalesce(func.sum(c.duration), 0), 0),
+    "activity_score": Metric("activities", lambda c: func.avg(c.score)),
+    "assessments": Metric("assessments", lambda c: func.count(c.id), 0),
+    "assessment_avg": Metric("assessments", lambda c: func.avg(c.score * 100.0 / c.max_score)),
+}
+
+COMPARATORS = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "==": operator.eq, "!=": operator.ne
+}
+
+# ("request", None), ("days", N), ("last", N) or ("all", None)
+Window = Tuple[str, Optional[int]]
+
+
+@dataclass(frozen=True)
+class Rule:
+    type: str
+    metric: str
+    window: Window
+    comparator: str
+    threshold: float
+    severity: str
+    message: str
+    recommendation: str = ""
+
+    def resolve(self, days: int) -> Window:
+        return ("days", days) if self.window[0] == "request" else self.window
+
+    def check(self, value, days: int) -> Optional[Dict]:
+        """The alert for ``value``, or None when the rule does not fire"""
+        if value is None or not COMPARATORS[self.comparator](value, self.threshold):
+            return None
+        window = self.resolve(days)
+        return {
+            "type": self.type,
+            "message": self.message.format(
+                value=value, threshold=self.threshold,
+                days=window[1] if window[0] == "days" else None, last=window[1] if window[0] == "last" else None
+            ),
+            "severity": self.severity,
+            "recommendation": self.recommendation
+        }
+
+
+def parse_window(raw) -> Window:
+    if raw in ("request", "all"):
+        return (raw, None)
+    if isinstance(raw, dict) and len(raw) == 1:
+        (kind, size), = raw.items()
+        if kind in ("days", "last") and isinstance(size, int) and size > 0:
+            return (kind, size)
+    raise ValueError(f'window must be "request", "all", {{"days": N}} or {{"last": N}}, got {raw!r}')
+
+
+def parse_rule(raw: Dict) -> Rule:
+    missing = [key for key in ("type", "metric", "comparator", "threshold", "severity", "message") if key not in raw]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    if raw["metric"] not in METRICS:
+        raise ValueError(f"unknown metric {raw['metric']!r}, expected one of {sorted(METRICS)}")
+    if raw["comparator"] not in COMPARATORS:
+        raise ValueError(f"unknown comparator {raw['comparator']!r}, expected one of {list(COMPARATORS)}")
+    if not isinstance(raw["threshold"], (int, float)):
+        raise ValueError("threshold must be a number")
+    rule = Rule(
+        type=raw["type"],
+        metric=raw["metric"],
+        window=parse_window(raw.get("window", "request")),
+        comparator=raw["comparator"],
+        threshold=raw["threshold"],
+        severity=raw["severity"],
+        message=raw["message"],
+        recommendation=raw.get("recommendation", "")
+    )
+    # Catch unknown placeholders now rather than on the first matching student
+    try:
+        rule.message.format(value=rule.threshold, threshold=rule.threshold, days=7, last=5)
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(f"bad message template: {e!r}")
+    return rule
+
+
+class RuleSet:
+    def __init__(self, rules: List[Rule], source: str):
+        types = [rule.type for rule in rules]
+        duplicates = sorted({t for t in types if types.count(t) > 1})
+        if duplicates:
+            raise ValueError(f"duplicate rule types {duplicates}")
+        self.rules = rules
+        self.source = source
+        self.loaded_at = datetime.now().isoformat()
+
+    @classmethod
+    def from_config(cls, config: Dict, source: str) -> "RuleSet":
+        rules = []
+        for position, raw in enumerate(config.get("rules", [])):
+            try:
+                rules.append(parse_rule(raw))
+            except ValueError as e:
+                raise ValueError(f"rule {position} ({raw.get('type', '?')}): {e}") from None
+        return cls(rules, source)
+
+    @property
+    def types(self) -> List[str]:
+        return [rule.type for rule in self.rules]
+
+    def groups(self, days: int) -> "OrderedDict[Tuple[str, Window], List[str]]":
+        """Metrics to aggregate per (table, window), in rule order"""
+        groups = OrderedDict()
+        for rule in self.rules:
+            metrics = groups.setdefault((METRICS[rule.metric].table, rule.resolve(days)), [])
+            if rule.metric not in metrics:
+                metrics.append(rule.metric)
+        return groups
+
+    def queries(self, db: Session, days: int, now: datetime, student_ids: Optional[List[int]] = None):
+        """(table, window, metrics, query) per group; each query yields (student_id, *metric values)"""
+        for (table, window), metrics in self.groups(days).items():
+            yield table, window, metrics, _group_query(db, TABLES[table], window, metrics, now, student_ids)
+
+    def describe(self) -> Dict:
+        return {
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "rules": [
+                {**asdict(rule), "window": _window_config(rule.window)} for rule in self.rules
+            ],
+            "queries_per_evaluation": len(self.groups(7))
+        }
+
+
+def _window_config(window: Window):
+    return window[0] if window[1] is None else {window[0]: window[1]}
+
+
+def _group_query(db: Session, table: Table, window: Window, metrics: List[str], now: datetime,
+                 student_ids: Optional[List[int]]):
+    T = table.model.__table__
+    if window[0] == "last":
+        position = func.row_number().over(
+            partition_by=T.c.student_id, order_by=(T.c[table.time_column].desc(), T.c.id.desc())
+        ).label("position")
+        ranked = db.query(*T.c, position).filter(T.c.student_id.isnot(None))
+        if table.valid is not None:
+            ranked = ranked.filter(table.valid(T.c))
+        if student_ids is not None:
+            ranked = ranked.filter(T.c.student_id.in_(student_ids))
+        c = ranked.subquery().c
+        query = db.query(c.student_id, *(METRICS[m].aggregate(c).label(m) for m in metrics)).filter(
+            c.position <= window[1]
+        )
+    else:
+        c = T.c
+        query = db.query(c.student_id, *(METRICS[m].aggregate(c).label(m) for m in metrics)).filter(
+            c.student_id.isnot(None)
+        )
+        if table.valid is not None:
+            query = query.filter(table.valid(c))
+        if window[0] == "days":
+            since = (now - timedelta(days=window[1])).date().isoformat()
+            query = query.filter(func.date(c[table.time_column]) >= since)
+        if student_ids is not None:
+            query = query.filter(c.student_id.in_(student_ids))
+    return query.group_by(c.student_id)
+
+
+class RuleBook:
+    """The rule file, reloaded whenever its modification time changes"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get("ALERT_RULES_PATH", DEFAULT_PATH)
+        self._rules: Optional[RuleSet] = None
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def current(self) -> RuleSet:
+        mtime = self._stat()
+        if self._rules is None or mtime != self._mtime:
+            with self._lock:
+                if self._rules is None or mtime != self._mtime:
+                    self._reload(mtime)
+        if self._rules is None:
+            raise RuntimeError(f"No alert rules loaded: {self.last_error}")
+        return self._rules
+
+    def _reload(self, mtime: Optional[int]):
+        # Remember the mtime either way, so a broken file is parsed once, not on every call
+        self._mtime = mtime
+        try:
+            if mtime is None:
+                raise FileNotFoundError(f"Alert rule file {self.path} not found")
+            with open(self.path) as config:
+                rules = RuleSet.from_config(json.load(config), source=os.path.abspath(self.path))
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+            print(f"❌ Alert rules not reloaded: {e}")
+            return
+        if self._rules is not None:
+            self.reloads += 1
+        self._rules = rules
+        self.last_error = None
+        print(f"✅ Loaded {len(rules.rules)} alert rules from {self.path}")
+
+    def status(self) -> Dict:
+        try:
+            rules = self.current().describe()
+        except RuntimeError:
+            rules = None
+        return {"path": os.path.abspath(self.path), "reloads": self.reloads, "last_error": self.last_error,
+                "active": rules}
+
+
+# Shared rule book of the app
+rule_book = RuleBook()
@@ -1,36 +1,83 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract, case, and_, or_
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from itertools import islice
+import heapq
+import os
 import numpy as np
-from Backend import models
+from Backend import aggregates, models, parallel_analytics, rollups
+from Backend import analytics_kernels as kernels
+from Backend.analytics_cache import analytics_cache
+from Backend.bulk_analytics import BulkAnalyticsEngine
+from Backend.leaderboard import leaderboard
 from Backend.ml_model import RiskPredictionModel
 
+# Students with more activity or assessment rows than this are streamed
+STREAMING_THRESHOLD = int(os.environ.get("ANALYTICS_STREAMING_THRESHOLD", 5000))
+STREAM_BATCH_SIZE = 1000
+
 class LearningAnalytics:
     def __init__(self):
         self.risk_model = RiskPredictionModel()
     
     def get_student_analytics(self, student_id: int, db: Session) -> Dict:
         """Get comprehensive analytics for a student"""
+        # Serve from cache while the student's rows are unchanged
+        cached = analytics_cache.get(student_id)
+        if cached is not None:
+            return cached
+        version = analytics_cache.version(student_id)
+        
         # Get basic student info
         student = db.query(models.Student).filter(models.Student.id == student_id).first()
         if not student:
             return {"error": "Student not found"}
         
+        # Long histories are streamed through single-pass accumulators
+        streaming = self._use_streaming(student_id, db)
+        
         # Calculate attendance analytics
         attendance_stats = self._calculate_attendance_stats(student_id, db)
         
         # Calculate learning progress
-        learning_progress = self._calculate_learning_progress(student_id, db)
+        learning_progress = self._calculate_learning_progress(student_id, db, streaming=streaming)
         
         # Calculate assessment scores
-        assessment_scores = self._calculate_assessment_scores(student_id, db)
+        assessment_scores = self._calculate_assessment_scores(student_id, db, streaming=streaming)
         
         # Calculate study patterns
-        study_patterns = self._analyze_study_patterns(student_id, db)
+        study_patterns = self._analyze_study_patterns(student_id, db, streaming=streaming)
+        
+        # Get recent activities
+        recent_activities = db.query(models.LearningActivity).filter(
+            models.LearningActivity.student_id == student_id
+        ).order_by(models.LearningActivity.start_time.desc()).limit(5).all()
         
+        payload = self._build_student_payload(
+            student, db,
+            attendance_stats=attendance_stats,
+            learning_progress=learning_progress,
+            assessment_scores=assessment_scores,
+            study_patterns=study_patterns,
+            progress_by_subject=self._calculate_progress_by_subject(student_id, db),
+            recent_activities=[kernels.recent_activity(act) for act in recent_activities]
+        )
+        analytics_cache.put(student_id, version, payload)
+        return payload
+    
+    def _build_student_payload(self, student, db: Session,
+                               attendance_stats: Dict,
+                               learning_progress: Dict,
+                               assessment_scores: Dict,
+                               study_patterns: Dict,
+                               progress_by_subject: Dict,
+                               recent_activities: List[Dict],
+                               model_prediction: Optional[Dict] = None) -> Dict:
+        """Assemble the student analytics response from its computed sections"""
         # Predict risk level
-        risk_prediction = self._predict_risk_level(student_id, db, attendance_stats, learning_progress, assessment_scores)
+        risk_prediction = self._predict_risk_level(student.id, db, attendance_stats, learning_progress,
+                                                   assessment_scores, model_prediction=model_prediction)
         
         # Generate recommendations
         recommendations = self._generate_recommendations(
@@ -40,16 +87,8 @@ class LearningAnalytics:
             risk_prediction.get('risk_level', 'medium')
         )
         
-        # Calculate progress by subject
-        progress_by_subject = self._calculate_progress_by_subject(student_id, db)
-        
-        # Get recent activities
-        recent_activities = db.query(models.LearningActivity).filter(
-            models.LearningActivity.student_id == student_id
-        ).order_by(models.LearningActivity.start_time.desc()).limit(5).all()
-        
         return {
-            "student_id": student_id,
+            "student_id": student.id,
             "student_name": student.name,
             "grade": student.grade,
             "village": student.village,
@@ -66,17 +105,7 @@ class LearningAnalytics:
             "risk_factors": risk_prediction.get('factors', []),
             
             "recommendations": recommendations,
-            "recent_activities": [
-                {
-                    "id": act.id,
-                    "syllabus_id": act.syllabus_id,
-                    "start_time": act.start_time.isoformat() if act.start_time else None,
-                    "duration": act.duration,
-                    "completed": act.completed,
-                    "score": act.score
-                }
-                for act in recent_activities
-            ],
+            "recent_activities": recent_activities,
             
             "summary": self._generate_summary(
                 attendance_stats,
@@ -86,330 +115,161 @@ class LearningAnalytics:
             )
         }
     
+    def _use_streaming(self, student_id: int, db: Session) -> bool:
+        """Whether a student's history is past ANALYTICS_STREAMING_THRESHOLD rows"""
+        counters = aggregates.get_student_aggregates(db, student_id)
+        return max(counters.activity_total or 0, counters.assessment_total or 0) > STREAMING_THRESHOLD
+    
     def _calculate_attendance_stats(self, student_id: int, db: Session) -> Dict:
         """Calculate attendance statistics"""
-        # Get all attendance records for student
-        attendance_records = db.query(models.Attendance).filter(
-            models.Attendance.student_id == student_id
-        ).all()
-        
-        if not attendance_records:
-            return {
-                "total_days": 0,
-                "days_present": 0,
-                "attendance_rate": 0,
-                "by_subject": [],
-                "recent_trend": [],
-                "monthly_trend": []
-            }
-        
-        total_days = len(attendance_records)
-        days_present = sum(1 for record in attendance_records if record.present)
-        attendance_rate = (days_present / total_days * 100) if total_days > 0 else 0
-        
-        # Attendance by subject
-        by_subject = {}
-        for record in attendance_records:
-            subject = record.subject or "General"
-            if subject not in by_subject:
-                by_subject[subject] = {"total": 0, "present": 0}
-            by_subject[subject]["total"] += 1
-            if record.present:
-                by_subject[subject]["present"] += 1
-        
-        # Recent trend (last 7 days)
-        week_ago = datetime.now() - timedelta(days=7)
-        recent_records = [r for r in attendance_records if r.date and r.date >= week_ago]
-        
-        recent_trend = {}
-        for record in recent_records:
-            if record.date:
-                date_str = record.date.strftime("%Y-%m-%d")
-                if date_str not in recent_trend:
-                    recent_trend[date_str] = {"total": 0, "present": 0}
-                recent_trend[date_str]["total"] += 1
-                if record.present:
-                    recent_trend[date_str]["present"] += 1
-        
-        # Monthly trend
-        monthly_trend = {}
-        for record in attendance_records:
-            if record.date:
-                month_key = record.date.strftime("%Y-%m")
-                if month_key not in monthly_trend:
-                    monthly_trend[month_key] = {"total": 0, "present": 0}
-                monthly_trend[month_key]["total"] += 1
-                if record.present:
-                    monthly_trend[month_key]["present"] += 1
-        
-        return {
-            "total_days": total_days,
-            "days_present": days_present,
-            "attendance_rate": round(attendance_rate, 2),
-            "by_subject": [
-                {
-                    "subject": subject,
-                    "total": data["total"],
-                    "present": data["present"],
-                    "rate": round((data["present"] / data["total"] * 100), 2) if data["total"] > 0 else 0
-                }
-                for subject, data in by_subject.items()
-            ],
-            "recent_trend": [
-                {
-                    "date": date_str,
-                    "total": data["total"],
-                    "present": data["present"],
-                    "rate": round((data["present"] / data["total"] * 100), 2) if data["total"] > 0 else 0
-                }
-                for date_str, data in recent_trend.items()
-            ],
-            "monthly_trend": [
-                {
-                    "month": month_key,
-                    "total": data["total"],
-                    "present": data["present"],
-                    "rate": round((data["present"] / data["total"] * 100), 2) if data["total"] > 0 else 0
-                }
-                for month_key, data in monthly_trend.items()
-            ]
-        }
+        A, R = models.Attendance, models.AttendanceRollup
+        subject = case((or_(A.subject.is_(None), A.subject == ""), "General"), else_=A.subject)
+        by_subject = db.query(
+            subject, func.count(A.id), func.sum(case((A.present == True, 1), else_=0))
+        ).filter(
+            A.student_id == student_id
+        ).group_by(subject).order_by(func.min(A.id)).all()
+        
+        if not by_subject:
+            return kernels.empty_attendance_stats()
+        
+        # Trends come from the maintained day and month rollups
+        week_ago = (datetime.now() - timedelta(days=7)).date()
+        recent = rollups.grouped(db, R, "day", ("bucket_start",),
+                                 R.student_id == student_id, R.bucket_start >= week_ago, first_seen=True)
+        monthly = rollups.grouped(db, R, "month", ("bucket_start",),
+                                  R.student_id == student_id, first_seen=True)
+        
+        return kernels.attendance_stats(
+            by_subject,
+            [(day.isoformat(), total, present) for day, total, present in recent],
+            [(month.strftime("%Y-%m"), total, present) for month, total, present in monthly]
+        )
     
-    def _calculate_learning_progress(self, student_id: int, db: Session) -> Dict:
+    def _calculate_learning_progress(self, student_id: int, db: Session, streaming: bool = False) -> Dict:
         """Calculate learning progress analytics"""
-        # Get all learning activities for student
-        activities = db.query(models.LearningActivity).filter(
+        # Get the learning activity columns for student
+        query = db.query(
+            models.LearningActivity.start_time,
+            models.LearningActivity.completed,
+            models.LearningActivity.score,
+            models.LearningActivity.duration
+        ).filter(
             models.LearningActivity.student_id == student_id
-        ).all()
-        
-        if not activities:
-            return {
-                "total_activities": 0,
-                "completed_activities": 0,
-                "completion_rate": 0,
-                "average_score": 0,
-                "total_study_time": 0,
-                "average_duration": 0,
-                "weekly_activities": 0,
-                "score_distribution": []
-            }
+        )
         
-        total_activities = len(activities)
-        completed_activities = sum(1 for act in activities if act.completed)
-        completion_rate = (completed_activities / total_activities * 100) if total_activities > 0 else 0
+        if streaming:
+            accumulator = kernels.LearningProgressAccumulator(datetime.now() - timedelta(days=7))
+            for row in query.yield_per(STREAM_BATCH_SIZE):
+                accumulator.add(*row)
+            return accumulator.result()
         
-        # Calculate scores
-        scores = [act.score for act in activities if act.score is not None]
-        average_score = sum(scores) / len(scores) if scores else 0
+        activities = query.all()
+        if not activities:
+            return kernels.empty_learning_progress()
         
-        # Calculate study time
-        total_study_time = sum(act.duration or 0 for act in activities if act.duration)
-        average_duration = total_study_time / len(activities) if activities else 0
+        start_times, completed, scores, durations = zip(*activities)
+        start_times = kernels.datetime_array(start_times)
+        scores = kernels.float_array(scores)
+        has_score = ~np.isnan(scores)
         
         # Weekly activity count
-        week_ago = datetime.now() - timedelta(days=7)
-        weekly_activities = sum(1 for act in activities if act.start_time and act.start_time >= week_ago)
-        
-        # Score distribution
-        score_distribution = {
-            "excellent": sum(1 for act in activities if act.score and act.score >= 90),
-            "good": sum(1 for act in activities if act.score and 75 <= act.score < 90),
-            "average": sum(1 for act in activities if act.score and 60 <= act.score < 75),
-            "poor": sum(1 for act in activities if act.score and act.score < 60),
-            "no_score": sum(1 for act in activities if act.score is None)
-        }
-        
-        return {
-            "total_activities": total_activities,
-            "completed_activities": completed_activities,
-            "completion_rate": round(completion_rate, 2),
-            "average_score": round(average_score, 2),
-            "total_study_time": round(total_study_time, 2),
-            "average_duration": round(average_duration, 2),
-            "weekly_activities": weekly_activities,
-            "score_distribution": score_distribution
-        }
+        week_ago = np.datetime64(datetime.now() - timedelta(days=7), "us")
+        weekly_activities = int((~np.isnat(start_times) & (start_times >= week_ago)).sum())
+        
+        return kernels.learning_progress(
+            total_activities=len(activities),
+            completed_activities=int(np.array(completed, dtype=bool).sum()),
+            score_sum=kernels.sequential_sum(scores[has_score]),
+            score_count=int(has_score.sum()),
+            total_study_time=kernels.native_number(kernels.sequential_sum(np.nan_to_num(kernels.float_array(durations)))),
+            weekly_activities=weekly_activities,
+            score_distribution=kernels.score_distribution(scores)
+        )
     
-    def _calculate_assessment_scores(self, student_id: int, db: Session) -> Dict:
+    def _calculate_assessment_scores(self, student_id: int, db: Session, streaming: bool = False) -> Dict:
         """Calculate assessment scores analytics"""
         # Get all assessments for student
-        assessments = db.query(models.Assessment).filter(
+        query = db.query(
+            models.Assessment.subject,
+            models.Assessment.score,
+            models.Assessment.max_score,
+            models.Assessment.date
+        ).filter(
             models.Assessment.student_id == student_id
-        ).all()
-        
-        if not assessments:
-            return {
-                "total_assessments": 0,
-                "average_score": 0,
-                "best_score": 0,
-                "worst_score": 0,
-                "improvement_trend": [],
-                "by_subject": []
-            }
-        
-        total_assessments = len(assessments)
+        ).order_by(models.Assessment.id)
         
-        # Calculate scores
-        scores = [ass.score / ass.max_score * 100 for ass in assessments if ass.max_score and ass.max_score > 0]
-        average_score = sum(scores) / len(scores) if scores else 0
-        best_score = max(scores) if scores else 0
-        worst_score = min(scores) if scores else 0
-        
-        # Improvement trend (by date)
-        assessments_by_date = sorted(
-            [ass for ass in assessments if ass.date],
-            key=lambda x: x.date
-        )
+        if streaming:
+            accumulator = kernels.AssessmentScoresAccumulator()
+            for row in query.yield_per(STREAM_BATCH_SIZE):
+                accumulator.add(*row)
+            return accumulator.result()
         
-        improvement_trend = [
-            {
-                "date": ass.date.strftime("%Y-%m-%d"),
-                "score": round((ass.score / ass.max_score * 100), 2) if ass.max_score and ass.max_score > 0 else 0,
-                "subject": ass.subject
-            }
-            for ass in assessments_by_date
-        ]
-        
-        # Scores by subject
-        scores_by_subject = {}
-        for ass in assessments:
-            subject = ass.subject or "General"
-            percentage = (ass.score / ass.max_score * 100) if ass.max_score and ass.max_score > 0 else 0
-            
-            if subject not in scores_by_subject:
-                scores_by_subject[subject] = {
-                    "total": 0,
-                    "sum": 0,
-                    "scores": []
-                }
-            
-            scores_by_subject[subject]["total"] += 1
-            scores_by_subject[subject]["sum"] += percentage
-            scores_by_subject[subject]["scores"].append(percentage)
-        
-        return {
-            "total_assessments": total_assessments,
-            "average_score": round(average_score, 2),
-            "best_score": round(best_score, 2),
-            "worst_score": round(worst_score, 2),
-            "improvement_trend": improvement_trend,
-            "by_subject": [
-                {
-                    "subject": subject,
-                    "average_score": round(data["sum"] / data["total"], 2) if data["total"] > 0 else 0,
-                    "total_assessments": data["total"],
-                    "best_score": round(max(data["scores"]), 2) if data["scores"] else 0,
-                    "worst_score": round(min(data["scores"]), 2) if data["scores"] else 0
-                }
-                for subject, data in scores_by_subject.items()
-            ]
-        }
+        return kernels.assessment_scores(query.all())
     
-    def _analyze_study_patterns(self, student_id: int, db: Session) -> Dict:
+    def _analyze_study_patterns(self, student_id: int, db: Session, streaming: bool = False) -> Dict:
         """Analyze study patterns and habits"""
-        activities = db.query(models.LearningActivity).filter(
+        query = db.query(
+            models.LearningActivity.start_time,
+            models.LearningActivity.duration
+        ).filter(
             models.LearningActivity.student_id == student_id,
             models.LearningActivity.start_time.isnot(None)
-        ).all()
-        
-        if not activities:
-            return {
-                "preferred_time": "Not enough data",
-                "average_session_length": 0,
-                "consistency_score": 0,
-                "weekly_pattern": {},
-                "peak_hours": []
-            }
+        )
         
-        # Analyze time of day preferences
-        hour_distribution = {hour: 0 for hour in range(24)}
-        for act in activities:
-            if act.start_time:
-                hour = act.start_time.hour
-                hour_distribution[hour] = hour_distribution.get(hour, 0) + 1
-        
-        # Find preferred study time
-        preferred_hour = max(hour_distribution.items(), key=lambda x: x[1])[0] if hour_distribution else None
-        preferred_time = "Not enough data"
-        if preferred_hour is not None:
-            if 5 <= preferred_hour < 12:
-                preferred_time = "Morning"
-            elif 12 <= preferred_hour < 17:
-                preferred_time = "Afternoon"
-            elif 17 <= preferred_hour < 22:
-                preferred_time = "Evening"
-            else:
-                preferred_time = "Night"
-        
-        # Calculate average session length
-        durations = [act.duration for act in activities if act.duration]
-        average_session_length = sum(durations) / len(durations) if durations else 0
-        
-        # Calculate consistency (study days per week)
-        study_dates = set()
-        for act in activities:
-            if act.start_time:
-                study_dates.add(act.start_time.date())
-        
-        total_days = len(study_dates)
-        if total_days > 0:
-            first_date = min(study_dates)
-            last_date = max(study_dates)
-            total_weeks = max(1, (last_date - first_date).days / 7)
-            consistency_score = min(100, (total_days / (total_weeks * 7)) * 100)
-        else:
-            consistency_score = 0
-        
-        # Weekly pattern
-        day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        weekly_pattern = {day: 0 for day in day_names}
-        for act in activities:
-            if act.start_time:
-                day_index = act.start_time.weekday()
-                weekly_pattern[day_names[day_index]] += 1
-        
-        # Peak hours (top 3 hours)
-        peak_hours = sorted(
-            [(hour, count) for hour, count in hour_distribution.items() if count > 0],
-            key=lambda x: x[1],
-            reverse=True
-        )[:3]
+        if streaming:
+            accumulator = kernels.StudyPatternsAccumulator()
+            for row in query.yield_per(STREAM_BATCH_SIZE):
+                accumulator.add(*row)
+            return accumulator.result()
         
-        return {
-            "preferred_time": preferred_time,
-            "average_session_length": round(average_session_length, 2),
-            "consistency_score": round(consistency_score, 2),
-            "weekly_pattern": weekly_pattern,
-            "peak_hours": [
-                {
-                    "hour": f"{hour:02d}:00",
-                    "count": count,
-                    "percentage": round((count / len(activities) * 100), 2)
-                }
-                for hour, count in peak_hours
-            ]
-        }
+        activities = query.all()
+        if not activities:
+            return kernels.empty_study_patterns()
+        
+        start_times, durations = zip(*activities)
+        start_times = kernels.datetime_array(start_times)
+        durations = kernels.float_array(durations)
+        
+        # Time of day and weekday histograms
+        hour_counts, weekday_counts = kernels.hour_weekday_counts(start_times)
+        
+        # Average session length over sessions with a recorded duration
+        timed = ~np.isnan(durations) & (durations != 0)
+        average_session_length = kernels.sequential_sum(durations[timed]) / timed.sum() if timed.any() else 0
+        
+        # Consistency (study days per week)
+        study_dates = np.unique(start_times.astype("datetime64[D]"))
+        
+        return kernels.study_patterns(
+            hour_counts,
+            weekday_counts,
+            session_count=len(activities),
+            average_session_length=average_session_length,
+            study_days=len(study_dates),
+            first_date=study_dates[0].item(),
+            last_date=study_dates[-1].item()
+        )
     
     def _calculate_progress_by_subject(self, student_id: int, db: Session) -> Dict:
         """Calculate progress by subject"""
-        # Get activities with syllabus information
+        # Stream the activity columns with their syllabus subject
         activities = db.query(
-            models.LearningActivity,
-            models.Syllabus
+            models.Syllabus.subject,
+            models.LearningActivity.completed,
+            models.LearningActivity.score,
+            models.LearningActivity.duration
         ).join(
             models.Syllabus,
             models.LearningActivity.syllabus_id == models.Syllabus.id
         ).filter(
             models.LearningActivity.student_id == student_id
-        ).all()
-        
-        if not activities:
-            return {}
+        ).yield_per(STREAM_BATCH_SIZE)
         
         progress_by_subject = {}
         
-        for activity, syllabus in activities:
-            subject = syllabus.subject
+        for activity in activities:
+            subject = activity.subject
             
             if subject not in progress_by_subject:
                 progress_by_subject[subject] = {
@@ -451,11 +311,14 @@ class LearningAnalytics:
     def _predict_risk_level(self, student_id: int, db: Session, 
                           attendance_stats: Dict, 
                           learning_progress: Dict,
-                          assessment_scores: Dict) -> Dict:
-        """Predict student risk level"""
+                          assessment_scores: Dict,
+                          model_prediction: Optional[Dict] = None) -> Dict:
+        """Predict student risk level (``model_prediction``: already scored in a batch)"""
         try:
             # Use ML model for prediction
-            risk_prediction = self.risk_model.predict_risk(student_id, db)
+            risk_prediction = model_prediction
+            if risk_prediction is None and self.risk_model.discriminates():
+                risk_prediction = self.risk_model.predict_risk(student_id, db)
             
             if risk_prediction and "error" not in risk_prediction:
                 return {
@@ -674,41 +537,47 @@ class LearningAnalytics:
         
         return summary
     
-    def get_class_analytics(self, db: Session, grade: Optional[str] = None) -> Dict:
-        """Get analytics for entire class or specific grade"""
-        # Get all students or filtered by grade
-        query = db.query(models.Student)
-        if grade:
-            query = query.filter(models.Student.grade == grade)
-        
-        students = query.all()
+    def get_class_analytics(self, db: Session, grade: Optional[str] = None,
+                            start: Optional[datetime] = None,
+                            end: Optional[datetime] = None,
+                            workers: Optional[int] = None) -> Dict:
+        """Get analytics for entire class or specific grade.
+        
+        ``workers`` above 1 spreads the students over a process pool (see
+        ``parallel_analytics``); the default comes from ANALYTICS_WORKERS.
+        """
+        workers = parallel_analytics.configured_workers() if workers is None else workers
+        if workers > 1:
+            class_analytics = parallel_analytics.class_payloads(db, grade, start, end, workers)
+        else:
+            # Compute every student's sections with a fixed number of grouped queries
+            sections = BulkAnalyticsEngine(db, grade=grade, start=start, end=end).compute()
+            predictions = self.model_predictions(db, list(sections))
+            class_analytics = [
+                self._payload_from_sections(student_sections, db, predictions)
+                for student_sections in sections.values()
+            ]
         
-        if not students:
+        if not class_analytics:
             return {"error": "No students found"}
         
-        # Collect analytics for each student
-        class_analytics = []
+        # Aggregate the per-student analytics
         total_attendance_rate = 0
         total_completion_rate = 0
         total_average_score = 0
         risk_distribution = {"low": 0, "medium": 0, "high": 0}
         
-        for student in students:
-            student_analytics = self.get_student_analytics(student.id, db)
+        for student_analytics in class_analytics:
+            # Aggregate data
+            attendance_rate = student_analytics.get("attendance", {}).get("attendance_rate", 0)
+            completion_rate = student_analytics.get("learning_progress", {}).get("completion_rate", 0)
+            average_score = student_analytics.get("learning_progress", {}).get("average_score", 0)
+            risk_level = student_analytics.get("risk_level", "medium")
             
-            if "error" not in student_analytics:
-                class_analytics.append(student_analytics)
-                
-                # Aggregate data
-                attendance_rate = student_analytics.get("attendance", {}).get("attendance_rate", 0)
-                completion_rate = student_analytics.get("learning_progress", {}).get("completion_rate", 0)
-                average_score = student_analytics.get("learning_progress", {}).get("average_score", 0)
-                risk_level = student_analytics.get("risk_level", "medium")
-                
-                total_attendance_rate += attendance_rate
-                total_completion_rate += completion_rate
-                total_average_score += average_score
-                risk_distribution[risk_level] = risk_distribution.get(risk_level, 0) + 1
+            total_attendance_rate += attendance_rate
+            total_completion_rate += completion_rate
+            total_average_score += average_score
+            risk_distribution[risk_level] = risk_distribution.get(risk_level, 0) + 1
         
         num_students = len(class_analytics)
         
@@ -719,66 +588,104 @@ class LearningAnalytics:
             "average_completion_rate": round(total_completion_rate / num_students, 2) if num_students > 0 else 0,
             "average_score": round(total_average_score / num_students, 2) if num_students > 0 else 0,
             "risk_distribution": risk_distribution,
-            "top_performers": sorted(
-                class_analytics,
-                key=lambda x: (x.get("learning_progress", {}).get("average_score", 0) * 0.4 +
-                              x.get("assessment_scores", {}).get("average_score", 0) * 0.3 +
-                              x.get("attendance", {}).get("attendance_rate", 0) * 0.3),
-                reverse=True
-            )[:5],
-            "students_needing_attention": [
-                analytics for analytics in class_analytics 
-                if analytics.get("risk_level") in ["high", "medium"]
-            ][:10],
+            "top_performers": self._top_performers(db, class_analytics, grade, start, end),
+            "students_needing_attention": list(islice(
+                (analytics for analytics in class_analytics
+                 if analytics.get("risk_level") in ["high", "medium"]),
+                10
+            )),
             "analytics_date": datetime.now().isoformat()
         }
     
+    def _top_performers(self, db: Session, class_analytics: List[Dict], grade: Optional[str],
+                        start: Optional[datetime], end: Optional[datetime], k: int = 5) -> List[Dict]:
+        """Best k students by weighted performance"""
+        if start is None and end is None:
+            # All-time scores are maintained in the leaderboard index
+            by_id = {analytics["student_id"]: analytics for analytics in class_analytics}
+            return [by_id[entry["student_id"]] for entry in leaderboard.top(db, k, grade=grade)
+                    if entry["student_id"] in by_id]
+        # nlargest keeps sorted()'s tie order without sorting the whole class
+        return heapq.nlargest(k, class_analytics, key=kernels.weighted_performance)
+    
+    def iter_class_analytics(self, db: Session, student_ids: List[int],
+                             start: Optional[datetime] = None,
+                             end: Optional[datetime] = None,
+                             chunk_size: int = 250) -> Iterator[Dict]:
+        """Yield student analytics payloads chunk by chunk, for streaming responses"""
+        for offset in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[offset:offset + chunk_size]
+            sections = BulkAnalyticsEngine(db, student_ids=chunk, start=start, end=end).compute()
+            predictions = self.model_predictions(db, list(sections))
+            for student_sections in sections.values():
+                yield self._payload_from_sections(student_sections, db, predictions)
+    
+    def model_predictions(self, db: Session, student_ids: List[int]) -> Dict[int, Dict]:
+        """Risk model results for many students from the feature store, in one model call"""
+        try:
+            # A single-class model would give everyone the same level; the rules decide instead
+            predictions = self.risk_model.predict_risk_bulk(db, student_ids) if self.risk_model.discriminates() else {}
+        except Exception as e:
+            print(f"Error in risk prediction: {e}")
+            predictions = {}
+        # Students without features (or a failed batch) fall back to the rules
+        missing = {"error": "No model prediction"}
+        return {student_id: predictions.get(student_id, missing) for student_id in student_ids}
+    
+    def _payload_from_sections(self, sections: Dict, db: Session,
+                               predictions: Optional[Dict[int, Dict]] = None) -> Dict:
+        student = sections["student"]
+        return self._build_student_payload(
+            student, db,
+            attendance_stats=sections["attendance"],
+            learning_progress=sections["learning_progress"],
+            assessment_scores=sections["assessment_scores"],
+            study_patterns=sections["study_patterns"],
+            progress_by_subject=sections["progress_by_subject"],
+            recent_activities=sections["recent_activities"],
+            model_prediction=predictions.get(student.id) if predictions is not None else None
+        )
+    
     def get_subject_analytics(self, subject: str, db: Session, 
                              grade: Optional[str] = None) -> Dict:
         """Get analytics for specific subject"""
-        # Get all students
-        query = db.query(models.Student)
-        if grade:
-            query = query.filter(models.Student.grade == grade)
-        
-        students = query.all()
-        
-        subject_analytics = []
-        total_score = 0
-        score_count = 0
-        
-        for student in students:
-            # Get student analytics
-            student_analytics = self.get_student_analytics(student.id, db)
+        return self.get_subjects_analytics([subject], db, grade=grade)[subject]
+    
+    def get_subjects_analytics(self, subjects: List[str], db: Session,
+                               grade: Optional[str] = None,
+                               start: Optional[datetime] = None,
+                               end: Optional[datetime] = None,
+                               workers: Optional[int] = None) -> Dict[str, Dict]:
+        """Get analytics for several subjects from one grouped activities query"""
+        workers = parallel_analytics.configured_workers() if workers is None else workers
+        if workers > 1:
+            rows = parallel_analytics.subject_rows(db, subjects, grade, start, end, workers)
+        else:
+            rows = BulkAnalyticsEngine(db, grade=grade, start=start, end=end).subject_progress(subjects)
+        
+        subject_analytics = {subject: [] for subject in subjects}
+        for subject, student_id, name, student_grade, total, completed, score_sum, score_count in rows:
+            subject_analytics[subject].append({
+                "student_id": student_id,
+                "student_name": name,
+                "grade": student_grade,
+                "completion_rate": kernels.percentage(completed, total),
+                "average_score": round(score_sum / score_count, 2) if score_count > 0 else 0,
+                "total_activities": total,
+                "completed_activities": completed
+            })
+        
+        results = {}
+        for subject, performance in subject_analytics.items():
+            scores = [p["average_score"] for p in performance if p["average_score"] > 0]
+            average_score = sum(scores) / len(scores) if scores else 0
             
-            if "error" not in student_analytics:
-                # Get subject-specific progress
-                subject_progress = student_analytics.get("progress_by_subject", {}).get(subject)
-                
-                if subject_progress:
-                    subject_data = {
-                        "student_id": student.id,
-                        "student_name": student.name,
-                        "grade": student.grade,
-                        "completion_rate": subject_progress.get("completion_rate", 0),
-                        "average_score": subject_progress.get("average_score", 0),
-                        "total_activities": subject_progress.get("total_activities", 0),
-                        "completed_activities": subject_progress.get("completed_activities", 0)
-                    }
-                    
-                    subject_analytics.append(subject_data)
-                    
-                    if subject_progress.get("average_score", 0) > 0:
-                        total_score += subject_progress.get("average_score", 0)
-                        score_count += 1
-        
-        average_score = total_score / score_count if score_count > 0 else 0
-        
-        return {
-            "subject": subject,
-            "grade": grade or "All Grades",
-            "total_students": len(subject_analytics),
-            "average_score": round(average_score, 2),
-            "student_performance": sorted(subject_analytics, key=lambda x: x.get("average_score", 0), reverse=True),
-            "analytics_date": datetime.now().isoformat()
-        }
\ No newline at end of file
+            results[subject] = {
+                "subject": subject,
+                "grade": grade or "All Grades",
+                "total_students": len(performance),
+                "average_score": round(average_score, 2),
+                "student_performance": sorted(performance, key=lambda x: x.get("average_score", 0), reverse=True),
+                "analytics_date": datetime.now().isoformat()
+            }
+        return results
@@ -0,0 +1,118 @@
+"""Bounded LRU cache of per-student analytics payloads.
+
+``get_student_analytics`` only depends on a student's own rows and the clock,
+so payloads are cached per student together with that student's data
+version. Write endpoints call ``invalidate`` after committing, which bumps the
+version and drops the stale entry; the TTL covers the weekly windows that
+move with the current time. ``clear`` (on a model swap) advances a
+generation that is part of every version, so payloads still being computed
+with the old model are not stored afterwards.
+
+Configuration (environment variables):
+    ANALYTICS_CACHE_MAX_BYTES    memory cap for cached payloads (default 64 MB)
+    ANALYTICS_CACHE_TTL_SECONDS  lifetime of an entry (default 300)
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class AnalyticsCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 300):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # student_id -> (version, payload, size, stored_at)
+        self._versions = {}
+        self._generation = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def version(self, student_id: int) -> Tuple[int, int]:
+        return self._generation, self._versions.get(student_id, 0)
+
+    def get(self, student_id: int) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            version, payload, size, stored_at = entry
+            if version != self.version(student_id):
+                self._drop(student_id)
+                self.misses += 1
+                return None
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._drop(student_id)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(student_id)
+            self.hits += 1
+            return payload
+
+    def put(self, student_id: int, version: Tuple[int, int], payload: Dict):
+        """Store a payload computed while the student was at ``version``"""
+        size = len(json.dumps(payload, default=str))
+        with self._lock:
+            # A write or a clear landed while this payload was being computed
+            if version != self.version(student_id) or size > self.max_bytes:
+                return
+            if student_id in self._entries:
+                self._drop(student_id)
+            self._entries[student_id] = (version, payload, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, *student_ids: Optional[int]):
+        """Bump the data version of students whose rows were just written"""
+        with self._lock:
+            for student_id in set(student_ids):
+                if student_id is None:
+                    continue
+                self._versions[student_id] = self._versions.get(student_id, 0) + 1
+                if student_id in self._entries:
+                    self._drop(student_id)
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry, and payloads computed before the clear that are yet to be stored"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+    def _drop(self, student_id: int):
+        entry = self._entries.pop(student_id)
+        self._bytes -= entry[2]
+
+
+analytics_cache = AnalyticsCache(
+    max_bytes=int(os.environ.get("ANALYTICS_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    ttl_seconds=float(os.environ.get("ANALYTICS_CACHE_TTL_SECONDS", 300))
+)
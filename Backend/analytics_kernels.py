@@ -0,0 +1,459 @@
+"""Pure helpers that turn pre-aggregated counts into analytics response sections.
+
+The per-student methods in ``LearningAnalytics`` and the set-based
+``BulkAnalyticsEngine`` both feed these functions, so the two paths always
+produce the same response shape. The array helpers at the end build those
+counts from column arrays with NumPy instead of Python loops over ORM objects.
+"""
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Bucket edges for score_distribution: poor < 60 <= average < 75 <= good < 90 <= excellent
+SCORE_BINS = [-np.inf, 60, 75, 90, np.inf]
+
+
+def percentage(part: float, total: float) -> float:
+    """Rounded percentage, 0 when there is nothing to divide by"""
+    return round((part / total * 100), 2) if total > 0 else 0
+
+
+def empty_attendance_stats() -> Dict:
+    return {
+        "total_days": 0,
+        "days_present": 0,
+        "attendance_rate": 0,
+        "by_subject": [],
+        "recent_trend": [],
+        "monthly_trend": []
+    }
+
+
+def attendance_stats(by_subject: Sequence[Tuple[str, int, int]],
+                     recent_trend: Sequence[Tuple[str, int, int]],
+                     monthly_trend: Sequence[Tuple[str, int, int]]) -> Dict:
+    """Build the attendance section from (key, total, present) groups"""
+    total_days = sum(total for _, total, _ in by_subject)
+    if total_days == 0:
+        return empty_attendance_stats()
+
+    days_present = sum(present for _, _, present in by_subject)
+
+    return {
+        "total_days": total_days,
+        "days_present": days_present,
+        "attendance_rate": round(days_present / total_days * 100, 2),
+        "by_subject": [
+            {"subject": subject, "total": total, "present": present, "rate": percentage(present, total)}
+            for subject, total, present in by_subject
+        ],
+        "recent_trend": [
+            {"date": date_str, "total": total, "present": present, "rate": percentage(present, total)}
+            for date_str, total, present in recent_trend
+        ],
+        "monthly_trend": [
+            {"month": month_key, "total": total, "present": present, "rate": percentage(present, total)}
+            for month_key, total, present in monthly_trend
+        ]
+    }
+
+
+def empty_learning_progress() -> Dict:
+    return {
+        "total_activities": 0,
+        "completed_activities": 0,
+        "completion_rate": 0,
+        "average_score": 0,
+        "total_study_time": 0,
+        "average_duration": 0,
+        "weekly_activities": 0,
+        "score_distribution": []
+    }
+
+
+def learning_progress(total_activities: int,
+                      completed_activities: int,
+                      score_sum: float,
+                      score_count: int,
+                      total_study_time: float,
+                      weekly_activities: int,
+                      score_distribution: Dict[str, int]) -> Dict:
+    """Build the learning progress section from activity counters"""
+    if total_activities == 0:
+        return empty_learning_progress()
+
+    average_score = score_sum / score_count if score_count else 0
+
+    return {
+        "total_activities": total_activities,
+        "completed_activities": completed_activities,
+        "completion_rate": round(completed_activities / total_activities * 100, 2),
+        "average_score": round(average_score, 2),
+        "total_study_time": round(total_study_time, 2),
+        "average_duration": round(total_study_time / total_activities, 2),
+        "weekly_activities": weekly_activities,
+        "score_distribution": {
+            "excellent": score_distribution.get("excellent", 0),
+            "good": score_distribution.get("good", 0),
+            "average": score_distribution.get("average", 0),
+            "poor": score_distribution.get("poor", 0),
+            "no_score": score_distribution.get("no_score", 0)
+        }
+    }
+
+
+def empty_assessment_scores() -> Dict:
+    return {
+        "total_assessments": 0,
+        "average_score": 0,
+        "best_score": 0,
+        "worst_score": 0,
+        "improvement_trend": [],
+        "by_subject": []
+    }
+
+
+def assessment_scores(assessments: Iterable) -> Dict:
+    """Build the assessment section from rows exposing subject/score/max_score/date"""
+    assessments = list(assessments)
+    if not assessments:
+        return empty_assessment_scores()
+
+    scores = [ass.score / ass.max_score * 100 for ass in assessments if ass.max_score and ass.max_score > 0]
+    average_score = sum(scores) / len(scores) if scores else 0
+
+    assessments_by_date = sorted([ass for ass in assessments if ass.date], key=lambda x: x.date)
+
+    scores_by_subject = {}
+    for ass in assessments:
+        subject = ass.subject or "General"
+        pct = (ass.score / ass.max_score * 100) if ass.max_score and ass.max_score > 0 else 0
+        scores_by_subject.setdefault(subject, []).append(pct)
+
+    return {
+        "total_assessments": len(assessments),
+        "average_score": round(average_score, 2),
+        "best_score": round(max(scores), 2) if scores else 0,
+        "worst_score": round(min(scores), 2) if scores else 0,
+        "improvement_trend": [
+            {
+                "date": ass.date.strftime("%Y-%m-%d"),
+                "score": round((ass.score / ass.max_score * 100), 2) if ass.max_score and ass.max_score > 0 else 0,
+                "subject": ass.subject
+            }
+            for ass in assessments_by_date
+        ],
+        "by_subject": [
+            {
+                "subject": subject,
+                "average_score": round(sum(values) / len(values), 2),
+                "total_assessments": len(values),
+                "best_score": round(max(values), 2),
+                "worst_score": round(min(values), 2)
+            }
+            for subject, values in scores_by_subject.items()
+        ]
+    }
+
+
+def empty_study_patterns() -> Dict:
+    return {
+        "preferred_time": "Not enough data",
+        "average_session_length": 0,
+        "consistency_score": 0,
+        "weekly_pattern": {},
+        "peak_hours": []
+    }
+
+
+def preferred_time_of_day(hour: Optional[int]) -> str:
+    if hour is None:
+        return "Not enough data"
+    if 5 <= hour < 12:
+        return "Morning"
+    if 12 <= hour < 17:
+        return "Afternoon"
+    if 17 <= hour < 22:
+        return "Evening"
+    return "Night"
+
+
+def study_patterns(hour_counts: Sequence[int],
+                   weekday_counts: Sequence[int],
+                   session_count: int,
+                   average_session_length: float,
+                   study_days: int,
+                   first_date: Optional[date],
+                   last_date: Optional[date]) -> Dict:
+    """Build the study pattern section from 24 hour and 7 weekday buckets"""
+    if session_count == 0:
+        return empty_study_patterns()
+
+    hour_counts = [int(c) for c in hour_counts]
+    # First hour with the highest count, matching max() over the ordered hours
+    preferred_hour = hour_counts.index(max(hour_counts))
+
+    if study_days > 0 and first_date and last_date:
+        total_weeks = max(1, (last_date - first_date).days / 7)
+        consistency_score = min(100, (study_days / (total_weeks * 7)) * 100)
+    else:
+        consistency_score = 0
+
+    peak_hours = sorted(
+        [(hour, count) for hour, count in enumerate(hour_counts) if count > 0],
+        key=lambda x: x[1],
+        reverse=True
+    )[:3]
+
+    return {
+        "preferred_time": preferred_time_of_day(preferred_hour),
+        "average_session_length": round(average_session_length, 2),
+        "consistency_score": round(consistency_score, 2),
+        "weekly_pattern": {day: int(weekday_counts[i]) for i, day in enumerate(DAY_NAMES)},
+        "peak_hours": [
+            {
+                "hour": f"{hour:02d}:00",
+                "count": count,
+                "percentage": round((count / session_count * 100), 2)
+            }
+            for hour, count in peak_hours
+        ]
+    }
+
+
+def progress_by_subject(rows: Sequence[Tuple[str, int, int, float, int, float]]) -> Dict:
+    """Build progress_by_subject from (subject, total, completed, score_sum, score_count, duration) rows"""
+    progress = {}
+    for subject, total, completed, score_sum, score_count, duration in rows:
+        progress[subject] = {
+            "total_activities": total,
+            "completed_activities": completed,
+            "total_score": score_sum or 0,
+            "score_count": score_count,
+            "total_duration": duration or 0,
+            "completion_rate": percentage(completed, total),
+            "average_score": round(score_sum / score_count, 2) if score_count > 0 else 0,
+            "average_duration": round((duration or 0) / total, 2) if total > 0 else 0
+        }
+    return progress
+
+
+def recent_activity(act) -> Dict:
+    return {
+        "id": act.id,
+        "syllabus_id": act.syllabus_id,
+        "start_time": act.start_time.isoformat() if act.start_time else None,
+        "duration": act.duration,
+        "completed": act.completed,
+        "score": act.score
+    }
+
+
+def weighted_performance(analytics: Dict) -> float:
+    """Ranking score used for top performers (activity 0.4, assessment 0.3, attendance 0.3)"""
+    return (analytics.get("learning_progress", {}).get("average_score", 0) * 0.4 +
+            analytics.get("assessment_scores", {}).get("average_score", 0) * 0.3 +
+            analytics.get("attendance", {}).get("attendance_rate", 0) * 0.3)
+
+
+def group_rows(rows: Iterable, key_index: int = 0) -> Dict[int, List]:
+    """Split rows ordered (or not) by a key column into per-key lists, keeping row order"""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[key_index], []).append(row)
+    return grouped
+
+
+# --------------------------------------------------------------------------
+# Column-array helpers
+# --------------------------------------------------------------------------
+
+def datetime_array(values: Sequence[Optional[datetime]]) -> np.ndarray:
+    """Microsecond datetime64 array, with NaT for missing timestamps"""
+    return np.array(values, dtype="datetime64[us]")
+
+
+def float_array(values: Sequence[Optional[float]]) -> np.ndarray:
+    """Float array, with NaN for missing values"""
+    return np.array(values, dtype=float)
+
+
+def native_number(value) -> float:
+    """Convert a NumPy sum back to the int/float a Python sum() would give"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def sequential_sum(values: np.ndarray) -> float:
+    """Left-to-right float sum, as SQL SUM and running totals add up.
+
+    ``np.sum`` adds pairwise, which can differ in the last bit and so flip a
+    rounded average between the array, SQL and streaming paths.
+    """
+    return float(np.cumsum(values)[-1]) if len(values) else 0.0
+
+
+def score_distribution(scores: np.ndarray) -> Dict[str, int]:
+    """Score buckets; zero scores fall in no bucket and NaN (missing) counts as no_score"""
+    has_score = ~np.isnan(scores)
+    poor, average, good, excellent = np.histogram(scores[has_score & (scores != 0)], bins=SCORE_BINS)[0]
+    return {
+        "excellent": int(excellent),
+        "good": int(good),
+        "average": int(average),
+        "poor": int(poor),
+        "no_score": int((~has_score).sum())
+    }
+
+
+def hour_weekday_counts(timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """24 hour-of-day and 7 weekday (Monday first) histograms of valid timestamps"""
+    days = timestamps.astype("datetime64[D]")
+    hours = ((timestamps - days) // np.timedelta64(1, "h")).astype(np.int64)
+    # 1970-01-01, day zero of datetime64, was a Thursday (weekday 3)
+    weekdays = (days.astype(np.int64) + 3) % 7
+    return np.bincount(hours, minlength=24), np.bincount(weekdays, minlength=7)
+
+
+# --------------------------------------------------------------------------
+# Single-pass accumulators
+#
+# Used when a student's history is too long to hold as arrays: rows are fed
+# one at a time from a ``yield_per`` query and only running totals are kept.
+# They produce the same sections as the array helpers above.
+# --------------------------------------------------------------------------
+
+def score_bucket(score: Optional[float]) -> Optional[str]:
+    """score_distribution bucket of one score (zero scores fall in no bucket)"""
+    if score is None:
+        return "no_score"
+    if score == 0:
+        return None
+    if score >= 90:
+        return "excellent"
+    if score >= 75:
+        return "good"
+    if score >= 60:
+        return "average"
+    return "poor"
+
+
+class LearningProgressAccumulator:
+    def __init__(self, week_ago: datetime):
+        self.week_ago = week_ago
+        self.total = 0
+        self.completed = 0
+        self.score_sum = 0.0
+        self.score_count = 0
+        self.duration_sum = 0
+        self.weekly = 0
+        self.distribution = {"excellent": 0, "good": 0, "average": 0, "poor": 0, "no_score": 0}
+
+    def add(self, start_time: Optional[datetime], completed: Optional[bool],
+            score: Optional[float], duration: Optional[float]):
+        self.total += 1
+        if completed:
+            self.completed += 1
+        if score is not None:
+            self.score_sum += score
+            self.score_count += 1
+        if duration:
+            self.duration_sum += duration
+        if start_time is not None and start_time >= self.week_ago:
+            self.weekly += 1
+        bucket = score_bucket(score)
+        if bucket:
+            self.distribution[bucket] += 1
+
+    def result(self) -> Dict:
+        return learning_progress(self.total, self.completed, self.score_sum, self.score_count,
+                                 self.duration_sum, self.weekly, self.distribution)
+
+
+class StudyPatternsAccumulator:
+    def __init__(self):
+        self.hour_counts = [0] * 24
+        self.weekday_counts = [0] * 7
+        self.sessions = 0
+        self.timed_sum = 0.0
+        self.timed_count = 0
+        # One entry per distinct calendar day, so bounded by the history's span
+        self.study_days = set()
+
+    def add(self, start_time: datetime, duration: Optional[float]):
+        self.sessions += 1
+        self.hour_counts[start_time.hour] += 1
+        self.weekday_counts[start_time.weekday()] += 1
+        if duration:
+            self.timed_sum += duration
+            self.timed_count += 1
+        self.study_days.add(start_time.date())
+
+    def result(self) -> Dict:
+        if self.sessions == 0:
+            return empty_study_patterns()
+        return study_patterns(
+            self.hour_counts, self.weekday_counts, self.sessions,
+            self.timed_sum / self.timed_count if self.timed_count else 0,
+            len(self.study_days), min(self.study_days), max(self.study_days)
+        )
+
+
+class AssessmentScoresAccumulator:
+    """Feed rows in id order; the improvement trend is the only per-row output kept"""
+
+    def __init__(self):
+        self.total = 0
+        self.score_sum = 0.0
+        self.score_count = 0
+        self.best = None
+        self.worst = None
+        self.trend = []
+        self.by_subject = {}  # subject -> [count, sum, best, worst], in order of first appearance
+
+    def add(self, subject: Optional[str], score: float, max_score: Optional[float],
+            when: Optional[datetime]):
+        self.total += 1
+        valid = bool(max_score and max_score > 0)
+        pct = score / max_score * 100 if valid else 0
+        if valid:
+            self.score_sum += pct
+            self.score_count += 1
+            self.best = pct if self.best is None else max(self.best, pct)
+            self.worst = pct if self.worst is None else min(self.worst, pct)
+        if when is not None:
+            self.trend.append((when, {"date": when.strftime("%Y-%m-%d"), "score": round(pct, 2), "subject": subject}))
+
+        stats = self.by_subject.get(subject or "General")
+        if stats is None:
+            self.by_subject[subject or "General"] = [1, pct, pct, pct]
+        else:
+            stats[0] += 1
+            stats[1] += pct
+            stats[2] = max(stats[2], pct)
+            stats[3] = min(stats[3], pct)
+
+    def result(self) -> Dict:
+        if self.total == 0:
+            return empty_assessment_scores()
+        self.trend.sort(key=lambda item: item[0])
+        return {
+            "total_assessments": self.total,
+            "average_score": round(self.score_sum / self.score_count, 2) if self.score_count else 0,
+            "best_score": round(self.best, 2) if self.best is not None else 0,
+            "worst_score": round(self.worst, 2) if self.worst is not None else 0,
+            "improvement_trend": [entry for _, entry in self.trend],
+            "by_subject": [
+                {
+                    "subject": subject,
+                    "average_score": round(total / count, 2),
+                    "total_assessments": count,
+                    "best_score": round(best, 2),
+                    "worst_score": round(worst, 2)
+                }
+                for subject, (count, total, best, worst) in self.by_subject.items()
+            ]
+        }
@@ -0,0 +1,255 @@
+"""Batch risk scoring into the risk_predictions table.
+
+``score_students`` refreshes the feature store, then compares every
+student's current features and the served model version with their latest
+stored prediction. Only students whose inputs changed (or who were never
+scored) are scored, ``chunk_size`` students per model call, and their new
+predictions are bulk-inserted with recommendations, probabilities and the
+model version. Older rows are kept, so the table doubles as each student's
+risk history.
+
+Read endpoints serve ``latest_predictions`` together with their
+``prediction_date`` as the as-of timestamp instead of running inference
+live. Students whose stored risk level changed are passed to the
+``on_transitions`` listeners, which feed the live alert stream.
+
+Run it from the command line (``--full`` re-scores everyone):
+
+    python -m Backend.batch_scoring
+
+or let the app run it every night (``start_scheduler``).
+
+Configuration (environment variables):
+    RISK_SCORING_AT          local time of the nightly run, "HH:MM" (default 02:00, "off" disables)
+    RISK_SCORING_CHUNK_SIZE  students per model call (default 5000)
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func, inspect, text
+from sqlalchemy.orm import Session
+
+from Backend import feature_store, models
+from Backend.ml_model import RiskPredictionModel, risk_model
+
+# Columns added after risk_predictions was first created (old databases lack them)
+ADDED_COLUMNS = {
+    "activity_completion_rate": "FLOAT",
+    "confidence": "FLOAT",
+    "probabilities": "TEXT",
+    "model_version": "VARCHAR(64)",
+}
+
+_scheduler: Optional[threading.Thread] = None
+_stop = threading.Event()
+last_run: Optional[Dict] = None
+_listeners: List[Callable[[List[Dict]], None]] = []
+
+
+def on_transitions(listener: Callable[[List[Dict]], None]):
+    """Call ``listener(transitions)`` after a run in which stored risk levels changed"""
+    _listeners.append(listener)
+
+
+def ensure_schema(db: Session):
+    """Add the newer risk_predictions columns and index to databases created before them"""
+    bind = db.get_bind()
+    existing = {column["name"] for column in inspect(bind).get_columns(models.RiskPrediction.__tablename__)}
+    with bind.begin() as conn:
+        for column, sql_type in ADDED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE risk_predictions ADD COLUMN {column} {sql_type}"))
+    for index in models.RiskPrediction.__table__.indexes:
+        index.create(bind=bind, checkfirst=True)
+
+
+def latest_predictions(db: Session, student_ids: Optional[List[int]] = None) -> Dict[int, models.RiskPrediction]:
+    """Newest stored prediction of every student (or of ``student_ids``)"""
+    RP = models.RiskPrediction
+    newest = db.query(RP.student_id, func.max(RP.id).label("id")).group_by(RP.student_id)
+    if student_ids is not None:
+        newest = newest.filter(RP.student_id.in_(student_ids))
+    newest = newest.subquery()
+    rows = db.query(RP).join(newest, RP.id == newest.c.id)
+    return {row.student_id: row for row in rows}
+
+
+def prediction_payload(row: models.RiskPrediction) -> Dict:
+    """A stored prediction in the shape of ``predict_from_features`` results"""
+    return {
+        "predicted_risk": row.risk_level,
+        "confidence": row.confidence,
+        "probabilities": json.loads(row.probabilities) if row.probabilities else {},
+        "recommendations": json.loads(row.recommendations) if row.recommendations else [],
+        "model_version": row.model_version,
+        "as_of": row.prediction_date.isoformat() if row.prediction_date else None
+    }
+
+
+def _unchanged(row: models.RiskPrediction, features: Dict[str, float], version: str) -> bool:
+    return (
+        row.model_version == version and
+        row.attendance_rate == features["attendance_rate"] and
+        row.avg_score == features["avg_score"] and
+        row.study_consistency == features["study_consistency"] and
+        row.activity_completion_rate == features["activity_completion_rate"]
+    )
+
+
+def score_students(db: Session, full: bool = False, chunk_size: Optional[int] = None,
+                   model: RiskPredictionModel = None) -> Dict:
+    """Score students whose features or model changed since their last stored prediction"""
+    global last_run
+    model = model or risk_model
+    chunk_size = chunk_size or int(os.environ.get("RISK_SCORING_CHUNK_SIZE", 5000))
+    started = time.perf_counter()
+    if not model.load_model():
+        raise RuntimeError("Model not loaded")
+    version = model.artifact.version
+
+    feature_store.refresh(db)
+    student_ids, X = feature_store.bulk_features(db, features=model.features)
+    previous = latest_predictions(db)
+    pending = []
+    for student_id, row in zip(student_ids, X):
+        features = dict(zip(model.features, row.tolist()))
+        stored = previous.get(student_id)
+        if full or stored is None or not _unchanged(stored, features, version):
+            pending.append((student_id, features))
+
+    run_at = datetime.now()
+    transitions = []
+    for offset in range(0, len(pending), chunk_size):
+        chunk = pending[offset:offset + chunk_size]
+        results = model.predict_results([features for _, features in chunk])
+        for (student_id, _), result in zip(chunk, results):
+            stored = previous.get(student_id)
+            if stored is not None and stored.risk_level != result["predicted_risk"]:
+                transitions.append({
+                    "student_id": student_id,
+                    "from": stored.risk_level,
+                    "to": result["predicted_risk"],
+                    "confidence": result["confidence"],
+                    "model_version": version,
+                    "as_of": run_at.isoformat()
+                })
+        db.bulk_insert_mappings(models.RiskPrediction, [
+            {
+                "student_id": student_id,
+                "attendance_rate": features["attendance_rate"],
+                "avg_score": features["avg_score"],
+                "study_consistency": features["study_consistency"],
+                "activity_completion_rate": features["activity_completion_rate"],
+                "risk_level": result["predicted_risk"],
+                "confidence": result["confidence"],
+                "probabilities": json.dumps(result["probabilities"]),
+                "recommendations": json.dumps(result["recommendations"]),
+                "model_version": version,
+                "prediction_date": run_at
+            }
+            for (student_id, features), result in zip(chunk, results)
+        ])
+        db.commit()
+
+    if transitions:
+        _notify(db, transitions)
+
+    last_run = {
+        "run_at": run_at.isoformat(),
+        "model_version": version,
+        "students": len(student_ids),
+        "scored": len(pending),
+        "unchanged": len(student_ids) - len(pending),
+        "risk_changes": len(transitions),
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+    return last_run
+
+
+def _notify(db: Session, transitions: List[Dict]):
+    students = {
+        row.id: row for row in db.query(
+            models.Student.id, models.Student.name, models.Student.grade, models.Student.school
+        )
+    }
+    for transition in transitions:
+        student = students.get(transition["student_id"])
+        transition.update(
+            student_name=student.name if student else None,
+            grade=student.grade if student else None,
+            school=student.school if student else None
+        )
+    for listener in list(_listeners):
+        try:
+            listener(transitions)
+        except Exception as e:
+            print(f"❌ Risk transition listener failed: {e}")
+
+
+# ----------------------------------------------------------------------
+# Nightly schedule
+# ----------------------------------------------------------------------
+
+def _next_run(at: str, now: datetime) -> datetime:
+    hour, minute = (int(part) for part in at.split(":"))
+    run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return run if run > now else run + timedelta(days=1)
+
+
+def _schedule(at: str, session_factory):
+    while True:
+        delay = (_next_run(at, datetime.now()) - datetime.now()).total_seconds()
+        if _stop.wait(max(delay, 0)):
+            return
+        db = session_factory()
+        try:
+            result = score_students(db)
+            print(f"✅ Nightly risk scoring: {result['scored']} of {result['students']} students re-scored")
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Nightly risk scoring failed: {e}")
+        finally:
+            db.close()
+
+
+def start_scheduler(session_factory, at: Optional[str] = None) -> bool:
+    """Run ``score_students`` every day at ``at`` (local time) in a daemon thread"""
+    global _scheduler
+    at = at or os.environ.get("RISK_SCORING_AT", "02:00")
+    if at.lower() == "off" or (_scheduler is not None and _scheduler.is_alive()):
+        return False
+    _next_run(at, datetime.now())  # reject a malformed time up front
+    _stop.clear()
+    _scheduler = threading.Thread(target=_schedule, args=(at, session_factory), name="risk-scoring",
+                                  daemon=True)
+    _scheduler.start()
+    return True
+
+
+def stop_scheduler():
+    _stop.set()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from Backend.database import SessionLocal, engine, Base
+
+    parser = argparse.ArgumentParser(description="Score students into risk_predictions")
+    parser.add_argument("--full", action="store_true", help="re-score every student")
+    parser.add_argument("--chunk-size", type=int, help="students per model call")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        ensure_schema(db)
+        result = score_students(db, full=args.full, chunk_size=args.chunk_size)
+        print(f"Scored {result['scored']} of {result['students']} students "
+              f"with model {result['model_version']} in {result['seconds']} s")
+    finally:
+        db.close()
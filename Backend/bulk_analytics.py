@@ -0,0 +1,262 @@
+"""Set-based analytics for many students at once.
+
+``LearningAnalytics.get_student_analytics`` issues around eight queries per
+student and loads every row into Python. ``BulkAnalyticsEngine`` instead runs a
+fixed number of grouped queries for the whole scope (a grade, or every
+student) and hands the per-student groups to ``analytics_kernels`` so the
+resulting sections are identical to the per-student path.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, and_, case, func, or_
+from sqlalchemy.orm import Session
+
+from Backend import analytics_kernels as kernels
+from Backend import models, rollups
+
+
+class BulkAnalyticsEngine:
+    RECENT_ACTIVITY_LIMIT = 5
+
+    def __init__(self, db: Session, grade: Optional[str] = None,
+                 student_ids: Optional[List[int]] = None,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None):
+        self.db = db
+        self.grade = grade
+        self.student_ids = student_ids
+        self.start = start
+        self.end = end
+        self.week_ago = datetime.now() - timedelta(days=7)
+
+    # ------------------------------------------------------------------ scope
+    def _scope(self, student_id_column, date_column=None):
+        """Filters restricting a table to the engine's students and [start, end) range"""
+        filters = []
+        if self.grade:
+            grade_ids = self.db.query(models.Student.id).filter(models.Student.grade == self.grade)
+            filters.append(student_id_column.in_(grade_ids.scalar_subquery()))
+        if self.student_ids is not None:
+            filters.append(student_id_column.in_(self.student_ids))
+        if date_column is not None and self.start is not None:
+            filters.append(date_column >= self.start)
+        if date_column is not None and self.end is not None:
+            filters.append(date_column < self.end)
+        return filters
+
+    def students(self) -> List:
+        return self.db.query(
+            models.Student.id, models.Student.name, models.Student.grade, models.Student.village
+        ).filter(*self._scope(models.Student.id)).order_by(models.Student.id).all()
+
+    # ------------------------------------------------------------- attendance
+    def attendance_stats(self) -> Dict[int, Dict]:
+        A = models.Attendance
+        present = func.sum(case((A.present == True, 1), else_=0))
+        subject = case((or_(A.subject.is_(None), A.subject == ""), "General"), else_=A.subject)
+
+        by_subject = self.db.query(A.student_id, subject, func.count(A.id), present).filter(
+            *self._scope(A.student_id, A.date)
+        ).group_by(A.student_id, subject).order_by(A.student_id, func.min(A.id)).all()
+
+        recent, monthly = self._attendance_trends()
+        recent_by_student = kernels.group_rows(recent)
+        monthly_by_student = kernels.group_rows(monthly)
+
+        return {
+            student_id: kernels.attendance_stats(
+                [tuple(r[1:]) for r in rows],
+                [tuple(r[1:]) for r in recent_by_student.get(student_id, [])],
+                [tuple(r[1:]) for r in monthly_by_student.get(student_id, [])]
+            )
+            for student_id, rows in kernels.group_rows(by_subject).items()
+        }
+
+    def _attendance_trends(self):
+        """(student_id, key, total, present) rows for the recent and monthly trends"""
+        week_ago = self.week_ago.date()
+        if self.start is None and self.end is None:
+            # All-time trends are read from the maintained rollups
+            R = models.AttendanceRollup
+            recent = rollups.grouped(self.db, R, "day", ("student_id", "bucket_start"),
+                                     R.bucket_start >= week_ago, *self._scope(R.student_id), first_seen=True)
+            monthly = rollups.grouped(self.db, R, "month", ("student_id", "bucket_start"),
+                                      *self._scope(R.student_id), first_seen=True)
+            return (
+                [(sid, day.isoformat(), total, present) for sid, day, total, present in recent],
+                [(sid, month.strftime("%Y-%m"), total, present) for sid, month, total, present in monthly]
+            )
+
+        # A date range can cut through a rollup bucket, so use the raw rows
+        A = models.Attendance
+        present = func.sum(case((A.present == True, 1), else_=0))
+        day = func.date(A.date)
+        recent = self.db.query(A.student_id, day, func.count(A.id), present).filter(
+            A.date.isnot(None), day >= week_ago.isoformat(), *self._scope(A.student_id, A.date)
+        ).group_by(A.student_id, day).order_by(A.student_id, func.min(A.id)).all()
+
+        month = func.strftime("%Y-%m", A.date)
+        monthly = self.db.query(A.student_id, month, func.count(A.id), present).filter(
+            A.date.isnot(None), *self._scope(A.student_id, A.date)
+        ).group_by(A.student_id, month).order_by(A.student_id, func.min(A.id)).all()
+        return recent, monthly
+
+    # ------------------------------------------------------------- activities
+    def activity_sections(self) -> Dict[int, Dict]:
+        """Learning progress and study patterns, which share the activities scan"""
+        LA = models.LearningActivity
+        score = LA.score
+        has_start = LA.start_time.isnot(None)
+
+        totals = self.db.query(
+            LA.student_id,
+            func.count(LA.id),
+            func.sum(case((LA.completed == True, 1), else_=0)),
+            func.sum(score),
+            func.count(score),
+            func.sum(LA.duration),
+            func.sum(case((and_(has_start, LA.start_time >= self.week_ago), 1), else_=0)),
+            func.sum(case((score >= 90, 1), else_=0)),
+            func.sum(case((and_(score >= 75, score < 90), 1), else_=0)),
+            func.sum(case((and_(score >= 60, score < 75), 1), else_=0)),
+            func.sum(case((and_(score != 0, score < 60), 1), else_=0)),
+            func.sum(case((score.is_(None), 1), else_=0)),
+            func.count(LA.start_time),
+            func.avg(case((and_(has_start, LA.duration != 0), LA.duration))),
+            func.count(func.distinct(func.date(LA.start_time))),
+            func.min(func.date(LA.start_time)),
+            func.max(func.date(LA.start_time))
+        ).filter(*self._scope(LA.student_id, LA.start_time)).group_by(LA.student_id).all()
+
+        hour = func.cast(func.strftime("%H", LA.start_time), Integer)
+        weekday = func.cast(func.strftime("%w", LA.start_time), Integer)
+        buckets = self.db.query(LA.student_id, hour, weekday, func.count(LA.id)).filter(
+            has_start, *self._scope(LA.student_id, LA.start_time)
+        ).group_by(LA.student_id, hour, weekday).all()
+
+        hour_counts = defaultdict(lambda: [0] * 24)
+        weekday_counts = defaultdict(lambda: [0] * 7)
+        for student_id, hour_value, weekday_value, count in buckets:
+            hour_counts[student_id][hour_value] += count
+            # SQLite numbers weekdays from Sunday, Python from Monday
+            weekday_counts[student_id][(weekday_value + 6) % 7] += count
+
+        sections = {}
+        for row in totals:
+            (student_id, total, completed, score_sum, score_count, duration_sum, weekly,
+             excellent, good, average, poor, no_score,
+             sessions, avg_session, study_days, first_day, last_day) = row
+            sections[student_id] = {
+                "learning_progress": kernels.learning_progress(
+                    total, completed or 0, score_sum or 0, score_count, duration_sum or 0, weekly or 0,
+                    {"excellent": excellent, "good": good, "average": average,
+                     "poor": poor, "no_score": no_score}
+                ),
+                "study_patterns": kernels.study_patterns(
+                    hour_counts[student_id], weekday_counts[student_id], sessions, avg_session or 0,
+                    study_days,
+                    date.fromisoformat(first_day) if first_day else None,
+                    date.fromisoformat(last_day) if last_day else None
+                )
+            }
+        return sections
+
+    def progress_by_subject(self) -> Dict[int, Dict]:
+        LA = models.LearningActivity
+        rows = self.db.query(
+            LA.student_id,
+            models.Syllabus.subject,
+            func.count(LA.id),
+            func.sum(case((LA.completed == True, 1), else_=0)),
+            func.sum(LA.score),
+            func.count(LA.score),
+            func.sum(LA.duration)
+        ).join(
+            models.Syllabus, LA.syllabus_id == models.Syllabus.id
+        ).filter(
+            *self._scope(LA.student_id, LA.start_time)
+        ).group_by(LA.student_id, models.Syllabus.subject).order_by(LA.student_id, func.min(LA.id)).all()
+
+        return {
+            student_id: kernels.progress_by_subject([tuple(r[1:]) for r in group])
+            for student_id, group in kernels.group_rows(rows).items()
+        }
+
+    def subject_progress(self, subjects: List[str]) -> List:
+        """(subject, student id, name, grade, total, completed, score sum, score count) per pair"""
+        LA = models.LearningActivity
+        return self.db.query(
+            models.Syllabus.subject,
+            models.Student.id,
+            models.Student.name,
+            models.Student.grade,
+            func.count(LA.id),
+            func.sum(case((LA.completed == True, 1), else_=0)),
+            func.sum(LA.score),
+            func.count(LA.score)
+        ).join(
+            models.Syllabus, LA.syllabus_id == models.Syllabus.id
+        ).join(
+            models.Student, LA.student_id == models.Student.id
+        ).filter(
+            models.Syllabus.subject.in_(subjects), *self._scope(LA.student_id, LA.start_time)
+        ).group_by(models.Syllabus.subject, models.Student.id).order_by(models.Student.id).all()
+
+    def recent_activities(self) -> Dict[int, List[Dict]]:
+        LA = models.LearningActivity
+        rank = func.row_number().over(partition_by=LA.student_id, order_by=LA.start_time.desc())
+        ranked = self.db.query(
+            LA.id, LA.student_id, LA.syllabus_id, LA.start_time, LA.duration, LA.completed, LA.score,
+            rank.label("rank")
+        ).filter(*self._scope(LA.student_id, LA.start_time)).subquery()
+
+        rows = self.db.query(ranked).filter(
+            ranked.c.rank <= self.RECENT_ACTIVITY_LIMIT
+        ).order_by(ranked.c.student_id, ranked.c.rank).all()
+
+        return {
+            student_id: [kernels.recent_activity(act) for act in group]
+            for student_id, group in kernels.group_rows(rows, key_index=1).items()
+        }
+
+    # ------------------------------------------------------------ assessments
+    def assessment_scores(self) -> Dict[int, Dict]:
+        AS = models.Assessment
+        rows = self.db.query(
+            AS.student_id, AS.subject, AS.score, AS.max_score, AS.date
+        ).filter(*self._scope(AS.student_id, AS.date)).order_by(AS.student_id, AS.id).all()
+
+        return {
+            student_id: kernels.assessment_scores(group)
+            for student_id, group in kernels.group_rows(rows).items()
+        }
+
+    # ----------------------------------------------------------------- public
+    def compute(self) -> Dict[int, Dict]:
+        """Return the raw analytics sections for every student in scope, keyed by id"""
+        students = self.students()
+        attendance = self.attendance_stats()
+        activity = self.activity_sections()
+        assessments = self.assessment_scores()
+        by_subject = self.progress_by_subject()
+        recent = self.recent_activities()
+
+        empty_activity = {
+            "learning_progress": kernels.empty_learning_progress(),
+            "study_patterns": kernels.empty_study_patterns()
+        }
+
+        sections = {}
+        for student in students:
+            student_activity = activity.get(student.id, empty_activity)
+            sections[student.id] = {
+                "student": student,
+                "attendance": attendance.get(student.id) or kernels.empty_attendance_stats(),
+                "learning_progress": student_activity["learning_progress"],
+                "assessment_scores": assessments.get(student.id) or kernels.empty_assessment_scores(),
+                "study_patterns": student_activity["study_patterns"],
+                "progress_by_subject": by_subject.get(student.id, {}),
+                "recent_activities": recent.get(student.id, [])
+            }
+        return sections
@@ -0,0 +1,124 @@
+"""Flat-array evaluator for the risk model's random forest.
+
+Scoring one four-feature row through ``RandomForestClassifier.predict_proba``
+spends almost all of its time in input validation, estimator dispatch and a
+Python-level loop over the trees. ``compile_forest`` exports the fitted
+``StandardScaler`` and every tree into a handful of contiguous NumPy arrays
+(all trees' nodes concatenated, child pointers made global), and
+``CompiledForest.predict_proba`` walks all trees for all rows at once: one
+vectorized step per tree level instead of one call per tree.
+
+Results match sklearn to float tolerance. Like sklearn, the scaled features
+are compared as float32 against the float64 thresholds, so rows land in the
+same leaves; only the order in which the per-tree probabilities are summed
+differs.
+
+The walk does trees x rows x depth gathers, while sklearn's per-call
+overhead is fixed, so the compiled forest wins for single rows and small
+batches (about 70x for one row, break-even near 500 rows on a 100-tree,
+depth-14 forest) and large batches stay on sklearn. The model registry
+compiles every artifact it loads and ``RiskPredictionModel`` picks the
+evaluator per call.
+
+Configuration (environment variables):
+    RISK_MODEL_EVALUATOR       "compiled" (default) or "sklearn" to always call the estimator
+    RISK_COMPILED_MAX_ROWS     largest batch scored by the compiled forest (default 512)
+"""
+import os
+from typing import Optional
+
+import numpy as np
+
+
+def use_compiled(rows: int) -> bool:
+    """Whether a batch of ``rows`` is faster on the compiled forest than on sklearn"""
+    if os.environ.get("RISK_MODEL_EVALUATOR", "compiled") == "sklearn":
+        return False
+    return rows <= int(os.environ.get("RISK_COMPILED_MAX_ROWS", 512))
+
+
+class CompiledForest:
+    def __init__(self, classes, mean, scale, feature, threshold, left, right, value, roots, depth):
+        self.classes_ = np.asarray(classes)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)  # per node class probabilities
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.depth = int(depth)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (
+            self.mean, self.scale, self.feature, self.threshold, self.left, self.right, self.value, self.roots
+        ))
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities of the raw (unscaled) N x n_features matrix ``X``"""
+        X = np.asarray(X, dtype=np.float64)
+        scaled = ((X - self.mean) / self.scale).astype(np.float32)
+        rows = np.arange(len(scaled))
+
+        # nodes[t, r]: where row r currently is in tree t
+        nodes = np.repeat(self.roots[:, None], len(scaled), axis=1)
+        for _ in range(self.depth):
+            # Leaves are their own children, so finished rows stay put
+            go_left = scaled[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].sum(axis=0) / self.n_trees
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compile_forest(model, scaler) -> Optional[CompiledForest]:
+    """Export a fitted forest and scaler to flat arrays (None if the model is not a plain forest)"""
+    estimators = getattr(model, "estimators_", None)
+    if not estimators or getattr(model, "n_outputs_", 1) != 1:
+        return None
+    if not hasattr(scaler, "n_features_in_"):
+        return None
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset, depth = 0, 0
+    n_classes = len(model.classes_)
+    for estimator in estimators:
+        tree = getattr(estimator, "tree_", None)
+        if tree is None or tree.value.shape[2] != n_classes:
+            return None
+        left, right = tree.children_left.astype(np.intp), tree.children_right.astype(np.intp)
+        is_leaf = left < 0
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        roots.append(offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(np.where(is_leaf, np.arange(tree.node_count), left) + offset)
+        rights.append(np.where(is_leaf, np.arange(tree.node_count), right) + offset)
+        values.append(np.divide(value, totals, out=np.zeros_like(value), where=totals > 0))
+        offset += tree.node_count
+        depth = max(depth, tree.max_depth)
+
+    # with_mean=False / with_std=False leave these as None
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if getattr(scaler, "with_mean", True) and scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+    return CompiledForest(
+        classes=model.classes_,
+        mean=mean,
+        scale=scale,
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts),
+        right=np.concatenate(rights),
+        value=np.concatenate(values),
+        roots=roots,
+        depth=depth
+    )
@@ -0,0 +1,158 @@
+"""Live alert and risk events for Server-Sent Events clients.
+
+Publishers (the alert inbox for raised and resolved alerts, batch scoring
+for risk-level transitions, both wired up in ``Backend.main``) call
+``event_hub.publish`` from any thread. Every event gets the next id and is
+kept in a ring buffer of the last ``ALERT_STREAM_BUFFER`` events, then handed
+to each subscribed client whose grade/school filter matches.
+
+``GET /api/alerts/stream`` subscribes and writes ``text/event-stream``:
+
+    id: 42
+    event: alert_raised | alert_resolved | risk_changed
+    data: {...}
+
+* Resume: a reconnecting ``EventSource`` sends ``Last-Event-ID`` (or pass
+  ``last_event_id``); buffered events after it are replayed before live
+  ones. When the gap is no longer in the buffer (or the server restarted
+  and ids started over) the client gets a ``reset`` event instead and
+  should refetch ``/api/alerts/summary``.
+* Backpressure: each client has a bounded queue. A client that falls more
+  than ``ALERT_STREAM_CLIENT_QUEUE`` events behind is disconnected rather
+  than buffered without limit; its ``EventSource`` reconnects and resumes
+  from the ring buffer. At most ``ALERT_STREAM_MAX_CLIENTS`` streams are
+  open at once.
+* Idle streams get a comment line every ``ALERT_STREAM_KEEPALIVE_SECONDS``
+  so proxies keep the connection open and disconnects are noticed.
+
+Configuration (environment variables):
+    ALERT_STREAM_BUFFER             events kept for resume (default 1000)
+    ALERT_STREAM_CLIENT_QUEUE       undelivered events per client before it is dropped (default 100)
+    ALERT_STREAM_MAX_CLIENTS        concurrent stream clients (default 200)
+    ALERT_STREAM_KEEPALIVE_SECONDS  keepalive interval on idle streams (default 15)
+"""
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+
+class TooManyClients(Exception):
+    pass
+
+
+def format_event(event: Dict) -> str:
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+class Subscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, grade: Optional[str], school: Optional[str],
+                 max_queue: int):
+        self.loop = loop
+        self.grade = grade
+        self.school = school
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def matches(self, event: Dict) -> bool:
+        return ((self.grade is None or event["grade"] == self.grade) and
+                (self.school is None or event["school"] == self.school))
+
+    def offer(self, event: Dict):
+        """Queue an event (on the subscriber's loop); a full queue marks the client as too slow"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventHub:
+    def __init__(self, buffer_size: Optional[int] = None, client_queue: Optional[int] = None,
+                 max_clients: Optional[int] = None, keepalive_seconds: Optional[float] = None):
+        self._events = deque(maxlen=buffer_size or int(os.environ.get("ALERT_STREAM_BUFFER", 1000)))
+        self.client_queue = client_queue or int(os.environ.get("ALERT_STREAM_CLIENT_QUEUE", 100))
+        self.max_clients = max_clients or int(os.environ.get("ALERT_STREAM_MAX_CLIENTS", 200))
+        self.keepalive = keepalive_seconds or float(os.environ.get("ALERT_STREAM_KEEPALIVE_SECONDS", 15))
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self.dropped_clients = 0
+
+    def publish(self, kind: str, data: Dict) -> int:
+        """Record an event and fan it out; ``data`` may carry ``grade`` and ``school`` for filtering"""
+        with self._lock:
+            self._last_id += 1
+            event = {"id": self._last_id, "event": kind, "data": data,
+                     "grade": data.get("grade"), "school": data.get("school")}
+            self._events.append(event)
+            # Scheduled under the lock so every client sees events in id order
+            for subscription in self._subscribers:
+                if subscription.matches(event):
+                    subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            return event["id"]
+
+    def subscribe(self, grade: Optional[str] = None, school: Optional[str] = None,
+                  last_event_id: Optional[int] = None) -> Tuple[Subscription, List[Dict], bool]:
+        """(subscription, buffered events to replay, whether the client missed events beyond the buffer)"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                raise TooManyClients(f"{self.max_clients} alert streams already open")
+            subscription = Subscription(asyncio.get_running_loop(), grade, school, self.client_queue)
+            backlog, reset = [], False
+            if last_event_id is not None:
+                oldest = self._events[0]["id"] if self._events else self._last_id + 1
+                reset = last_event_id > self._last_id or last_event_id < oldest - 1
+                if not reset:
+                    backlog = [event for event in self._events
+                               if event["id"] > last_event_id and subscription.matches(event)]
+            self._subscribers.add(subscription)
+            return subscription, backlog, reset
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    async def stream(self, request, subscription: Subscription, backlog: List[Dict],
+                     reset: bool) -> AsyncIterator[str]:
+        """SSE lines for one client until it disconnects or falls too far behind"""
+        try:
+            yield "retry: 3000\n\n"
+            if reset:
+                yield format_event({"id": self._last_id, "event": "reset",
+                                    "data": {"reason": "events since Last-Event-ID are no longer buffered"}})
+            for event in backlog:
+                yield format_event(event)
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event)
+            if subscription.overflowed:
+                # The client reconnects and resumes from the ring buffer
+                self.dropped_clients += 1
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "clients": len(self._subscribers),
+                "max_clients": self.max_clients,
+                "last_event_id": self._last_id,
+                "buffered": len(self._events),
+                "buffer_size": self._events.maxlen,
+                "client_queue": self.client_queue,
+                "dropped_clients": self.dropped_clients
+            }
+
+
+# Shared hub of the app
+event_hub = EventHub()
@@ -0,0 +1,183 @@
+"""Stored risk features (the student_features table) with incremental refresh.
+
+Each row holds a student's four model features, when they were computed and
+the ``student_aggregates.updated_at`` they were computed from. Every
+attendance or activity write moves the student's aggregates row, so
+``updated_at`` is a per-student change marker:
+
+* ``refresh`` recomputes only the students whose aggregates moved at or after
+  the newest stored watermark (an index range on ``updated_at``), so a
+  district-wide refresh costs work proportional to the day's changes. An
+  empty store is built from the full history in one grouped pass.
+* Readers (``get_features``, ``bulk_features``) serve stored rows and compute
+  stale or missing students from the history on the fly, like
+  ``aggregates.get_student_aggregates`` does, so results never lag behind
+  writes even when the refresh has not run yet.
+
+Timestamps are compared in SQL through ``datetime()``: the database writes
+``updated_at`` and ``computed_at`` at one-second resolution, and a row
+computed in the same second as a later write counts as stale.
+
+Refresh from the command line (``--full`` recomputes everyone):
+
+    python -m Backend.feature_store
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, func, literal, not_, or_
+from sqlalchemy.orm import Session
+
+from Backend import models, risk_features
+from Backend.risk_features import FEATURES
+
+# Students per IN (...) list, well below SQLite's bound-parameter limit
+CHUNK_SIZE = 500
+
+
+def _chunks(ids: List[int]):
+    for offset in range(0, len(ids), CHUNK_SIZE):
+        yield ids[offset:offset + CHUNK_SIZE]
+
+
+def watermark(db: Session) -> Optional[str]:
+    """Newest source timestamp in the store (None for an empty store)"""
+    return db.query(func.max(func.datetime(models.StudentFeatures.source_updated_at))).scalar()
+
+
+def _is_fresh():
+    """Stored row still matches the aggregates (no aggregates row: never written since)"""
+    SA, SF = models.StudentAggregates, models.StudentFeatures
+    updated = func.datetime(SA.updated_at)
+    # A missing stored row or watermark compares as '' so it is never fresh
+    source = func.coalesce(func.datetime(SF.source_updated_at), "")
+    computed = func.coalesce(func.datetime(SF.computed_at), "")
+    return or_(SA.student_id.is_(None), and_(updated <= source, updated < computed))
+
+
+def changed_students(db: Session) -> List[int]:
+    """Students whose aggregates moved since their features were stored"""
+    SA, SF = models.StudentAggregates, models.StudentFeatures
+    query = db.query(SA.student_id).outerjoin(SF, SF.student_id == SA.student_id)
+    mark = watermark(db)
+    if mark is not None:
+        # Index range on updated_at, which the database always writes as 'YYYY-MM-DD HH:MM:SS'
+        query = query.filter(SA.updated_at >= literal(mark))
+    return [row.student_id for row in query.filter(not_(_is_fresh())).order_by(SA.student_id)]
+
+
+def _store(db: Session, student_ids: Optional[List[int]]) -> int:
+    """Recompute and replace the rows of ``student_ids`` (everyone for None)"""
+    SA, SF = models.StudentAggregates, models.StudentFeatures
+    # Read the watermarks before the history so a write in between shows as stale
+    if student_ids is None:
+        sources = dict(db.query(SA.student_id, SA.updated_at))
+        history = risk_features.grouped_history(db)
+        db.query(SF).delete()
+    else:
+        sources, history = {}, {}
+        for chunk in _chunks(student_ids):
+            sources.update(db.query(SA.student_id, SA.updated_at).filter(SA.student_id.in_(chunk)))
+            history.update(risk_features.grouped_history(db, student_ids=chunk))
+            db.query(SF).filter(SF.student_id.in_(chunk)).delete(synchronize_session=False)
+
+    db.bulk_insert_mappings(SF, [
+        {"student_id": student_id, "source_updated_at": sources.get(student_id),
+         **risk_features.features_from_history(counters)}
+        for student_id, counters in history.items()
+    ])
+    db.commit()
+    return len(history)
+
+
+def refresh(db: Session, full: bool = False) -> Dict[str, object]:
+    """Bring the store up to date, returning the mode and how many students were recomputed"""
+    if full or db.query(models.StudentFeatures.student_id).first() is None:
+        return {"mode": "full", "students": _store(db, None)}
+    changed = changed_students(db)
+    return {"mode": "incremental", "students": _store(db, changed) if changed else 0}
+
+
+def remove_student(db: Session, student_id: int):
+    """Drop a student's stored features before the student is deleted (call before ``db.commit()``).
+
+    Without an aggregates row a stored row counts as fresh, so it would keep
+    being served after ``aggregates.remove_student``.
+    """
+    db.query(models.StudentFeatures).filter(models.StudentFeatures.student_id == student_id).delete(
+        synchronize_session="fetch"
+    )
+
+
+# ----------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------
+
+def _fresh_rows(db: Session, student_ids: Optional[List[int]] = None) -> Dict[int, Dict[str, float]]:
+    SA, SF = models.StudentAggregates, models.StudentFeatures
+    query = db.query(SF).outerjoin(SA, SA.student_id == SF.student_id).filter(_is_fresh())
+    rows = {}
+    for chunk in (_chunks(student_ids) if student_ids is not None else [None]):
+        chunk_query = query.filter(SF.student_id.in_(chunk)) if chunk is not None else query
+        for row in chunk_query:
+            rows[row.student_id] = {feat: getattr(row, feat) for feat in FEATURES}
+    return rows
+
+
+def get_features(db: Session, student_id: int) -> Optional[Dict[str, float]]:
+    """Features of one student (None without any history), never staler than the raw rows"""
+    stored = _fresh_rows(db, [student_id]).get(student_id)
+    return stored if stored is not None else risk_features.student_features(db, student_id)
+
+
+def bulk_features(db: Session, student_ids: Optional[Iterable[int]] = None,
+                  features: List[str] = FEATURES) -> Tuple[List[int], np.ndarray]:
+    """Same contract as ``risk_features.bulk_features``, served from the store.
+
+    Only students that are stale or missing in the store are computed from
+    the history; an empty store falls back to one grouped pass.
+    """
+    requested = list(student_ids) if student_ids is not None else None
+    values = _fresh_rows(db, requested)
+    if not values:
+        return risk_features.bulk_features(db, requested, features=features)
+
+    if requested is None:
+        missing = [sid for (sid,) in db.query(models.StudentAggregates.student_id) if sid not in values]
+    else:
+        missing = [sid for sid in requested if sid not in values]
+    for chunk in _chunks(missing):
+        for sid, counters in risk_features.grouped_history(db, student_ids=chunk).items():
+            values[sid] = risk_features.features_from_history(counters)
+
+    ids = [sid for sid in requested if sid in values] if requested is not None else sorted(values)
+    matrix = np.array([[values[sid][feat] for feat in features] for sid in ids], dtype=float)
+    return ids, matrix.reshape(-1, len(features))
+
+
+def ensure_built(db: Session) -> bool:
+    """Create the updated_at index on older databases and fill an empty store"""
+    for index in models.StudentAggregates.__table__.indexes:
+        index.create(bind=db.get_bind(), checkfirst=True)
+    if db.query(models.StudentFeatures.student_id).first() is None:
+        refresh(db, full=True)
+        return True
+    return False
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from Backend.database import SessionLocal, engine, Base
+
+    parser = argparse.ArgumentParser(description="Refresh the stored risk features")
+    parser.add_argument("--full", action="store_true", help="recompute every student")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        result = refresh(db, full=args.full)
+        print(f"Refreshed features ({result['mode']}) for {result['students']} students")
+    finally:
+        db.close()
@@ -0,0 +1,182 @@
+"""Micro-batching executor for single risk predictions.
+
+Requests that each need one prediction (``/risk/predict/from-features``,
+``/risk/predict/student/{id}``) hand their feature dictionary to ``submit``
+and wait on the returned future instead of running the model themselves. A
+single worker thread takes the first waiting request, keeps collecting for
+at most ``window_ms`` or until ``max_batch`` rows are queued, scores the
+whole group with one ``RiskPredictionModel.predict_results`` call and
+resolves every caller's future. The event loop never runs inference, and N
+concurrent callers cost one model call instead of N.
+
+Repeated feature vectors are answered from ``prediction_cache`` without
+being queued at all; the worker stores every output it computes.
+
+``stats`` reports a histogram of the queue depth seen by each submitted
+request and of the batch sizes actually scored, next to request counts.
+
+Configuration (environment variables):
+    RISK_BATCH_WINDOW_MS  how long a batch may wait for more requests (default 2)
+    RISK_BATCH_MAX_ROWS   largest batch (default 64)
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from Backend.ml_model import RiskPredictionModel, risk_model
+from Backend.prediction_cache import PredictionCache, prediction_cache
+
+BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """Counts per power-of-two bucket (the last one is open-ended)"""
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value: int):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.total,
+            "mean": round(self.sum / self.total, 2) if self.total else 0
+        }
+
+
+class InferenceExecutor:
+    def __init__(self, model: RiskPredictionModel = None, window_ms: Optional[float] = None,
+                 max_batch: Optional[int] = None, cache: Optional[PredictionCache] = prediction_cache):
+        self.model = model or risk_model
+        self.cache = cache
+        self.window = (float(os.environ.get("RISK_BATCH_WINDOW_MS", 2)) if window_ms is None else window_ms) / 1000
+        self.max_batch = max(1, int(os.environ.get("RISK_BATCH_MAX_ROWS", 64)) if max_batch is None else max_batch)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.queue_depth = Histogram()
+        self.batch_size = Histogram()
+        self.submitted = 0
+        self.cached = 0
+        self.batches = 0
+        self.failures = 0
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="risk-inference", daemon=True)
+                self._worker.start()
+
+    def submit(self, feature_dict: Dict) -> Future:
+        """Queue one prediction; the future resolves to a ``predict_from_features``-style dict"""
+        future = Future()
+        key = None
+        artifact = self.model.artifact
+        if self.cache is not None and artifact is not None:
+            key = self.cache.key(artifact.version, artifact.features, feature_dict)
+            output = self.cache.get(key)
+            if output is not None:
+                with self._stats_lock:
+                    self.cached += 1
+                future.set_result(self.model.result_from_output(feature_dict, output))
+                return future
+        
+        self._ensure_worker()
+        with self._stats_lock:
+            self.submitted += 1
+            self.queue_depth.observe(self._queue.qsize() + 1)
+        self._queue.put((feature_dict, future, key))
+        return future
+
+    async def predict(self, feature_dict: Dict) -> Dict:
+        """Await one prediction without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(feature_dict))
+
+    def predict_sync(self, feature_dict: Dict) -> Dict:
+        """Blocking variant for handlers already running in the threadpool"""
+        return self.submit(feature_dict).result()
+
+    def _collect(self, first) -> List:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Keep the stop marker for the main loop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [(features, future, key) for features, future, key in self._collect(first)
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            with self._stats_lock:
+                self.batches += 1
+                self.batch_size.observe(len(batch))
+            try:
+                results = self.model.predict_results([features for features, _, _ in batch])
+            except Exception as e:
+                with self._stats_lock:
+                    self.failures += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, key), result in zip(batch, results):
+                if key is not None:
+                    self.cache.put(key, {field: result[field]
+                                         for field in ('predicted_risk', 'probabilities', 'confidence')})
+                future.set_result(result)
+
+    def shutdown(self):
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch": self.max_batch,
+                "submitted": self.submitted,
+                "answered_from_cache": self.cached,
+                "batches": self.batches,
+                "failures": self.failures,
+                "queued": self._queue.qsize(),
+                "queue_depth": self.queue_depth.snapshot(),
+                "batch_size": self.batch_size.snapshot()
+            }
+
+
+# Shared executor of the app
+inference_executor = InferenceExecutor()
@@ -0,0 +1,223 @@
+"""In-memory leaderboard of students ordered by weighted performance.
+
+The score is the one used for top performers: 0.4 activity average score,
+0.3 assessment average and 0.3 attendance rate, each rounded as in the
+analytics payload. It is derived from the ``student_aggregates`` counters,
+so ranking a student never touches their raw history.
+
+Every scope (all students, each grade, each school) keeps a list sorted by
+``(-score, student_id)``: top-k and bottom-k are slices from either end and a
+page is a slice from the middle. Write endpoints call ``update`` after
+committing, which moves the touched students with ``bisect`` instead of
+re-sorting. The index is built lazily on first use with one query.
+"""
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from Backend import aggregates, models
+
+ALL = ("all", None)
+
+
+def performance_score(counters) -> Dict[str, float]:
+    """Weighted score and its three components from a student's counters"""
+    activity_average = (
+        round(counters["activity_score_sum"] / counters["activity_score_count"], 2)
+        if counters["activity_total"] and counters["activity_score_count"] else 0
+    )
+    assessment_average = (
+        round(counters["assessment_score_sum"] / counters["assessment_score_count"], 2)
+        if counters["assessment_score_count"] else 0
+    )
+    attendance_rate = (
+        round(counters["attendance_present"] / counters["attendance_total"] * 100, 2)
+        if counters["attendance_total"] else 0
+    )
+    return {
+        "score": activity_average * 0.4 + assessment_average * 0.3 + attendance_rate * 0.3,
+        "activity_average": activity_average,
+        "assessment_average": assessment_average,
+        "attendance_rate": attendance_rate
+    }
+
+
+def _counters(row: Optional[models.StudentAggregates]) -> Dict[str, float]:
+    return {field: (getattr(row, field) or 0) if row is not None else 0 for field in aggregates.COUNTER_FIELDS}
+
+
+class LeaderboardIndex:
+    def __init__(self):
+        self._entries = {}  # student_id -> entry dict
+        self._keys = {}  # student_id -> (-unrounded score, student_id)
+        self._rankings = defaultdict(list)  # scope -> sorted [(-score, student_id)]
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def rebuild(self, db: Session) -> int:
+        """Load every student's score, returning the number of students indexed"""
+        rows = db.query(models.Student, models.StudentAggregates).outerjoin(
+            models.StudentAggregates, models.StudentAggregates.student_id == models.Student.id
+        ).all()
+
+        # Students never backfilled into student_aggregates are counted from history in bulk
+        history = aggregates.grouped_counters(db) if any(row is None for _, row in rows) else {}
+
+        entries, keys = {}, {}
+        rankings = defaultdict(list)
+        for student, row in rows:
+            counters = _counters(row) if row is not None else history.get(student.id, _counters(None))
+            entry, key = self._entry(student, counters)
+            entries[student.id], keys[student.id] = entry, key
+            for scope in self._scopes(entry):
+                rankings[scope].append(key)
+        for ranking in rankings.values():
+            ranking.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._keys = keys
+            self._rankings = rankings
+            self._loaded = True
+        return len(entries)
+
+    def update(self, db: Session, *student_ids: Optional[int]):
+        """Re-score students whose rows were just committed (or drop deleted ones)"""
+        with self._lock:
+            if not self._loaded:
+                return
+            for student_id in set(student_ids):
+                if student_id is None:
+                    continue
+                self._remove(student_id)
+                student = db.get(models.Student, student_id)
+                if student is None:
+                    continue
+                counters = _counters(aggregates.get_student_aggregates(db, student_id))
+                self._insert(*self._entry(student, counters))
+
+    def invalidate(self):
+        """Drop the index so the next read rebuilds it"""
+        with self._lock:
+            self._loaded = False
+            self._entries = {}
+            self._keys = {}
+            self._rankings = defaultdict(list)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def top(self, db: Session, k: int, grade: Optional[str] = None,
+            school: Optional[str] = None) -> List[Dict]:
+        return self.page(db, 0, k, grade=grade, school=school)[1]
+
+    def bottom(self, db: Session, k: int, grade: Optional[str] = None,
+               school: Optional[str] = None) -> List[Dict]:
+        return self.page(db, 0, k, grade=grade, school=school, order="bottom")[1]
+
+    def page(self, db: Session, skip: int, limit: int, grade: Optional[str] = None,
+             school: Optional[str] = None, order: str = "top") -> Tuple[int, List[Dict]]:
+        """(total ranked, entries) for one page of a scope, best first or worst first"""
+        self._ensure_loaded(db)
+        with self._lock:
+            ranking = self._ranking(grade, school)
+            total = len(ranking)
+            if order == "bottom":
+                # Walk from the worst end; rank stays the position in the best-first order
+                stop = max(total - skip, 0)
+                positions = range(stop - 1, max(stop - limit, 0) - 1, -1)
+            else:
+                positions = range(skip, min(skip + limit, total))
+            return total, [
+                {"rank": position + 1, **self._entries[ranking[position][1]]}
+                for position in positions
+            ]
+
+    def rank_of(self, db: Session, student_id: int, grade: Optional[str] = None,
+                school: Optional[str] = None) -> Optional[int]:
+        """1-based rank of a student within a scope, or None if not in it"""
+        self._ensure_loaded(db)
+        with self._lock:
+            key = self._keys.get(student_id)
+            if key is None:
+                return None
+            ranking = self._ranking(grade, school)
+            position = bisect_left(ranking, key)
+            if position < len(ranking) and ranking[position] == key:
+                return position + 1
+            return None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self, db: Session):
+        if not self._loaded:
+            self.rebuild(db)
+
+    def _ranking(self, grade: Optional[str], school: Optional[str]) -> List[Tuple[float, int]]:
+        if grade and school:
+            # No combined scope is kept; narrow the (smaller) grade ranking by school
+            return [
+                key for key in self._rankings.get(("grade", grade), [])
+                if self._entries[key[1]]["school"] == school
+            ]
+        if grade:
+            return self._rankings.get(("grade", grade), [])
+        if school:
+            return self._rankings.get(("school", school), [])
+        return self._rankings.get(ALL, [])
+
+    @staticmethod
+    def _entry(student: models.Student, counters: Dict[str, float]) -> Tuple[Dict, Tuple[float, int]]:
+        """Public entry (score rounded) and its sort key (exact score, as top performers use)"""
+        performance = performance_score(counters)
+        key = (-performance["score"], student.id)
+        entry = {
+            "student_id": student.id,
+            "student_name": student.name,
+            "grade": student.grade,
+            "school": student.school,
+            **performance,
+            "score": round(performance["score"], 2)
+        }
+        return entry, key
+
+    @staticmethod
+    def _scopes(entry: Dict) -> List[Tuple[str, Optional[str]]]:
+        scopes = [ALL]
+        if entry["grade"]:
+            scopes.append(("grade", entry["grade"]))
+        if entry["school"]:
+            scopes.append(("school", entry["school"]))
+        return scopes
+
+    def _insert(self, entry: Dict, key: Tuple[float, int]):
+        self._entries[entry["student_id"]] = entry
+        self._keys[entry["student_id"]] = key
+        for scope in self._scopes(entry):
+            insort(self._rankings[scope], key)
+
+    def _remove(self, student_id: int):
+        entry = self._entries.pop(student_id, None)
+        if entry is None:
+            return
+        key = self._keys.pop(student_id)
+        for scope in self._scopes(entry):
+            ranking = self._rankings[scope]
+            position = bisect_left(ranking, key)
+            if position < len(ranking) and ranking[position] == key:
+                del ranking[position]
+            if not ranking:
+                del self._rankings[scope]
+
+
+leaderboard = LeaderboardIndex()
@@ -5,14 +5,51 @@ from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 import uvicorn
 from datetime import datetime
-from Backend.database import engine, Base
-from Backend.routers import students, attendance, activities, syllabus, alerts,risk
+from Backend.database import engine, Base, SessionLocal
+from Backend import batch_scoring, feature_store, rollups
+from Backend.routers import students, attendance, activities, syllabus, alerts,risk, analytics
+from Backend.alert_inbox import alert_inbox
+from Backend.analytics_cache import analytics_cache
+from Backend.event_stream import event_hub
+from Backend.model_registry import model_registry
+from Backend.prediction_cache import prediction_cache
+from Backend.window_counters import window_counters
 import os
 #from Backend.routers import risk
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# Backfill the trend rollups and the risk feature store once for databases created before they existed
+with SessionLocal() as _db:
+    rollups.ensure_built(_db)
+    feature_store.ensure_built(_db)
+    batch_scoring.ensure_schema(_db)
+
+# Load the risk model now rather than on the first prediction, and follow
+# newly published versions when RISK_MODEL_WATCH_SECONDS is set
+# Cached analytics payloads and model outputs belong to the previous model
+model_registry.on_swap(lambda loaded: analytics_cache.clear())
+model_registry.on_swap(lambda loaded: prediction_cache.clear())
+model_registry.ensure_loaded()
+model_registry.start_watcher()
+
+# Nightly batch scoring into risk_predictions (RISK_SCORING_AT)
+batch_scoring.start_scheduler(SessionLocal)
+
+# Raised/resolved alerts and risk-level changes go out on /api/alerts/stream
+alert_inbox.on_events(lambda events: [event_hub.publish(f"alert_{event['event']}", event["alert"])
+                                      for event in events])
+batch_scoring.on_transitions(lambda transitions: [event_hub.publish("risk_changed", transition)
+                                                  for transition in transitions])
+
+# Warm the per-day window counters the alert rules read, materialize the
+# alerts table, then keep time windows moving (ALERT_INBOX_SWEEP_MINUTES)
+with SessionLocal() as _db:
+    window_counters.warm(_db)
+    alert_inbox.sync(_db)
+alert_inbox.start_sweeper(SessionLocal)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Offline Rural Learning Analytics API",
@@ -42,6 +79,7 @@ app.include_router(attendance.router, prefix="/api")
 app.include_router(activities.router, prefix="/api")
 app.include_router(syllabus.router, prefix="/api")
 app.include_router(alerts.router, prefix="/api")
+app.include_router(analytics.router, prefix="/api")
 
 # Helper function to serve HTML pages
 def serve_html_page(filename: str):
@@ -88,6 +126,11 @@ async def serve_risk():
 def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+# Cache statistics endpoint
+@app.get("/api/cache/stats")
+def cache_stats():
+    return {"analytics": analytics_cache.stats()}
+
 # API root endpoint
 @app.get("/api/")
 def api_root():
@@ -100,6 +143,7 @@ def api_root():
             "activities": "/api/activities",
             "syllabus": "/api/syllabus",
             "alerts": "/api/alerts",
+            "analytics": "/api/analytics",
             "health": "/api/health"
         }
     }
@@ -7,94 +7,146 @@ import joblib
 import os
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from Backend import models
+from Backend import compiled_forest, feature_store, models
+from Backend.model_registry import ModelRegistry, model_registry
+from Backend.risk_features import FEATURES
 
 class RiskPredictionModel:
-    def __init__(self):
-        self.model = None
-        self.scaler = StandardScaler()
-        self.features = ['attendance_rate', 'avg_score', 'study_consistency', 'activity_completion_rate']
-        self.model_loaded = False
+    """Risk predictions from the artifact currently served by the model registry.
+    
+    Every scoring call takes one snapshot of the registry's artifact, so a hot
+    swap never mixes the model of one version with the scaler of another.
+    """
+    def __init__(self, registry: ModelRegistry = None):
+        self.registry = registry or model_registry
+    
+    @property
+    def artifact(self):
+        return self.registry.current
+    
+    @property
+    def model(self):
+        return self.artifact.model if self.artifact else None
+    
+    @property
+    def scaler(self):
+        return self.artifact.scaler if self.artifact else StandardScaler()
+    
+    @property
+    def features(self):
+        return self.artifact.features if self.artifact else FEATURES
+    
+    @property
+    def model_loaded(self):
+        return self.artifact is not None
     
     def load_model(self):
-        """Load pre-trained model from pickle file"""
-        try:
-            if os.path.exists("risk_model.pkl"):
-                model_data = joblib.load("risk_model.pkl")
-                self.model = model_data['model']
-                self.scaler = model_data['scaler']
-                self.features = model_data['features']
-                self.model_loaded = True
-                print(f"✅ Risk model loaded successfully")
-                print(f"   Features: {self.features}")
-                print(f"   Classes: {self.model.classes_}")
-                return True
-            else:
-                print(f"⚠️ risk_model.pkl not found in current directory")
-                
-                # Search in common locations
-                search_paths = [
-                    "./offline_learning/train_model/risk_model.pkl",
-                    "./train_model/risk_model.pkl",
-                    "../risk_model.pkl",
-                    "offline_learning/risk_model.pkl"
-                ]
-                
-                for path in search_paths:
-                    if os.path.exists(path):
-                        print(f"✅ Found at: {path}")
-                        model_data = joblib.load(path)
-                        self.model = model_data['model']
-                        self.scaler = model_data['scaler']
-                        self.features = model_data['features']
-                        self.model_loaded = True
-                        return True
-                
-                print("❌ Could not find risk_model.pkl")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Failed to load model: {e}")
-            return False
+        """Make sure the registry serves a model (normally preloaded at startup)"""
+        return self.registry.ensure_loaded()
+    
+    def discriminates(self) -> bool:
+        """Whether the served model knows at least two risk levels (the shipped risk_model.pkl knows one)"""
+        return self.load_model() and len(self.model.classes_) >= 2
+    
+    def calculate_student_features(self, student_id: int, db: Session):
+        """Feature dictionary of one student (None without any history)"""
+        return feature_store.get_features(db, student_id)
+    
+    def calculate_features_bulk(self, db: Session, student_ids=None):
+        """(student ids, feature matrix in model feature order) for many students at once"""
+        return feature_store.bulk_features(db, student_ids, features=self.features)
+    
+    def predict_risk(self, student_id: int, db: Session):
+        """Predict risk for a student from their stored features"""
+        features_dict = self.calculate_student_features(student_id, db)
+        if not features_dict:
+            return {"error": f"No features for student {student_id}"}
+        return self.predict_from_features(features_dict)
+    
+    def predict_risk_bulk(self, db: Session, student_ids=None):
+        """Predictions keyed by student id, from one feature read and one model call"""
+        student_ids, X = self.calculate_features_bulk(db, student_ids)
+        feature_dicts = [dict(zip(self.features, row.tolist())) for row in X]
+        return dict(zip(student_ids, self.predict_results(feature_dicts, X)))
+    
+    def feature_matrix(self, feature_dicts, features=None) -> np.ndarray:
+        """N x len(features) matrix of feature dictionaries, in model feature order"""
+        features = features or self.features
+        return np.array(
+            [[feature_dict.get(feat, 0) for feat in features] for feature_dict in feature_dicts],
+            dtype=float
+        ).reshape(-1, len(features))
+    
+    def _snapshot(self):
+        if not self.load_model():
+            raise RuntimeError("Model not loaded")
+        return self.artifact
     
-    # ... [Keep all your existing methods: prepare_training_data, calculate_student_features, etc.] ...
+    @staticmethod
+    def _score(artifact, X):
+        X = np.asarray(X, dtype=float).reshape(-1, len(artifact.features))
+        if len(X) == 0:
+            return np.array([], dtype=object), np.empty((0, len(artifact.model.classes_)))
+        if artifact.compiled is not None and compiled_forest.use_compiled(len(X)):
+            probabilities = artifact.compiled.predict_proba(X)
+        else:
+            probabilities = artifact.model.predict_proba(artifact.scaler.transform(X))
+        predictions = artifact.model.classes_[np.argmax(probabilities, axis=1)]
+        return predictions, probabilities
+    
+    def predict_batch(self, X):
+        """Score an N x len(features) matrix with one scaler and one forest call.
+        
+        Returns (predicted labels, class probabilities) as arrays of length N
+        and shape N x len(classes); the label is the argmax of the probabilities,
+        which is what ``RandomForestClassifier.predict`` computes as well.
+        """
+        return self._score(self._snapshot(), X)
+    
+    def predict_batch_with_artifact(self, X):
+        """``predict_batch`` plus the artifact (version, features, classes) that scored it"""
+        artifact = self._snapshot()
+        predictions, probabilities = self._score(artifact, X)
+        return artifact, predictions, probabilities
+    
+    def batch_results(self, feature_dicts, predictions, probabilities, classes=None):
+        """Per-row result dictionaries in the format of ``predict_from_features``"""
+        classes = [str(class_name) for class_name in (self.model.classes_ if classes is None else classes)]
+        confidences = probabilities.max(axis=1) if len(probabilities) else []
+        return [
+            self.result_from_output(feature_dict, {
+                'predicted_risk': str(prediction),
+                'probabilities': dict(zip(classes, row.tolist())),
+                'confidence': float(confidence)
+            })
+            for feature_dict, prediction, row, confidence
+            in zip(feature_dicts, predictions, probabilities, confidences)
+        ]
+    
+    def result_from_output(self, feature_dict: dict, output: dict):
+        """Full result from the model output (class, probabilities, confidence) for these features"""
+        return {
+            **output,
+            'recommendations': self.get_recommendations(feature_dict, output['predicted_risk']),
+            'features_used': self.features,
+            'feature_values': feature_dict
+        }
+    
+    def predict_results(self, feature_dicts, X=None):
+        """Score feature dictionaries (or their ready matrix ``X``) into result dictionaries"""
+        artifact = self._snapshot()
+        if X is None:
+            X = self.feature_matrix(feature_dicts, artifact.features)
+        predictions, probabilities = self._score(artifact, X)
+        return self.batch_results(feature_dicts, predictions, probabilities, classes=artifact.model.classes_)
     
     def predict_from_features(self, feature_dict: dict):
         """Predict risk directly from feature dictionary"""
-        if not self.model_loaded:
-            if not self.load_model():
-                return {"error": "Model not loaded"}
+        if not self.load_model():
+            return {"error": "Model not loaded"}
         
         try:
-            # Extract features in correct order
-            feature_values = [feature_dict.get(feat, 0) for feat in self.features]
-            
-            # Convert to numpy array and reshape
-            X = np.array([feature_values])
-            
-            # Scale features
-            X_scaled = self.scaler.transform(X)
-            
-            # Predict
-            prediction = self.model.predict(X_scaled)[0]
-            probabilities = self.model.predict_proba(X_scaled)[0]
-            
-            # Convert to Python types
-            prob_dict = {}
-            for i, class_name in enumerate(self.model.classes_):
-                prob_dict[class_name] = float(probabilities[i])
-            
-            # Get recommendations
-            recommendations = self.get_recommendations(feature_dict, prediction)
-            
-            return {
-                'predicted_risk': str(prediction),
-                'probabilities': prob_dict,
-                'confidence': float(max(probabilities)),
-                'recommendations': recommendations,
-                'features_used': self.features,
-                'feature_values': feature_dict
-            }
+            return self.predict_results([feature_dict])[0]
             
         except Exception as e:
             return {"error": str(e), "feature_dict": feature_dict}
@@ -0,0 +1,232 @@
+"""Versioned risk model artifacts with eager loading and atomic hot swap.
+
+Artifacts are joblib files in the ``{'model', 'scaler', 'features'}`` format
+that ``RiskPredictionModel`` has always used, kept side by side as
+
+    <RISK_MODEL_DIR>/risk_model-<version>.pkl
+
+where versions sort chronologically (``publish`` names them by UTC time).
+The newest version is served; with no versioned artifacts the registry
+falls back to the legacy ``risk_model.pkl`` locations.
+
+The app loads the model at startup, so no request pays for unpickling.
+``activate`` loads a version completely off to the side and then replaces
+the served artifact with one reference assignment: a request holding the
+old artifact finishes with it, the next one sees the new one, and the
+model, scaler and feature list always belong together. Swaps are triggered
+through ``POST /api/risk/model/activate`` or by the optional watcher thread,
+which polls the directory and activates newly published versions.
+
+Configuration (environment variables):
+    RISK_MODEL_DIR            directory of versioned artifacts (default models/risk)
+    RISK_MODEL_WATCH_SECONDS  poll interval of the watcher, 0 disables it (default 0)
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import joblib
+
+from Backend.compiled_forest import CompiledForest, compile_forest
+
+ARTIFACT_PATTERN = re.compile(r"^risk_model-(?P<version>[\w.-]+)\.pkl$")
+
+# Where risk_model.pkl was looked for before versioned artifacts existed
+LEGACY_PATHS = [
+    "risk_model.pkl",
+    "./offline_learning/train_model/risk_model.pkl",
+    "./train_model/risk_model.pkl",
+    "../risk_model.pkl",
+    "offline_learning/risk_model.pkl"
+]
+
+
+@dataclass
+class LoadedModel:
+    model: object
+    scaler: object
+    features: List[str]
+    version: str
+    path: str
+    checksum: str
+    load_seconds: float
+    compiled: Optional[CompiledForest] = None
+    loaded_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    def describe(self) -> Dict:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "checksum": f"sha256:{self.checksum}",
+            "load_seconds": round(self.load_seconds, 4),
+            "loaded_at": self.loaded_at,
+            "compiled_evaluator": self.compiled is not None
+        }
+
+
+class ModelRegistry:
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.environ.get("RISK_MODEL_DIR", os.path.join("models", "risk"))
+        self._current: Optional[LoadedModel] = None
+        self._swap_lock = threading.Lock()
+        self._listeners: List[Callable[[LoadedModel], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.swaps = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def current(self) -> Optional[LoadedModel]:
+        return self._current
+
+    # ------------------------------------------------------------------
+    # Artifacts on disk
+    # ------------------------------------------------------------------
+
+    def versions(self) -> List[str]:
+        """Versioned artifacts on disk, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            match.group("version") for match in map(ARTIFACT_PATTERN.match, os.listdir(self.directory)) if match
+        )
+
+    def artifact_path(self, version: str) -> str:
+        return os.path.join(self.directory, f"risk_model-{version}.pkl")
+
+    def _resolve(self, version: Optional[str]):
+        """(version, path) to load: the given version, the newest one, or the legacy file"""
+        if version is not None and version != "legacy":
+            path = self.artifact_path(version)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No artifact for version {version}")
+            return version, path
+        versions = self.versions()
+        if versions and version is None:
+            return versions[-1], self.artifact_path(versions[-1])
+        for path in LEGACY_PATHS:
+            if os.path.exists(path):
+                return "legacy", path
+        raise FileNotFoundError("Could not find risk_model.pkl")
+
+    def publish(self, model_data: Dict, version: Optional[str] = None) -> str:
+        """Write a new versioned artifact atomically and return its version (does not activate it)"""
+        version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        os.makedirs(self.directory, exist_ok=True)
+        # Write next to the target and rename, so the watcher never sees half a file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                joblib.dump(model_data, tmp)
+            os.replace(tmp_path, self.artifact_path(version))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return version
+
+    # ------------------------------------------------------------------
+    # Loading and swapping
+    # ------------------------------------------------------------------
+
+    def _load(self, version: Optional[str]) -> LoadedModel:
+        version, path = self._resolve(version)
+        started = time.perf_counter()
+        with open(path, "rb") as artifact:
+            payload = artifact.read()
+        model_data = joblib.load(io.BytesIO(payload))
+        return LoadedModel(
+            model=model_data['model'],
+            scaler=model_data['scaler'],
+            features=list(model_data['features']),
+            version=version,
+            path=os.path.abspath(path),
+            checksum=hashlib.sha256(payload).hexdigest(),
+            # Flattened once here so low-latency scoring needs no per-call export
+            compiled=compile_forest(model_data['model'], model_data['scaler']),
+            load_seconds=time.perf_counter() - started
+        )
+
+    def activate(self, version: Optional[str] = None) -> LoadedModel:
+        """Load a version (default: newest) and swap it in; the old one keeps serving until then"""
+        with self._swap_lock:
+            loaded = self._load(version)
+            previous, self._current = self._current, loaded
+            if previous is not None:
+                self.swaps += 1
+            self.last_error = None
+        print(f"✅ Risk model {loaded.version} loaded in {loaded.load_seconds:.3f}s")
+        for listener in list(self._listeners):
+            listener(loaded)
+        return loaded
+
+    def ensure_loaded(self) -> bool:
+        """Load the newest artifact unless one is already served"""
+        if self._current is not None:
+            return True
+        try:
+            self.activate()
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"❌ Failed to load model: {e}")
+            return False
+
+    def on_swap(self, listener: Callable[[LoadedModel], None]):
+        """Call ``listener(loaded)`` after every load or swap"""
+        self._listeners.append(listener)
+
+    # ------------------------------------------------------------------
+    # Watcher
+    # ------------------------------------------------------------------
+
+    def _watch(self, interval: float):
+        # Only newly published versions are picked up, so a version pinned
+        # through activate() stays until the next publish
+        newest_seen = self._current.version if self._current is not None else None
+        while not self._stop.wait(interval):
+            try:
+                versions = self.versions()
+                if versions and versions[-1] != newest_seen:
+                    newest_seen = versions[-1]
+                    self.activate(newest_seen)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Risk model watcher: {e}")
+
+    def start_watcher(self, interval: Optional[float] = None) -> bool:
+        """Poll the artifact directory for newer versions in a daemon thread"""
+        if interval is None:
+            interval = float(os.environ.get("RISK_MODEL_WATCH_SECONDS", 0))
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return False
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="risk-model-watcher",
+                                         daemon=True)
+        self._watcher.start()
+        return True
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def status(self) -> Dict:
+        current = self._current
+        return {
+            "active": current.describe() if current else None,
+            "available_versions": self.versions(),
+            "directory": os.path.abspath(self.directory),
+            "swaps": self.swaps,
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+            "last_error": self.last_error
+        }
+
+
+# Shared registry of the app
+model_registry = ModelRegistry()
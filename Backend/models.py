@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Float, Date, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from Backend.database import Base
@@ -90,4 +90,96 @@ class RiskPrediction(Base):
     study_consistency = Column(Float)
     risk_level = Column(String(20))  # low, medium, high
     prediction_date = Column(DateTime(timezone=True), server_default=func.now())
-    recommendations = Column(Text)
\ No newline at end of file
+    recommendations = Column(Text)  # JSON list
+    activity_completion_rate = Column(Float)
+    confidence = Column(Float)
+    probabilities = Column(Text)  # JSON object, class -> probability
+    model_version = Column(String(64))
+    
+    __table_args__ = (
+        Index("ix_risk_predictions_student", "student_id", "id"),
+    )
+
+class StudentAggregates(Base):
+    __tablename__ = "student_aggregates"
+    
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    attendance_total = Column(Integer, default=0, nullable=False)
+    attendance_present = Column(Integer, default=0, nullable=False)
+    activity_total = Column(Integer, default=0, nullable=False)
+    activity_completed = Column(Integer, default=0, nullable=False)
+    activity_score_sum = Column(Float, default=0, nullable=False)
+    activity_score_count = Column(Integer, default=0, nullable=False)
+    activity_duration_sum = Column(Float, default=0, nullable=False)
+    assessment_total = Column(Integer, default=0, nullable=False)
+    assessment_score_sum = Column(Float, default=0, nullable=False)  # sum of percentages
+    assessment_score_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
+
+class StudentFeatures(Base):
+    __tablename__ = "student_features"
+    
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    attendance_rate = Column(Float, nullable=False)
+    avg_score = Column(Float, nullable=False)
+    study_consistency = Column(Float, nullable=False)
+    activity_completion_rate = Column(Float, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+    source_updated_at = Column(DateTime(timezone=True), index=True)  # student_aggregates.updated_at watermark
+
+class AttendanceRollup(Base):
+    __tablename__ = "attendance_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(10), nullable=False)  # day, week, month
+    bucket_start = Column(Date, nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id"))  # NULL for grade-level rows
+    grade = Column(String(10))
+    subject = Column(String(50), nullable=False)
+    total = Column(Integer, default=0, nullable=False)
+    present = Column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_attendance_rollups_student", "granularity", "student_id", "bucket_start"),
+        Index("ix_attendance_rollups_grade", "granularity", "grade", "bucket_start"),
+    )
+
+class ActivityRollup(Base):
+    __tablename__ = "activity_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(10), nullable=False)  # day, week, month
+    bucket_start = Column(Date, nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id"))  # NULL for grade-level rows
+    grade = Column(String(10))
+    subject = Column(String(50), nullable=False)
+    total = Column(Integer, default=0, nullable=False)
+    completed = Column(Integer, default=0, nullable=False)
+    score_sum = Column(Float, default=0, nullable=False)
+    scored = Column(Integer, default=0, nullable=False)  # activities with a non-zero score
+    duration_sum = Column(Float, default=0, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_activity_rollups_student", "granularity", "student_id", "bucket_start"),
+        Index("ix_activity_rollups_grade", "granularity", "grade", "bucket_start"),
+    )
+
+class Alert(Base):
+    __tablename__ = "alerts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    type = Column(String(50), nullable=False)
+    severity = Column(String(20), nullable=False)
+    message = Column(Text)
+    recommendation = Column(Text)
+    raised_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)  # last change of message or severity
+    resolved_at = Column(DateTime(timezone=True))  # NULL while the alert is open
+    
+    __table_args__ = (
+        Index("ix_alerts_student", "student_id", "resolved_at"),
+        Index("ix_alerts_open", "resolved_at", "type"),
+        # At most one open alert per student and type
+        Index("ux_alerts_open_type", "student_id", "type", unique=True, sqlite_where=resolved_at.is_(None)),
+    )
@@ -0,0 +1,161 @@
+"""Optional process-pool execution of class and subject analytics.
+
+Building each student's payload (risk prediction, risk factors,
+recommendations, summary) is CPU-bound Python, so one process tops out at one
+core however fast the queries are. With ``ANALYTICS_WORKERS`` above 1,
+``LearningAnalytics.get_class_analytics`` and ``get_subjects_analytics``
+split the students into id-ordered partitions and hand them to a process
+pool. Each worker opens its own SQLite connection to the same database file,
+runs the bulk engine for its partition and returns plain dicts/tuples, which
+are concatenated in partition order so the result matches the serial path.
+
+Configuration (environment variables):
+    ANALYTICS_WORKERS              worker processes (default 1, i.e. serial)
+    ANALYTICS_PARTITIONS_PER_WORKER  partitions per worker for load balancing (default 4)
+"""
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from Backend import models
+from Backend.model_registry import model_registry
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# Per-process state of a worker
+_worker_sessions = {}
+_worker_analytics = None
+
+
+def configured_workers() -> int:
+    return max(1, int(os.environ.get("ANALYTICS_WORKERS", 1)))
+
+
+def _partitions_per_worker() -> int:
+    return max(1, int(os.environ.get("ANALYTICS_PARTITIONS_PER_WORKER", 4)))
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared pool, recreated only when the requested worker count changes"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: workers must not inherit the parent's open connections
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_workers = None, 0
+
+
+def _database_url(db: Session) -> str:
+    url = db.get_bind().url
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        raise ValueError("Parallel analytics needs a file-backed database")
+    return url.render_as_string(hide_password=False)
+
+
+def _partition(student_ids: List[int], workers: int) -> List[List[int]]:
+    count = min(len(student_ids), workers * _partitions_per_worker())
+    if count == 0:
+        return []
+    size = math.ceil(len(student_ids) / count)
+    return [student_ids[i:i + size] for i in range(0, len(student_ids), size)]
+
+
+def _scoped_student_ids(db: Session, grade: Optional[str]) -> List[int]:
+    query = db.query(models.Student.id)
+    if grade:
+        query = query.filter(models.Student.grade == grade)
+    return [row.id for row in query.order_by(models.Student.id)]
+
+
+# ----------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------
+
+def _worker_session(database_url: str) -> Session:
+    factory = _worker_sessions.get(database_url)
+    if factory is None:
+        engine = create_engine(database_url, connect_args={"check_same_thread": False})
+        factory = _worker_sessions[database_url] = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return factory()
+
+
+def _class_partition(database_url: str, student_ids: List[int],
+                     start: Optional[datetime], end: Optional[datetime],
+                     model_version: Optional[str] = None) -> List[Dict]:
+    global _worker_analytics
+    from Backend.analytics import LearningAnalytics
+    from Backend.bulk_analytics import BulkAnalyticsEngine
+
+    if _worker_analytics is None:
+        _worker_analytics = LearningAnalytics()
+    # Follow the parent's hot swaps so every partition scores with the same model
+    current = model_registry.current
+    if model_version is not None and (current is None or current.version != model_version):
+        model_registry.activate(model_version)
+    db = _worker_session(database_url)
+    try:
+        sections = BulkAnalyticsEngine(db, student_ids=student_ids, start=start, end=end).compute()
+        predictions = _worker_analytics.model_predictions(db, list(sections))
+        return [_worker_analytics._payload_from_sections(s, db, predictions) for s in sections.values()]
+    finally:
+        db.close()
+
+
+def _subject_partition(database_url: str, subjects: List[str], student_ids: List[int],
+                       start: Optional[datetime], end: Optional[datetime]) -> List[Tuple]:
+    from Backend.bulk_analytics import BulkAnalyticsEngine
+
+    db = _worker_session(database_url)
+    try:
+        rows = BulkAnalyticsEngine(db, student_ids=student_ids, start=start, end=end).subject_progress(subjects)
+        return [tuple(row) for row in rows]
+    finally:
+        db.close()
+
+
+# ----------------------------------------------------------------------
+# Parent side
+# ----------------------------------------------------------------------
+
+def class_payloads(db: Session, grade: Optional[str], start: Optional[datetime],
+                   end: Optional[datetime], workers: int) -> List[Dict]:
+    """Per-student analytics payloads of a grade (or everyone), in student id order"""
+    partitions = _partition(_scoped_student_ids(db, grade), workers)
+    if not partitions:
+        return []
+    url = _database_url(db)
+    current = model_registry.current
+    version = current.version if current is not None else None
+    futures = [get_pool(workers).submit(_class_partition, url, ids, start, end, version) for ids in partitions]
+    return [payload for future in futures for payload in future.result()]
+
+
+def subject_rows(db: Session, subjects: List[str], grade: Optional[str], start: Optional[datetime],
+                 end: Optional[datetime], workers: int) -> List[Tuple]:
+    """``BulkAnalyticsEngine.subject_progress`` rows, computed partition by partition"""
+    partitions = _partition(_scoped_student_ids(db, grade), workers)
+    if not partitions:
+        return []
+    url = _database_url(db)
+    futures = [get_pool(workers).submit(_subject_partition, url, subjects, ids, start, end) for ids in partitions]
+    return [row for future in futures for row in future.result()]
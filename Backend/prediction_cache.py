@@ -0,0 +1,81 @@
+"""Bounded LRU cache of risk model outputs keyed by quantized feature vectors.
+
+Many students share near-identical features, and the risk page's what-if
+sliders send the same vectors again and again. Entries are keyed by the
+served model version and the feature vector rounded to ``precision``
+decimals, so vectors that differ only below that precision share one
+entry. Only the model's output (class, probabilities, confidence) is
+cached; recommendations and echoed feature values are rebuilt from the
+caller's exact features.
+
+The model registry clears the cache whenever it swaps models (wired up in
+``Backend.main``); the version in the key keeps a late write from an old
+model from ever being served.
+
+Configuration (environment variables):
+    RISK_CACHE_MAX_ENTRIES  entries kept before the least recently used is evicted (default 10000)
+    RISK_CACHE_PRECISION    decimals feature values are rounded to (default 1)
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class PredictionCache:
+    def __init__(self, max_entries: int = 10000, precision: int = 1):
+        self.max_entries = max_entries
+        self.precision = precision
+        self._entries = OrderedDict()  # (version, quantized features) -> model output
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clears = 0
+
+    def key(self, version: str, features: List[str], feature_dict: Dict) -> Tuple:
+        return (version, tuple(round(float(feature_dict.get(feat, 0) or 0), self.precision) for feat in features))
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            output = self._entries.get(key)
+            if output is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return output
+
+    def put(self, key: Tuple, output: Dict):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = output
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.clears += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "precision": self.precision,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "clears": self.clears
+        }
+
+
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get("RISK_CACHE_MAX_ENTRIES", 10000)),
+    precision=int(os.environ.get("RISK_CACHE_PRECISION", 1))
+)
@@ -0,0 +1,140 @@
+"""Risk model features computed with grouped SQL.
+
+The four features the risk model is trained on:
+
+    attendance_rate           present / recorded attendance, in percent
+    avg_score                 mean assessment percentage (mean activity score
+                              when the student has no assessments)
+    study_consistency         learning activities per week between the first
+                              and last activity (at least one week)
+    activity_completion_rate  completed / started activities, in percent
+
+``student_features`` and ``bulk_features`` run the same three grouped
+queries, filtered to one student, to the requested students or not at all,
+so all give identical values. The bulk case scans each history table exactly once and
+returns a matrix that can go straight into ``RiskPredictionModel.predict_batch``.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from Backend import models
+
+FEATURES = ['attendance_rate', 'avg_score', 'study_consistency', 'activity_completion_rate']
+
+# Longest id list bound into one IN filter (well under SQLite's variable limit)
+MAX_FILTERED_IDS = 500
+
+
+def grouped_history(db: Session, student_id: Optional[int] = None,
+                    student_ids: Optional[List[int]] = None) -> Dict[int, Dict[str, float]]:
+    """Raw per-student sums behind the features, one grouped query per table.
+
+    Restricted to one student or a list of students when given.
+    """
+    A, LA, AS = models.Attendance, models.LearningActivity, models.Assessment
+    history = {}
+
+    def entry(sid):
+        if sid not in history:
+            history[sid] = {
+                "attendance_total": 0, "attendance_present": 0,
+                "activity_total": 0, "activity_completed": 0, "activity_score_sum": 0, "activity_score_count": 0,
+                "activity_days": 0.0, "assessment_score_sum": 0, "assessment_score_count": 0
+            }
+        return history[sid]
+
+    attendance = db.query(
+        A.student_id, func.count(A.id), func.sum(case((A.present == True, 1), else_=0))
+    )
+    activities = db.query(
+        LA.student_id,
+        func.count(LA.id),
+        func.sum(case((LA.completed == True, 1), else_=0)),
+        func.coalesce(func.sum(LA.score), 0),
+        func.count(LA.score),
+        func.coalesce(func.julianday(func.max(LA.start_time)) - func.julianday(func.min(LA.start_time)), 0)
+    )
+    valid_assessment = AS.max_score > 0
+    assessments = db.query(
+        AS.student_id,
+        func.coalesce(func.sum(case((valid_assessment, AS.score * 100.0 / AS.max_score))), 0),
+        func.sum(case((valid_assessment, 1), else_=0))
+    )
+    if student_id is not None:
+        attendance = attendance.filter(A.student_id == student_id)
+        activities = activities.filter(LA.student_id == student_id)
+        assessments = assessments.filter(AS.student_id == student_id)
+    if student_ids is not None:
+        attendance = attendance.filter(A.student_id.in_(student_ids))
+        activities = activities.filter(LA.student_id.in_(student_ids))
+        assessments = assessments.filter(AS.student_id.in_(student_ids))
+
+    for sid, total, present in attendance.filter(A.student_id.isnot(None)).group_by(A.student_id):
+        counters = entry(sid)
+        counters["attendance_total"], counters["attendance_present"] = total, present or 0
+    for sid, total, completed, score_sum, score_count, days in activities.filter(
+        LA.student_id.isnot(None)
+    ).group_by(LA.student_id):
+        counters = entry(sid)
+        counters.update(activity_total=total, activity_completed=completed or 0,
+                        activity_score_sum=score_sum, activity_score_count=score_count,
+                        activity_days=days)
+    for sid, score_sum, score_count in assessments.filter(AS.student_id.isnot(None)).group_by(AS.student_id):
+        counters = entry(sid)
+        counters["assessment_score_sum"], counters["assessment_score_count"] = score_sum, score_count or 0
+    return history
+
+
+def features_from_history(counters: Dict[str, float]) -> Dict[str, float]:
+    """The four model features from one student's grouped sums"""
+    attendance_rate = (
+        counters["attendance_present"] / counters["attendance_total"] * 100
+        if counters["attendance_total"] > 0 else 0
+    )
+    if counters["assessment_score_count"] > 0:
+        avg_score = counters["assessment_score_sum"] / counters["assessment_score_count"]
+    elif counters["activity_score_count"] > 0:
+        avg_score = counters["activity_score_sum"] / counters["activity_score_count"]
+    else:
+        avg_score = 0
+    weeks = max(counters["activity_days"] / 7, 1)
+    completion_rate = (
+        counters["activity_completed"] / counters["activity_total"] * 100
+        if counters["activity_total"] > 0 else 0
+    )
+    return {
+        'attendance_rate': round(attendance_rate, 2),
+        'avg_score': round(avg_score, 2),
+        'study_consistency': round(counters["activity_total"] / weeks, 2),
+        'activity_completion_rate': round(completion_rate, 2)
+    }
+
+
+def student_features(db: Session, student_id: int) -> Optional[Dict[str, float]]:
+    """Features of one student, or None when the student has no history yet"""
+    counters = grouped_history(db, student_id=student_id).get(student_id)
+    return features_from_history(counters) if counters else None
+
+
+def bulk_features(db: Session, student_ids: Optional[Iterable[int]] = None,
+                  features: List[str] = FEATURES) -> Tuple[List[int], np.ndarray]:
+    """(student ids, N x len(features) matrix) for every student with history.
+
+    Rows follow ``student_ids`` when given (students without history are
+    left out), otherwise ascending student id. Up to ``MAX_FILTERED_IDS``
+    students are filtered in SQL; longer lists share one unfiltered pass.
+    """
+    requested = list(student_ids) if student_ids is not None else None
+    if requested is not None and len(requested) <= MAX_FILTERED_IDS:
+        history = grouped_history(db, student_ids=requested)
+    else:
+        history = grouped_history(db)
+    ids = [sid for sid in requested if sid in history] if requested is not None else sorted(history)
+    matrix = np.array(
+        [[values[feat] for feat in features] for values in (features_from_history(history[sid]) for sid in ids)],
+        dtype=float
+    ).reshape(-1, len(features))
+    return ids, matrix
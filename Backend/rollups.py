@@ -0,0 +1,310 @@
+"""Day, week and month rollups of attendance and learning activity.
+
+Every attendance or activity row is counted in one bucket per granularity,
+twice: once in a student-level row (student_id, subject) and once in a
+grade-level row (student_id NULL, grade, subject). Trend queries therefore
+read a handful of pre-aggregated rows, and a grade or school-wide chart over
+a full year reads at most months x subjects x grades rows however many raw
+rows there are.
+
+Write endpoints call ``apply_change`` with the row's contribution before and
+after the change, after ``aggregates.apply_change`` and before
+``db.commit()``. The counts are added in SQL (``total = total + :delta``),
+so concurrent writers do not lose each other's increments, and a bucket
+whose counts drop to zero is deleted. Rollup rows are created in the order
+their buckets are first seen, so ordering by ``min(id)`` reproduces the
+first-appearance order of the raw rows.
+
+Backfill or repair the tables with:
+
+    python -m Backend.rollups
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import and_, case, delete, exists, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from Backend import models
+
+GRANULARITIES = ("day", "week", "month")
+
+MEASURES = {
+    models.AttendanceRollup: ("total", "present"),
+    models.ActivityRollup: ("total", "completed", "score_sum", "scored", "duration_sum"),
+}
+
+# (model, student_id, grade, subject, timestamp, counters)
+Contribution = Tuple[type, int, Optional[str], str, datetime, Dict[str, float]]
+
+
+def bucket_start(granularity: str, moment: Union[date, datetime]) -> date:
+    """First day of the day, week (Monday) or month containing ``moment``"""
+    day = moment.date() if isinstance(moment, datetime) else moment
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _student_grade(db: Session, student_id: int) -> Optional[str]:
+    student = db.get(models.Student, student_id)
+    return student.grade if student else None
+
+
+def _resolve_server_default(db: Session, row, column: str):
+    """Timestamps left to the database default only exist once the row is inserted"""
+    if getattr(row, column) is None and row in db.new:
+        db.flush()
+    return getattr(row, column)
+
+
+def attendance_contribution(db: Session, record: models.Attendance) -> Optional[Contribution]:
+    """What one attendance row adds to the rollups"""
+    if record is None or record.student_id is None:
+        return None
+    moment = _resolve_server_default(db, record, "date")
+    if moment is None:
+        return None
+    return (
+        models.AttendanceRollup, record.student_id, _student_grade(db, record.student_id),
+        record.subject or "General", moment,
+        {"total": 1, "present": 1 if record.present else 0}
+    )
+
+
+def activity_contribution(db: Session, activity: models.LearningActivity) -> Optional[Contribution]:
+    """What one learning activity row adds to the rollups"""
+    if activity is None or activity.student_id is None:
+        return None
+    moment = _resolve_server_default(db, activity, "start_time")
+    if moment is None:
+        return None
+    syllabus = db.get(models.Syllabus, activity.syllabus_id) if activity.syllabus_id else None
+    return (
+        models.ActivityRollup, activity.student_id, _student_grade(db, activity.student_id),
+        (syllabus.subject if syllabus else None) or "General", moment,
+        {
+            "total": 1,
+            "completed": 1 if activity.completed else 0,
+            "score_sum": activity.score or 0,
+            "scored": 1 if activity.score else 0,
+            "duration_sum": activity.duration or 0
+        }
+    )
+
+
+def _keys(contribution: Contribution):
+    """The rollup rows (model, granularity, bucket, student_id, grade, subject) a contribution lands in"""
+    model, student_id, grade, subject, moment, _ = contribution
+    for granularity in GRANULARITIES:
+        bucket = bucket_start(granularity, moment)
+        yield model, granularity, bucket, student_id, grade, subject
+        yield model, granularity, bucket, None, grade, subject
+
+
+def _apply_deltas(db: Session, deltas: Dict[tuple, Dict[str, float]]):
+    """Add ``deltas`` to their buckets, creating missing ones and dropping emptied ones"""
+    for key, fields in deltas.items():
+        if not any(fields.values()):
+            continue
+        model, granularity, bucket, student_id, grade, subject = key
+        table = model.__table__
+        # == None compiles to IS NULL for the grade-level rows and students without a grade
+        match = and_(table.c.granularity == granularity, table.c.bucket_start == bucket,
+                     table.c.student_id == student_id, table.c.grade == grade, table.c.subject == subject)
+        if fields.get("total", 0) > 0:
+            # New buckets get the next id, which keeps min(id) in first-seen order
+            values = {"granularity": granularity, "bucket_start": bucket, "student_id": student_id,
+                      "grade": grade, "subject": subject, **{m: 0 for m in MEASURES[model]}}
+            db.execute(insert(table).from_select(
+                list(values),
+                select(*[literal(value, table.c[column].type) for column, value in values.items()])
+                .where(~exists().where(match))
+            ))
+        db.execute(update(table).where(match).values({
+            field: table.c[field] + delta for field, delta in fields.items() if delta
+        }))
+        if fields.get("total", 0) < 0:
+            # An empty bucket would still show up in trends; a rebuild has no row for it
+            db.execute(delete(table).where(match, table.c.total <= 0))
+
+
+def apply_change(db: Session, before: Optional[Contribution], after: Optional[Contribution]):
+    """Move a row's counts from its old buckets to its new ones (call before ``db.commit()``)"""
+    deltas = defaultdict(lambda: defaultdict(float))
+    for contribution, sign in ((before, -1), (after, 1)):
+        if contribution:
+            for key in _keys(contribution):
+                for field, value in contribution[5].items():
+                    deltas[key][field] += sign * value
+    _apply_deltas(db, deltas)
+
+
+def move_student_grade(db: Session, student_id: int, old_grade: Optional[str], new_grade: Optional[str]):
+    """Re-file a student's rows under a new grade (call before ``db.commit()``)"""
+    if old_grade == new_grade:
+        return
+    deltas = defaultdict(lambda: defaultdict(float))
+    for model, measures in MEASURES.items():
+        rows = db.query(model).filter(model.student_id == student_id).all()
+        for row in rows:
+            for field in measures:
+                value = getattr(row, field) or 0
+                deltas[(model, row.granularity, row.bucket_start, None, old_grade, row.subject)][field] -= value
+                deltas[(model, row.granularity, row.bucket_start, None, new_grade, row.subject)][field] += value
+            row.grade = new_grade
+    _apply_deltas(db, deltas)
+
+
+def remove_student(db: Session, student_id: int):
+    """Take a student's rows out of the rollups before the student is deleted (call before ``db.commit()``).
+
+    Deleting a student leaves their raw rows with student_id NULL, which a
+    rebuild does not count, so both their student-level rows and their share
+    of the grade-level rows go.
+    """
+    deltas = defaultdict(lambda: defaultdict(float))
+    for model, measures in MEASURES.items():
+        for row in db.query(model).filter(model.student_id == student_id).all():
+            for field in measures:
+                deltas[(model, row.granularity, row.bucket_start, None, row.grade, row.subject)][field] -= \
+                    getattr(row, field) or 0
+            db.delete(row)
+    _apply_deltas(db, deltas)
+
+
+# ----------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------
+
+def grouped(db: Session, model, granularity: str, dimensions: Sequence[str], *filters,
+            level: str = "student", first_seen: bool = False) -> List[Tuple]:
+    """Sum the measures of one granularity grouped by ``dimensions``.
+
+    ``level`` picks student-level rows or the grade-level rows used for
+    class-wide charts. Rows come back ordered by the dimensions, or with
+    ``first_seen`` by the first appearance of each group (per student when
+    student_id is one of the dimensions).
+    """
+    columns = [getattr(model, dimension) for dimension in dimensions]
+    level_filter = model.student_id.isnot(None) if level == "student" else model.student_id.is_(None)
+    query = db.query(*columns, *[func.sum(getattr(model, m)) for m in MEASURES[model]]).filter(
+        model.granularity == granularity, level_filter, *filters
+    ).group_by(*columns)
+    if first_seen:
+        leading = [model.student_id] if "student_id" in dimensions else []
+        return query.order_by(*leading, func.min(model.id)).all()
+    return query.order_by(*columns).all()
+
+
+def trend(db: Session, model, granularity: str, student_id: Optional[int] = None,
+          grade: Optional[str] = None, subject: Optional[str] = None,
+          start: Optional[date] = None, end: Optional[date] = None) -> List[Tuple]:
+    """Chronological (bucket_start, *measures) for one student, one grade or everyone"""
+    filters = []
+    if student_id is not None:
+        filters.append(model.student_id == student_id)
+    if grade:
+        filters.append(model.grade == grade)
+    if subject:
+        filters.append(model.subject == subject)
+    if start is not None:
+        filters.append(model.bucket_start >= bucket_start(granularity, start))
+    if end is not None:
+        filters.append(model.bucket_start <= end)
+    return grouped(db, model, granularity, ("bucket_start",), *filters,
+                   level="student" if student_id is not None else "grade")
+
+
+# ----------------------------------------------------------------------
+# Rebuild
+# ----------------------------------------------------------------------
+
+def _daily_groups(db: Session):
+    """Per (student, subject, day) counts of both raw tables, with the first raw id of each"""
+    A, LA, S, SY = models.Attendance, models.LearningActivity, models.Student, models.Syllabus
+
+    attendance_subject = case((or_(A.subject.is_(None), A.subject == ""), "General"), else_=A.subject)
+    attendance_day = func.date(A.date)
+    attendance = db.query(
+        A.student_id, S.grade, attendance_subject, attendance_day, func.min(A.id),
+        func.count(A.id), func.sum(case((A.present == True, 1), else_=0))
+    ).outerjoin(S, S.id == A.student_id).filter(
+        A.student_id.isnot(None), A.date.isnot(None)
+    ).group_by(A.student_id, attendance_subject, attendance_day)
+
+    has_score = and_(LA.score.isnot(None), LA.score != 0)
+    activity_subject = func.coalesce(func.nullif(SY.subject, ""), "General")
+    activity_day = func.date(LA.start_time)
+    activities = db.query(
+        LA.student_id, S.grade, activity_subject, activity_day, func.min(LA.id),
+        func.count(LA.id),
+        func.sum(case((LA.completed == True, 1), else_=0)),
+        func.coalesce(func.sum(case((has_score, LA.score))), 0),
+        func.sum(case((has_score, 1), else_=0)),
+        func.coalesce(func.sum(LA.duration), 0)
+    ).outerjoin(S, S.id == LA.student_id).outerjoin(SY, SY.id == LA.syllabus_id).filter(
+        LA.student_id.isnot(None), LA.start_time.isnot(None)
+    ).group_by(LA.student_id, activity_subject, activity_day)
+
+    return {models.AttendanceRollup: attendance, models.ActivityRollup: activities}
+
+
+def rebuild_rollups(db: Session) -> Dict[str, int]:
+    """Recompute both rollup tables from the raw history, returning row counts"""
+    counts = {}
+    for model, daily in _daily_groups(db).items():
+        measures = MEASURES[model]
+        buckets = {}  # key -> [first raw id, *measures]
+        for student_id, grade, subject, day, first_id, *values in daily:
+            day = date.fromisoformat(day)
+            for granularity in GRANULARITIES:
+                bucket = bucket_start(granularity, day)
+                for level_student in (student_id, None):
+                    key = (granularity, bucket, level_student, grade, subject)
+                    entry = buckets.get(key)
+                    if entry is None:
+                        buckets[key] = [first_id, *values]
+                    else:
+                        entry[0] = min(entry[0], first_id)
+                        for i, value in enumerate(values, start=1):
+                            entry[i] += value
+
+        db.query(model).delete()
+        # Insert in first-seen order so that ids order buckets like incremental writes do
+        db.bulk_insert_mappings(model, [
+            {
+                "granularity": granularity, "bucket_start": bucket, "student_id": student_id,
+                "grade": grade, "subject": subject, **dict(zip(measures, values))
+            }
+            for (granularity, bucket, student_id, grade, subject), (_, *values)
+            in sorted(buckets.items(), key=lambda item: item[1][0])
+        ])
+        counts[model.__tablename__] = len(buckets)
+    db.commit()
+    return counts
+
+
+def ensure_built(db: Session) -> bool:
+    """Backfill the rollups once for a database that has history but no rollups"""
+    for model, raw in ((models.AttendanceRollup, models.Attendance),
+                       (models.ActivityRollup, models.LearningActivity)):
+        if db.query(model.id).first() is None and db.query(raw.id).first() is not None:
+            rebuild_rollups(db)
+            return True
+    return False
+
+
+if __name__ == "__main__":
+    from Backend.database import SessionLocal, engine, Base
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for table, rows in rebuild_rollups(db).items():
+            print(f"Rebuilt {rows} rows in {table}")
+    finally:
+        db.close()
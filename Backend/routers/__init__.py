@@ -3,4 +3,5 @@ from . import students
 from . import attendance
 from . import activities
 from . import syllabus
-from . import alerts
\ No newline at end of file
+from . import alerts
+from . import analytics
\ No newline at end of file
@@ -5,7 +5,12 @@ from sqlalchemy import func, Integer
 from datetime import datetime, timedelta
 from typing import List, Optional
 from Backend.database import get_db
-from Backend import models, schemas
+from Backend import models, schemas, aggregates, rollups
+from Backend import analytics_kernels as kernels
+from Backend.analytics_cache import analytics_cache
+from Backend.alert_inbox import alert_inbox
+from Backend.leaderboard import leaderboard
+from Backend.window_counters import window_counters
 
 router = APIRouter(prefix="/activities", tags=["activities"])
 
@@ -33,8 +38,14 @@ def start_learning_activity(
         start_time=datetime.now()
     )
     db.add(db_activity)
+    aggregates.apply_change(db, None, aggregates.activity_contribution(db_activity))
+    rollups.apply_change(db, None, rollups.activity_contribution(db, db_activity))
     db.commit()
     db.refresh(db_activity)
+    analytics_cache.invalidate(db_activity.student_id)
+    leaderboard.update(db, db_activity.student_id)
+    window_counters.update(db, db_activity.student_id)
+    alert_inbox.update(db, db_activity.student_id)
     return db_activity
 
 @router.post("/{activity_id}/complete")
@@ -54,6 +65,9 @@ def complete_learning_activity(
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
+    before = aggregates.activity_contribution(activity)
+    rollups_before = rollups.activity_contribution(db, activity)
+    
     activity.end_time = datetime.now()
     activity.completed = True
     
@@ -68,7 +82,12 @@ def complete_learning_activity(
     if notes:
         activity.notes = notes
     
+    aggregates.apply_change(db, before, aggregates.activity_contribution(activity))
+    rollups.apply_change(db, rollups_before, rollups.activity_contribution(db, activity))
     db.commit()
+    analytics_cache.invalidate(activity.student_id)
+    leaderboard.update(db, activity.student_id)
+    alert_inbox.update(db, activity.student_id)
     db.refresh(activity)
     
     return {
@@ -114,22 +133,12 @@ def get_student_progress(student_id: int, db: Session = Depends(get_db)):
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    # Get total activities
-    total_activities = db.query(models.LearningActivity).filter(
-        models.LearningActivity.student_id == student_id
-    ).count()
-    
-    # Get completed activities
-    completed_activities = db.query(models.LearningActivity).filter(
-        models.LearningActivity.student_id == student_id,
-        models.LearningActivity.completed == True
-    ).count()
-    
-    # Calculate average score
-    avg_score = db.query(func.avg(models.LearningActivity.score)).filter(
-        models.LearningActivity.student_id == student_id,
-        models.LearningActivity.score.isnot(None)
-    ).scalar() or 0
+    # Get total/completed activities and average score from the maintained counters
+    counters = aggregates.get_student_aggregates(db, student_id)
+    total_activities = counters.activity_total
+    completed_activities = counters.activity_completed
+    avg_score = (counters.activity_score_sum / counters.activity_score_count
+                 if counters.activity_score_count else 0)
     
     # Get total study time
     total_study_time = db.query(func.sum(models.LearningActivity.duration)).filter(
@@ -230,11 +239,21 @@ def update_activity(
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
+    before = aggregates.activity_contribution(activity)
+    rollups_before = rollups.activity_contribution(db, activity)
+    previous_student_id = activity.student_id
+    
     # Update fields
     for key, value in activity_update.dict(exclude_unset=True).items():
         setattr(activity, key, value)
     
+    aggregates.apply_change(db, before, aggregates.activity_contribution(activity))
+    rollups.apply_change(db, rollups_before, rollups.activity_contribution(db, activity))
     db.commit()
+    analytics_cache.invalidate(previous_student_id, activity.student_id)
+    leaderboard.update(db, previous_student_id, activity.student_id)
+    window_counters.update(db, previous_student_id, activity.student_id)
+    alert_inbox.update(db, previous_student_id, activity.student_id)
     db.refresh(activity)
     return activity
 
@@ -250,8 +269,15 @@ def delete_activity(activity_id: int, db: Session = Depends(get_db)):
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
+    aggregates.apply_change(db, aggregates.activity_contribution(activity), None)
+    rollups.apply_change(db, rollups.activity_contribution(db, activity), None)
+    student_id = activity.student_id
     db.delete(activity)
     db.commit()
+    analytics_cache.invalidate(student_id)
+    leaderboard.update(db, student_id)
+    window_counters.update(db, student_id)
+    alert_inbox.update(db, student_id)
     return {"message": "Activity deleted successfully"}
 
 @router.get("/recent/{student_id}")
@@ -261,40 +287,27 @@ def get_recent_activities(student_id: int, days: int = 7, db: Session = Depends(
     """
     since_date = datetime.now() - timedelta(days=days)
     
-    activities = db.query(models.LearningActivity).filter(
-        models.LearningActivity.student_id == student_id,
-        models.LearningActivity.start_time >= since_date
-    ).order_by(models.LearningActivity.start_time.desc()).all()
-    
-    daily_summary = {}
-    for activity in activities:
-        date_str = activity.start_time.date().isoformat()
-        if date_str not in daily_summary:
-            daily_summary[date_str] = {
-                "date": date_str,
-                "total_activities": 0,
-                "total_duration": 0,
-                "completed": 0,
-                "average_score": 0,
-                "scores": []
-            }
-        
-        daily_summary[date_str]["total_activities"] += 1
-        if activity.duration:
-            daily_summary[date_str]["total_duration"] += activity.duration
-        if activity.completed:
-            daily_summary[date_str]["completed"] += 1
-        if activity.score:
-            daily_summary[date_str]["scores"].append(activity.score)
+    # Read the daily rollups instead of re-bucketing every activity
+    rollup = models.ActivityRollup
+    days_rows = rollups.grouped(
+        db, rollup, "day", ("bucket_start",),
+        rollup.student_id == student_id,
+        rollup.bucket_start >= since_date.date()
+    )
     
-    # Calculate averages
-    for date_str in daily_summary:
-        scores = daily_summary[date_str]["scores"]
-        daily_summary[date_str]["average_score"] = round(sum(scores) / len(scores), 2) if scores else 0
-        del daily_summary[date_str]["scores"]
+    daily_summary = [
+        {
+            "date": day.isoformat(),
+            "total_activities": total,
+            "total_duration": kernels.native_number(duration_sum),
+            "completed": completed,
+            "average_score": round(score_sum / scored, 2) if scored else 0
+        }
+        for day, total, completed, score_sum, scored, duration_sum in reversed(days_rows)
+    ]
     
     return {
         "student_id": student_id,
         "period_days": days,
-        "daily_summary": list(daily_summary.values())
+        "daily_summary": daily_summary
     }
\ No newline at end of file
@@ -1,99 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
 from Backend.database import get_db
-from Backend import models, schemas
+from Backend import alert_engine, models, schemas
+from Backend.alert_inbox import alert_inbox
+from Backend.alert_rules import rule_book as alert_rule_book
+from Backend.event_stream import TooManyClients, event_hub
+from Backend.window_counters import window_counters
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
-class AlertService:
-    @staticmethod
-    def check_attendance_alerts(student_id: int, db: Session):
-        """Check for attendance-related alerts"""
-        alerts = []
-        
-        # Check recent attendance (last 7 days)
-        week_ago = datetime.now() - timedelta(days=7)
-        recent_attendance = db.query(models.Attendance).filter(
-            models.Attendance.student_id == student_id,
-            models.Attendance.date >= week_ago
-        ).all()
-        
-        if recent_attendance:
-            present_days = sum(1 for a in recent_attendance if a.present)
-            attendance_rate = (present_days / len(recent_attendance)) * 100
-            
-            if attendance_rate < 70:
-                alerts.append({
-                    "type": "attendance_low",
-                    "message": f"Low attendance rate: {attendance_rate:.1f}% in last 7 days",
-                    "severity": "warning",
-                    "recommendation": "Try to attend more regularly"
-                })
-        
-        return alerts
-    
-    @staticmethod
-    def check_study_alerts(student_id: int, db: Session):
-        """Check for study-related alerts"""
-        alerts = []
-        
-        # Check recent study activity
-        week_ago = datetime.now() - timedelta(days=7)
-        recent_activities = db.query(models.LearningActivity).filter(
-            models.LearningActivity.student_id == student_id,
-            models.LearningActivity.start_time >= week_ago
-        ).count()
-        
-        if recent_activities < 3:
-            alerts.append({
-                "type": "low_study_activity",
-                "message": f"Low study activity: only {recent_activities} sessions in last 7 days",
-                "severity": "warning",
-                "recommendation": "Try to study at least 30 minutes daily"
-            })
-        
-        return alerts
+
+class _SubscriptionResponse(StreamingResponse):
+    """Releases the stream's subscription even if the body was never iterated (client gone before the first event)"""
+    def __init__(self, subscription, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subscription = subscription
     
-    @staticmethod
-    def check_performance_alerts(student_id: int, db: Session):
-        """Check for performance-related alerts"""
-        alerts = []
-        
-        # Check recent assessment scores
-        recent_assessments = db.query(models.Assessment).filter(
-            models.Assessment.student_id == student_id
-        ).order_by(models.Assessment.date.desc()).limit(5).all()
-        
-        if recent_assessments:
-            scores = [a.score / a.max_score * 100 for a in recent_assessments]
-            avg_score = sum(scores) / len(scores)
-            
-            if avg_score < 50:
-                alerts.append({
-                    "type": "low_performance",
-                    "message": f"Average score is low: {avg_score:.1f}%",
-                    "severity": "warning",
-                    "recommendation": "Review difficult topics and practice more"
-                })
-        
-        return alerts
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            event_hub.unsubscribe(self.subscription)
+
 
 @router.get("/student/{student_id}")
-def get_student_alerts(student_id: int, db: Session = Depends(get_db)):
+def get_student_alerts(student_id: int, days: int = 7, db: Session = Depends(get_db)):
     """Get all alerts for a student"""
     # Check if student exists
     student = db.query(models.Student).filter(models.Student.id == student_id).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    # Collect alerts from different checks
-    alerts = []
-    
-    alerts.extend(AlertService.check_attendance_alerts(student_id, db))
-    alerts.extend(AlertService.check_study_alerts(student_id, db))
-    alerts.extend(AlertService.check_performance_alerts(student_id, db))
+    if days == alert_inbox.days:
+        alerts = alert_inbox.open_alerts(db, student_id)
+    else:
+        # Other windows are not materialized: same grouped rule queries, restricted to this student
+        alerts = alert_engine.evaluate(db, days=days, student_ids=[student_id])[student_id]
     
     return {
         "student_id": student_id,
@@ -105,33 +50,78 @@ def get_student_alerts(student_id: int, db: Session = Depends(get_db)):
 
 @router.get("/summary")
 def get_alerts_summary(days: int = 7, db: Session = Depends(get_db)):
-    """Get summary of all alerts"""
-    all_students = db.query(models.Student).all()
+    """Get summary of all alerts over the last ``days`` days, with the alerts of every flagged student"""
+    if days == alert_inbox.days:
+        return {**alert_inbox.summary(db), "days": days, "checked_at": datetime.now().isoformat()}
     
-    summary = {
-        "total_students": len(all_students),
-        "students_with_alerts": 0,
-        "alert_types": {
-            "attendance_low": 0,
-            "low_study_activity": 0,
-            "low_performance": 0
-        },
-        "by_severity": {
-            "warning": 0,
-            "critical": 0
-        }
-    }
+    rules = alert_rule_book.current()
+    alerts = alert_engine.evaluate(db, days=days, rules=rules)
+    students = {student.id: student for student in db.query(models.Student.id, models.Student.name, models.Student.grade)}
     
-    for student in all_students:
-        alerts = AlertService.check_attendance_alerts(student.id, db)
-        alerts.extend(AlertService.check_study_alerts(student.id, db))
-        alerts.extend(AlertService.check_performance_alerts(student.id, db))
-        
-        if alerts:
-            summary["students_with_alerts"] += 1
-            
-        for alert in alerts:
-            summary["alert_types"][alert["type"]] = summary["alert_types"].get(alert["type"], 0) + 1
-            summary["by_severity"][alert["severity"]] = summary["by_severity"].get(alert["severity"], 0) + 1
+    return {
+        **alert_engine.summarize(alerts, rules),
+        "days": days,
+        "students": [
+            {
+                "student_id": student_id,
+                "student_name": students[student_id].name,
+                "grade": students[student_id].grade,
+                "alerts": student_alerts
+            }
+            for student_id, student_alerts in alerts.items() if student_alerts
+        ],
+        "checked_at": datetime.now().isoformat()
+    }
+
+@router.get("/student/{student_id}/history")
+def get_student_alert_history(student_id: int, limit: int = 100, db: Session = Depends(get_db)):
+    """Raised and resolved alerts of a student, newest first"""
+    student = db.query(models.Student).filter(models.Student.id == student_id).first()
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
     
-    return summary
\ No newline at end of file
+    history = alert_inbox.history(db, student_id, limit=limit)
+    return {
+        "student_id": student_id,
+        "student_name": student.name,
+        "open_alerts": sum(1 for alert in history if alert["resolved_at"] is None),
+        "alerts": history
+    }
+
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    grade: Optional[str] = None,
+    school: Optional[str] = None,
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """Server-Sent Events of raised/resolved alerts and risk-level changes, optionally for one grade or school"""
+    resume_from = last_event_id
+    if resume_from is None and last_event_id_header and last_event_id_header.isdigit():
+        resume_from = int(last_event_id_header)
+    try:
+        subscription, backlog, reset = event_hub.subscribe(grade, school, resume_from)
+    except TooManyClients as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return _SubscriptionResponse(
+        subscription,
+        event_hub.stream(request, subscription, backlog, reset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stream/status")
+def get_alert_stream_status():
+    """Connected stream clients, buffered events and clients dropped for falling behind"""
+    return event_hub.stats()
+
+@router.get("/inbox")
+def get_alert_inbox_status():
+    """Window of the materialized alerts, the last full re-evaluation and the window counters behind it"""
+    return {"days": alert_inbox.days, "last_sync": alert_inbox.last_sync, "window_counters": window_counters.stats()}
+
+@router.get("/rules")
+def get_alert_rules():
+    """Alert rules in force, where they were loaded from and the last reload error"""
+    return alert_rule_book.status()
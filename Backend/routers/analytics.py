@@ -0,0 +1,257 @@
+# analytics.py - Server-side Learning Analytics Router
+import json
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from Backend.analytics import LearningAnalytics
+from Backend.database import get_db, SessionLocal
+from Backend.leaderboard import leaderboard
+from Backend import models, rollups
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+analytics = LearningAnalytics()
+
+MAX_PAGE_SIZE = 1000
+
+
+def _date_range(start_date: Optional[date], end_date: Optional[date]):
+    """Turn inclusive calendar dates into a [start, end) datetime range"""
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    start = datetime.combine(start_date, time.min) if start_date else None
+    end = datetime.combine(end_date + timedelta(days=1), time.min) if end_date else None
+    return start, end
+
+
+def _compact(student_analytics: dict) -> dict:
+    """Headline numbers of a student payload, for low-bandwidth listings"""
+    attendance = student_analytics["attendance"]
+    progress = student_analytics["learning_progress"]
+    return {
+        "type": "student",
+        "student_id": student_analytics["student_id"],
+        "student_name": student_analytics["student_name"],
+        "grade": student_analytics["grade"],
+        "village": student_analytics["village"],
+        "attendance_rate": attendance["attendance_rate"],
+        "completion_rate": progress["completion_rate"],
+        "average_score": progress["average_score"],
+        "assessment_average": student_analytics["assessment_scores"]["average_score"],
+        "total_study_time": progress["total_study_time"],
+        "weekly_activities": progress["weekly_activities"],
+        "risk_level": student_analytics["risk_level"]
+    }
+
+
+@router.get("/student/{student_id}")
+def get_student_analytics(student_id: int, db: Session = Depends(get_db)):
+    """
+    Get full analytics for one student
+    """
+    result = analytics.get_student_analytics(student_id, db)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+
+@router.get("/class")
+def stream_class_analytics(
+    grade: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    detail: str = Query("summary", pattern="^(summary|full)$")
+):
+    """
+    Stream class analytics as NDJSON: one line per student, then a summary line.
+
+    Students are paged by id with skip/limit; the summary line carries
+    next_skip when another page exists. start_date/end_date (YYYY-MM-DD,
+    inclusive) restrict the attendance, activity and assessment rows used.
+    """
+    start, end = _date_range(start_date, end_date)
+
+    def generate():
+        # The stream outlives the request dependencies, so it owns its session
+        db = SessionLocal()
+        try:
+            query = db.query(models.Student.id)
+            if grade:
+                query = query.filter(models.Student.grade == grade)
+            student_ids = [row.id for row in query.order_by(models.Student.id).offset(skip).limit(limit + 1)]
+            has_more = len(student_ids) > limit
+            student_ids = student_ids[:limit]
+
+            count = 0
+            totals = {"attendance_rate": 0, "completion_rate": 0, "average_score": 0, "total_study_time": 0}
+            risk_distribution = {"low": 0, "medium": 0, "high": 0}
+
+            for student_analytics in analytics.iter_class_analytics(db, student_ids, start=start, end=end):
+                record = _compact(student_analytics)
+                count += 1
+                for key in totals:
+                    totals[key] += record[key]
+                risk_distribution[record["risk_level"]] = risk_distribution.get(record["risk_level"], 0) + 1
+
+                if detail == "full":
+                    record = {"type": "student", **student_analytics}
+                yield json.dumps(record, default=str) + "\n"
+
+            yield json.dumps({
+                "type": "summary",
+                "grade": grade or "All Grades",
+                "start_date": start_date.isoformat() if start_date else None,
+                "end_date": end_date.isoformat() if end_date else None,
+                "skip": skip,
+                "total_students": count,
+                "next_skip": skip + count if has_more else None,
+                "average_attendance_rate": round(totals["attendance_rate"] / count, 2) if count else 0,
+                "average_completion_rate": round(totals["completion_rate"] / count, 2) if count else 0,
+                "average_score": round(totals["average_score"] / count, 2) if count else 0,
+                "total_study_hours": round(totals["total_study_time"] / 60, 2),
+                "risk_distribution": risk_distribution,
+                "analytics_date": datetime.now().isoformat()
+            }) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get("/class/summary")
+def get_class_summary(
+    grade: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get class-level aggregates, top performers and students needing attention
+    """
+    start, end = _date_range(start_date, end_date)
+    result = analytics.get_class_analytics(db, grade=grade, start=start, end=end)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+
+@router.get("/subjects")
+def get_subjects_analytics(
+    subject: List[str] = Query(..., description="Repeat for several subjects"),
+    grade: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get per-student performance for one or more subjects
+    """
+    start, end = _date_range(start_date, end_date)
+    return analytics.get_subjects_analytics(subject, db, grade=grade, start=start, end=end)
+
+
+@router.get("/trends")
+def get_trends(
+    metric: str = Query("attendance", pattern="^(attendance|activity)$"),
+    granularity: str = Query("month", pattern="^(day|week|month)$"),
+    student_id: Optional[int] = None,
+    grade: Optional[str] = None,
+    subject: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Attendance or activity time series for one student, one grade or everyone.
+
+    Reads the day/week/month rollups, so a school-year chart costs the same
+    whatever the number of raw rows. Buckets are labelled by their first day.
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    
+    if metric == "attendance":
+        rows = rollups.trend(db, models.AttendanceRollup, granularity, student_id=student_id,
+                             grade=grade, subject=subject, start=start_date, end=end_date)
+        series = [
+            {
+                "bucket_start": bucket.isoformat(),
+                "total": total,
+                "present": present,
+                "attendance_rate": round(present / total * 100, 2) if total > 0 else 0
+            }
+            for bucket, total, present in rows
+        ]
+    else:
+        rows = rollups.trend(db, models.ActivityRollup, granularity, student_id=student_id,
+                             grade=grade, subject=subject, start=start_date, end=end_date)
+        series = [
+            {
+                "bucket_start": bucket.isoformat(),
+                "total_activities": total,
+                "completed_activities": completed,
+                "completion_rate": round(completed / total * 100, 2) if total > 0 else 0,
+                "average_score": round(score_sum / scored, 2) if scored else 0,
+                "total_duration": round(duration_sum, 2)
+            }
+            for bucket, total, completed, score_sum, scored, duration_sum in rows
+        ]
+    
+    return {
+        "metric": metric,
+        "granularity": granularity,
+        "student_id": student_id,
+        "grade": grade or "All Grades",
+        "subject": subject or "All Subjects",
+        "series": series
+    }
+
+
+@router.get("/leaderboard")
+def get_leaderboard(
+    grade: Optional[str] = None,
+    school: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    order: str = Query("top", pattern="^(top|bottom)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Page through the weighted-performance ranking of a grade, a school or everyone.
+
+    order=bottom walks the same ranking from the lowest score; rank always
+    counts from the top.
+    """
+    total, entries = leaderboard.page(db, skip, limit, grade=grade, school=school, order=order)
+    return {
+        "grade": grade or "All Grades",
+        "school": school or "All Schools",
+        "order": order,
+        "total_students": total,
+        "skip": skip,
+        "limit": limit,
+        "next_skip": skip + limit if skip + limit < total else None,
+        "entries": entries
+    }
+
+
+@router.get("/leaderboard/student/{student_id}")
+def get_leaderboard_position(student_id: int, db: Session = Depends(get_db)):
+    """
+    Get a student's rank overall, in their grade and in their school
+    """
+    student = db.query(models.Student).filter(models.Student.id == student_id).first()
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return {
+        "student_id": student_id,
+        "overall_rank": leaderboard.rank_of(db, student_id),
+        "grade_rank": leaderboard.rank_of(db, student_id, grade=student.grade) if student.grade else None,
+        "school_rank": leaderboard.rank_of(db, student_id, school=student.school) if student.school else None
+    }
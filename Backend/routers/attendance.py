@@ -7,6 +7,11 @@ from typing import List
 from Backend.database import get_db
 import Backend.models as models  # ✅ Import as module
 import Backend.schemas as schemas
+from Backend import aggregates, rollups
+from Backend.analytics_cache import analytics_cache
+from Backend.alert_inbox import alert_inbox
+from Backend.leaderboard import leaderboard
+from Backend.window_counters import window_counters
 
 router = APIRouter(prefix="/attendance", tags=["attendance"])
 
@@ -23,8 +28,14 @@ def mark_attendance(attendance: schemas.AttendanceCreate, db: Session = Depends(
     # Create attendance record
     db_attendance = models.Attendance(**attendance.dict())
     db.add(db_attendance)
+    aggregates.apply_change(db, None, aggregates.attendance_contribution(db_attendance))
+    rollups.apply_change(db, None, rollups.attendance_contribution(db, db_attendance))
     db.commit()
     db.refresh(db_attendance)
+    analytics_cache.invalidate(db_attendance.student_id)
+    leaderboard.update(db, db_attendance.student_id)
+    window_counters.update(db, db_attendance.student_id)
+    alert_inbox.update(db, db_attendance.student_id)
     return db_attendance
 
 @router.get("/student/{student_id}", response_model=List[schemas.Attendance])
@@ -42,16 +53,10 @@ def get_attendance_stats(student_id: int, db: Session = Depends(get_db)):
     """
     Get attendance statistics for a student
     """
-    # Get total attendance records
-    total = db.query(models.Attendance).filter(
-        models.Attendance.student_id == student_id
-    ).count()
-    
-    # Get present records
-    present = db.query(models.Attendance).filter(
-        models.Attendance.student_id == student_id,
-        models.Attendance.present == True
-    ).count()
+    # Get total and present records from the maintained counters
+    counters = aggregates.get_student_aggregates(db, student_id)
+    total = counters.attendance_total
+    present = counters.attendance_present
     
     # Calculate attendance rate
     attendance_rate = (present / total * 100) if total > 0 else 0
@@ -65,14 +70,13 @@ def get_attendance_stats(student_id: int, db: Session = Depends(get_db)):
         models.Attendance.student_id == student_id
     ).group_by(models.Attendance.subject).all()
     
-    # Recent attendance (last 7 days)
-    recent_days = db.query(
-        func.date(models.Attendance.date).label('date'),
-        func.avg(func.cast(models.Attendance.present, Float)).label('attendance_rate')
-    ).filter(
-        models.Attendance.student_id == student_id,
-        models.Attendance.date >= datetime.now() - timedelta(days=7)
-    ).group_by(func.date(models.Attendance.date)).order_by(func.date(models.Attendance.date).desc()).all()
+    # Recent attendance (last 7 days) from the daily rollups
+    rollup = models.AttendanceRollup
+    recent_days = rollups.grouped(
+        db, rollup, "day", ("bucket_start",),
+        rollup.student_id == student_id,
+        rollup.bucket_start >= (datetime.now() - timedelta(days=7)).date()
+    )
     
     return {
         "student_id": student_id,
@@ -88,13 +92,33 @@ def get_attendance_stats(student_id: int, db: Session = Depends(get_db)):
         ],
         "recent_trend": [
             {
-                "date": str(item.date),
-                "attendance_rate": round(item.attendance_rate * 100, 2)
+                "date": str(day),
+                "attendance_rate": round(day_present / day_total * 100, 2) if day_total > 0 else 0
             }
-            for item in recent_days
+            for day, day_total, day_present in reversed(recent_days)
         ]
     }
 
+@router.get("/student/{student_id}/window")
+def get_attendance_window(student_id: int, days: int = 7, db: Session = Depends(get_db)):
+    """
+    Attendance and learning sessions of a student over the last ``days`` calendar days,
+    from the in-memory window counters
+    """
+    window_counters.ensure_current(db)
+    if not window_counters.covers(days):
+        raise HTTPException(status_code=400, detail=f"days must be between 0 and {window_counters.days - 1}")
+    totals = window_counters.totals(student_id, days)
+    rate = window_counters.attendance_rate(student_id, days)
+    return {
+        "student_id": student_id,
+        "days": days,
+        "total_records": totals["attendance_total"],
+        "records_present": totals["attendance_present"],
+        "attendance_rate": round(rate, 2) if rate is not None else None,
+        "sessions": totals["sessions"]
+    }
+
 @router.get("/today")
 def get_today_attendance(db: Session = Depends(get_db)):
     """
@@ -169,11 +193,21 @@ def update_attendance(
     if not attendance:
         raise HTTPException(status_code=404, detail="Attendance record not found")
     
+    before = aggregates.attendance_contribution(attendance)
+    rollups_before = rollups.attendance_contribution(db, attendance)
+    previous_student_id = attendance.student_id
+    
     # Update fields
     for key, value in attendance_update.dict(exclude_unset=True).items():
         setattr(attendance, key, value)
     
+    aggregates.apply_change(db, before, aggregates.attendance_contribution(attendance))
+    rollups.apply_change(db, rollups_before, rollups.attendance_contribution(db, attendance))
     db.commit()
+    analytics_cache.invalidate(previous_student_id, attendance.student_id)
+    leaderboard.update(db, previous_student_id, attendance.student_id)
+    window_counters.update(db, previous_student_id, attendance.student_id)
+    alert_inbox.update(db, previous_student_id, attendance.student_id)
     db.refresh(attendance)
     return attendance
 
@@ -186,6 +220,13 @@ def delete_attendance(attendance_id: int, db: Session = Depends(get_db)):
     if not attendance:
         raise HTTPException(status_code=404, detail="Attendance record not found")
     
+    aggregates.apply_change(db, aggregates.attendance_contribution(attendance), None)
+    rollups.apply_change(db, rollups.attendance_contribution(db, attendance), None)
+    student_id = attendance.student_id
     db.delete(attendance)
     db.commit()
+    analytics_cache.invalidate(student_id)
+    leaderboard.update(db, student_id)
+    window_counters.update(db, student_id)
+    alert_inbox.update(db, student_id)
     return {"message": "Attendance record deleted successfully"}
\ No newline at end of file
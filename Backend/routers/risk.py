@@ -1,10 +1,16 @@
 # Backend/routers/risk.py
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+from datetime import datetime
 from Backend.database import get_db
 from Backend.ml_model import risk_model
+from Backend.model_registry import model_registry
+from Backend.inference_executor import inference_executor
+from Backend.prediction_cache import prediction_cache
+from Backend import batch_scoring, feature_store, what_if
 import Backend.models as models
 
 router = APIRouter(prefix="/risk", tags=["risk-prediction"])
@@ -29,24 +35,81 @@ class RiskPredictionResponse(BaseModel):
     features_used: List[str]
     feature_values: Dict[str, float]
 
+class BatchPredictionRequest(BaseModel):
+    features: List[FeatureInput]
+
+class BatchPredictionResponse(BaseModel):
+    total: int
+    predictions: List[RiskPredictionResponse]
+
+class WhatIfAxis(BaseModel):
+    feature: str
+    values: Optional[List[float]] = None  # explicit grid, or start/stop/steps
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: int = 21
+
+class WhatIfRequest(BaseModel):
+    base: FeatureInput = FeatureInput()
+    axes: List[WhatIfAxis]
+
 # Check model status
 @router.get("/status")
-async def get_risk_model_status():
+def get_risk_model_status():
     """Check if risk prediction model is loaded"""
-    if risk_model.model_loaded or risk_model.load_model():
+    if risk_model.load_model():
         return {
             "status": "loaded",
-            "model_type": "RandomForestClassifier",
+            "model_type": type(risk_model.model).__name__,
             "features": risk_model.features,
             "classes": risk_model.model.classes_.tolist() if risk_model.model else [],
-            "message": "Risk prediction model is ready"
+            "message": "Risk prediction model is ready",
+            **model_registry.status(),
+            "executor": inference_executor.stats(),
+            "prediction_cache": prediction_cache.stats(),
+            "last_batch_scoring": batch_scoring.last_run
         }
     return {
         "status": "not_loaded",
         "message": "Risk model not found. Run train_model.py first.",
-        "expected_file": "risk_model.pkl"
+        "expected_file": "risk_model.pkl",
+        **model_registry.status()
     }
 
+# List the versioned model artifacts
+@router.get("/models")
+def list_risk_models():
+    """Versioned model artifacts on disk and the one being served"""
+    return model_registry.status()
+
+# Hot swap the served model
+@router.post("/model/activate")
+def activate_risk_model(version: Optional[str] = None):
+    """Load a model version (default: newest) and swap it in without downtime"""
+    try:
+        loaded = model_registry.activate(version)
+        return {"status": "activated", **loaded.describe()}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Micro-batching executor metrics
+@router.get("/executor")
+def get_inference_executor_stats():
+    """Queue depth and batch size histograms of the inference executor"""
+    return inference_executor.stats()
+
+# Refresh the stored features of students whose data changed
+@router.post("/features/refresh")
+def refresh_risk_features(full: bool = False, db: Session = Depends(get_db)):
+    """Recompute stored risk features (only changed students unless full=true)"""
+    try:
+        result = feature_store.refresh(db, full=full)
+        return {**result, "watermark": feature_store.watermark(db)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Predict risk from features
 @router.post("/predict/from-features", response_model=RiskPredictionResponse)
 async def predict_risk_from_features(request: FeatureInput):
@@ -55,11 +118,8 @@ async def predict_risk_from_features(request: FeatureInput):
         # Convert Pydantic model to dict
         feature_dict = request.dict()
         
-        # Get prediction
-        result = risk_model.predict_from_features(feature_dict)
-        
-        if "error" in result:
-            raise HTTPException(status_code=500, detail=result["error"])
+        # Get prediction; concurrent requests share one model call off the event loop
+        result = await inference_executor.predict(feature_dict)
         
         return RiskPredictionResponse(
             student_id=None,
@@ -74,9 +134,53 @@ async def predict_risk_from_features(request: FeatureInput):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Predict risk for many feature vectors at once
+@router.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_risk_batch(request: BatchPredictionRequest):
+    """Predict risk levels for a list of feature vectors in one model call"""
+    try:
+        feature_dicts = [features.dict() for features in request.features]
+        results = risk_model.predict_results(feature_dicts)
+        
+        return BatchPredictionResponse(
+            total=len(results),
+            predictions=[
+                RiskPredictionResponse(
+                    student_id=None,
+                    predicted_risk=result["predicted_risk"],
+                    confidence=result["confidence"],
+                    probabilities=result["probabilities"],
+                    recommendations=result["recommendations"],
+                    features_used=result["features_used"],
+                    feature_values=result["feature_values"]
+                )
+                for result in results
+            ]
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Sweep one or two features around a base vector
+@router.post("/what-if")
+def risk_what_if(request: WhatIfRequest):
+    """Risk probability surface over a grid of one or two features, scored in one model call"""
+    try:
+        axes = [
+            {"feature": axis.feature,
+             "values": what_if.axis_values(axis.values, axis.start, axis.stop, axis.steps)}
+            for axis in request.axes
+        ]
+        # Plain lists of floats: skip the per-element jsonable_encoder walk
+        return JSONResponse(content=what_if.sweep(request.base.dict(), axes))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Predict risk for a student ID
 @router.get("/predict/student/{student_id}", response_model=RiskPredictionResponse)
-async def predict_risk_for_student(student_id: int, db: Session = Depends(get_db)):
+def predict_risk_for_student(student_id: int, db: Session = Depends(get_db)):
     """Predict risk level for a specific student"""
     try:
         # Check if student exists
@@ -89,11 +193,8 @@ async def predict_risk_for_student(student_id: int, db: Session = Depends(get_db
         if not features_dict:
             raise HTTPException(status_code=400, detail="Could not calculate student features")
         
-        # Get prediction using features
-        result = risk_model.predict_from_features(features_dict)
-        
-        if "error" in result:
-            raise HTTPException(status_code=500, detail=result["error"])
+        # Get prediction using features, batched with concurrent requests
+        result = inference_executor.predict_sync(features_dict)
         
         return RiskPredictionResponse(
             student_id=student_id,
@@ -112,31 +213,51 @@ async def predict_risk_for_student(student_id: int, db: Session = Depends(get_db
 
 # Get all students with risk predictions
 @router.get("/predict/all-students")
-async def predict_risk_all_students(db: Session = Depends(get_db)):
-    """Get risk predictions for all students"""
+def predict_risk_all_students(db: Session = Depends(get_db)):
+    """Latest stored risk prediction of every student (students never scored are scored live)"""
     try:
         students = db.query(models.Student).all()
+        stored = batch_scoring.latest_predictions(db)
         
         results = []
         for student in students:
-            try:
-                features_dict = risk_model.calculate_student_features(student.id, db)
-                if features_dict:
-                    prediction = risk_model.predict_from_features(features_dict)
-                    
-                    if "error" not in prediction:
-                        results.append({
-                            "student_id": student.id,
-                            "student_name": student.name,
-                            "grade": student.grade,
-                            "predicted_risk": prediction["predicted_risk"],
-                            "confidence": prediction["confidence"],
-                            "recommendations": prediction["recommendations"][:3],  # Top 3 only
-                            "attendance_rate": features_dict.get('attendance_rate', 0),
-                            "avg_score": features_dict.get('avg_score', 0)
-                        })
-            except:
-                continue  # Skip students with errors
+            row = stored.get(student.id)
+            if row is not None:
+                prediction = batch_scoring.prediction_payload(row)
+                results.append({
+                    "student_id": student.id,
+                    "student_name": student.name,
+                    "grade": student.grade,
+                    "predicted_risk": prediction["predicted_risk"],
+                    "confidence": prediction["confidence"],
+                    "recommendations": prediction["recommendations"][:3],  # Top 3 only
+                    "attendance_rate": row.attendance_rate,
+                    "avg_score": row.avg_score,
+                    "as_of": prediction["as_of"]
+                })
+        
+        # One feature read and one model call for the students the batch job has not seen yet
+        unscored = [student.id for student in students if student.id not in stored]
+        if unscored:
+            student_ids, X = risk_model.calculate_features_bulk(db, unscored)
+            feature_dicts = [dict(zip(risk_model.features, row.tolist())) for row in X]
+            students_by_id = {student.id: student for student in students}
+            scored_at = datetime.now().isoformat()
+            for student_id, features_dict, prediction in zip(
+                student_ids, feature_dicts, risk_model.predict_results(feature_dicts, X)
+            ):
+                student = students_by_id[student_id]
+                results.append({
+                    "student_id": student.id,
+                    "student_name": student.name,
+                    "grade": student.grade,
+                    "predicted_risk": prediction["predicted_risk"],
+                    "confidence": prediction["confidence"],
+                    "recommendations": prediction["recommendations"][:3],  # Top 3 only
+                    "attendance_rate": features_dict.get('attendance_rate', 0),
+                    "avg_score": features_dict.get('avg_score', 0),
+                    "as_of": scored_at
+                })
         
         # Sort by risk level (high to low)
         risk_order = {"high": 3, "medium": 2, "low": 1}
@@ -148,8 +269,18 @@ async def predict_risk_all_students(db: Session = Depends(get_db)):
             "high_risk_count": sum(1 for r in results if r["predicted_risk"] == "high"),
             "medium_risk_count": sum(1 for r in results if r["predicted_risk"] == "medium"),
             "low_risk_count": sum(1 for r in results if r["predicted_risk"] == "low"),
+            "as_of": min((r["as_of"] for r in results), default=None),
             "students": results
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Run the batch scoring job now
+@router.post("/scoring/run")
+def run_batch_scoring(full: bool = False, db: Session = Depends(get_db)):
+    """Score students whose inputs changed into risk_predictions (everyone with full=true)"""
+    try:
+        return batch_scoring.score_students(db, full=full)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -4,6 +4,11 @@ from typing import List
 from Backend.database import get_db
 import Backend.models as models  # ✅ Import as module
 import Backend.schemas as schemas  # ✅ Import as module
+from Backend import aggregates, feature_store, rollups
+from Backend.alert_inbox import alert_inbox
+from Backend.analytics_cache import analytics_cache
+from Backend.leaderboard import leaderboard
+from Backend.window_counters import window_counters
 
 router = APIRouter(prefix="/students", tags=["students"])
 
@@ -13,6 +18,8 @@ def create_student(student: schemas.StudentCreate, db: Session = Depends(get_db)
     db.add(db_student)
     db.commit()
     db.refresh(db_student)
+    leaderboard.update(db, db_student.id)
+    alert_inbox.update(db, db_student.id)
     return db_student
 
 @router.get("/", response_model=List[schemas.Student])
@@ -33,11 +40,16 @@ def update_student(student_id: int, student_update: schemas.StudentCreate, db: S
     if db_student is None:
         raise HTTPException(status_code=404, detail="Student not found")
     
+    previous_grade = db_student.grade
     for key, value in student_update.dict().items():
         setattr(db_student, key, value)
     
+    rollups.move_student_grade(db, student_id, previous_grade, db_student.grade)
     db.commit()
     db.refresh(db_student)
+    # Cached payloads carry the name, grade and village
+    analytics_cache.invalidate(db_student.id)
+    leaderboard.update(db, db_student.id)
     return db_student
 
 @router.delete("/{student_id}")
@@ -46,6 +58,15 @@ def delete_student(student_id: int, db: Session = Depends(get_db)):
     if student is None:
         raise HTTPException(status_code=404, detail="Student not found")
     
+    # Their attendance and activity rows stay with student_id NULL, which the
+    # rebuilt counters and rollups do not count
+    aggregates.remove_student(db, student_id)
+    rollups.remove_student(db, student_id)
+    feature_store.remove_student(db, student_id)
     db.delete(student)
     db.commit()
+    analytics_cache.invalidate(student_id)
+    leaderboard.update(db, student_id)
+    window_counters.update(db, student_id)
+    alert_inbox.update(db, student_id)
     return {"message": "Student deleted successfully"}
\ No newline at end of file
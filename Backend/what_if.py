@@ -0,0 +1,126 @@
+"""What-if sweeps of the risk model over one or two features.
+
+``sweep`` holds a base feature vector fixed, varies one or two features over
+a grid, and scores every grid point plus the base vector in a single model
+call. Grids are far beyond ``RISK_COMPILED_MAX_ROWS``, so they always run
+through sklearn's vectorized ``predict_proba``; a 100 x 100 grid scores in
+a few tens of milliseconds.
+
+The result carries the probability surface of every class (and the
+predicted class) as nested lists indexed like the axes, and the minimum
+change that lowers the base vector's risk level: the lower-risk grid point
+closest to the base, where each feature's change is measured as a fraction
+of its axis span so attendance and consistency are comparable. The base
+value of every varied feature is added to its axis, so a change of one
+feature alone is always on the grid.
+
+Configuration (environment variables):
+    RISK_WHAT_IF_MAX_POINTS  largest grid accepted (default 10000)
+"""
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from Backend.ml_model import RiskPredictionModel, risk_model
+
+RISK_ORDER = {"high": 3, "medium": 2, "low": 1}
+PRECISION = 4
+
+
+def max_points() -> int:
+    return int(os.environ.get("RISK_WHAT_IF_MAX_POINTS", 10000))
+
+
+def axis_values(values: Optional[Sequence[float]] = None, start: Optional[float] = None,
+                stop: Optional[float] = None, steps: int = 21) -> np.ndarray:
+    """Grid of one axis: explicit ``values`` or ``steps`` evenly spaced points from ``start`` to ``stop``"""
+    if values:
+        return np.unique(np.asarray(values, dtype=float))
+    if start is None or stop is None:
+        raise ValueError("an axis needs either values or start and stop")
+    if steps < 2:
+        raise ValueError("an axis range needs at least 2 steps")
+    return np.linspace(start, stop, steps)
+
+
+def sweep(base: Dict[str, float], axes: List[Dict], model: RiskPredictionModel = None) -> Dict:
+    """Score ``base`` with the ``axes`` ({"feature", "values"}) features varied over their grid"""
+    model = model or risk_model
+    if not 1 <= len(axes) <= 2:
+        raise ValueError("vary one or two features")
+    names = [axis["feature"] for axis in axes]
+    if len(set(names)) != len(names):
+        raise ValueError("each feature can only be varied once")
+    requested = int(np.prod([len(axis["values"]) for axis in axes]))
+    if requested > max_points():
+        raise ValueError(f"grid has {requested} points, the limit is {max_points()}")
+
+    if not model.load_model():
+        raise RuntimeError("Model not loaded")
+    features = model.features
+    unknown = [name for name in names if name not in features]
+    if unknown:
+        raise ValueError(f"unknown features {unknown}, expected one of {features}")
+
+    base_row = np.array([float(base.get(feat, 0) or 0) for feat in features])
+    grids = [np.union1d(axis["values"], base_row[features.index(name)]) for name, axis in zip(names, axes)]
+    shape = tuple(len(grid) for grid in grids)
+    points = int(np.prod(shape))
+
+    X = np.tile(base_row, (points + 1, 1))
+    mesh = np.meshgrid(*grids, indexing="ij")
+    for name, values in zip(names, mesh):
+        X[1:, features.index(name)] = values.ravel()
+
+    # Row 0 is the base vector, the rest the grid in C order
+    artifact, predictions, probabilities = model.predict_batch_with_artifact(X)
+    classes = [str(class_name) for class_name in artifact.model.classes_]
+    base_risk = str(predictions[0])
+    grid_risk = predictions[1:].astype(str)
+    grid_probabilities = probabilities[1:]
+
+    return {
+        "model_version": artifact.version,
+        "features": names,
+        "axes": {name: grid.tolist() for name, grid in zip(names, grids)},
+        "points": points,
+        "base": {
+            "feature_values": dict(zip(features, base_row.tolist())),
+            "predicted_risk": base_risk,
+            "probabilities": dict(zip(classes, np.round(probabilities[0], PRECISION).tolist()))
+        },
+        "surface": {
+            class_name: np.round(grid_probabilities[:, i], PRECISION).reshape(shape).tolist()
+            for i, class_name in enumerate(classes)
+        },
+        "predicted_risk": grid_risk.reshape(shape).tolist(),
+        "minimum_change": _minimum_change(base_row, base_risk, features, names, grids, mesh, grid_risk)
+    }
+
+
+def _minimum_change(base_row, base_risk, features, names, grids, mesh, grid_risk) -> Optional[Dict]:
+    """Closest grid point with a lower risk level than the base (None if there is none)"""
+    base_level = RISK_ORDER.get(base_risk, 0)
+    levels = np.array([RISK_ORDER.get(risk, 0) for risk in grid_risk])
+    lower = np.flatnonzero((levels > 0) & (levels < base_level))
+    if len(lower) == 0:
+        return None
+
+    deltas = [values.ravel() - base_row[features.index(name)] for name, values in zip(names, mesh)]
+    spans = [float(np.ptp(grid)) or 1.0 for grid in grids]
+    distance = sum(np.abs(delta) / span for delta, span in zip(deltas, spans))
+    best = lower[np.argmin(distance[lower])]
+    return {
+        "from_risk": base_risk,
+        "to_risk": str(grid_risk[best]),
+        "changes": {
+            name: {
+                "from": float(base_row[features.index(name)]),
+                "to": float(values.ravel()[best]),
+                "delta": round(float(delta[best]), PRECISION)
+            }
+            for name, values, delta in zip(names, mesh, deltas)
+        },
+        "distance": round(float(distance[best]), PRECISION)
+    }
@@ -0,0 +1,226 @@
+"""Per-student day counters for rolling attendance and activity windows.
+
+Rules and dashboards keep asking the same question: how many attendance
+records, how many of them present, and how many learning sessions did a
+student have in the last N days. Each student gets a ring buffer of
+``WINDOW_COUNTERS_DAYS`` day slots (slot = day ordinal modulo the size) with
+three ``uint16`` counters per day, so any N-day window is a sum over N + 1
+slots in memory. As for the day rollups, "the last N days" means the
+calendar days from ``today - N`` through today.
+
+* ``warm`` fills every student's buffer from the student-level day rollups
+  (one indexed range per table) at startup; after midnight the next
+  ``ensure_current`` warms again, which also picks up rows written outside
+  the API or dated ahead.
+* Write endpoints call ``window_counters.update(db, student_id)`` after
+  committing, next to ``leaderboard.update``; it reloads that student's
+  slots from their day rollups.
+* ``totals``/``attendance_rate`` answer one student in O(N) and ``bulk``
+  answers everyone with one numpy sum, without touching SQLite.
+  ``alert_engine`` serves the attendance and session metrics of day
+  windows from here.
+
+Memory: 3 counters x 2 bytes x 64 days = 384 bytes per student, so 3.8 MB of
+buffers per 10k students plus about 1 MB for the student-to-row index
+(``stats()`` reports the actual figure). Capacity grows by doubling.
+
+Configuration (environment variables):
+    WINDOW_COUNTERS_DAYS  day slots per student; windows up to this minus one day (default 64)
+"""
+import os
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from Backend import models
+
+FIELDS = ("attendance_total", "attendance_present", "sessions")
+
+COUNTER_DTYPE = np.uint16
+COUNTER_MAX = np.iinfo(COUNTER_DTYPE).max
+
+
+def _rate(present: int, total: int) -> Optional[float]:
+    return present * 100.0 / total if total else None
+
+
+# Alert metrics derivable from the counters; students without rows in the
+# window are left out, as they are from the grouped SQL
+COUNTER_METRICS = {
+    "attendance_rate": ("attendance", lambda t: _rate(t[1], t[0])),
+    "attendance_records": ("attendance", lambda t: t[0]),
+    "absences": ("attendance", lambda t: t[0] - t[1]),
+    "sessions": ("activities", lambda t: t[2]),
+}
+
+
+class WindowCounters:
+    def __init__(self, days: Optional[int] = None):
+        self.days = days if days is not None else int(os.environ.get("WINDOW_COUNTERS_DAYS", 64))
+        self._index: Dict[int, int] = {}  # student_id -> row
+        self._counts = np.zeros((0, self.days, len(FIELDS)), dtype=COUNTER_DTYPE)
+        self._today: Optional[date] = None  # day the buffers were warmed on
+        self._bind = None  # engine they were warmed from
+        self._lock = threading.RLock()
+        self.warmed_at: Optional[Dict] = None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _day_rows(self, db: Session, first_day: date, student_ids: Optional[List[int]] = None):
+        """(field offset, student_id, day, counts...) from the student-level day rollups"""
+        AR, ACR = models.AttendanceRollup, models.ActivityRollup
+        attendance = db.query(AR.student_id, AR.bucket_start, func.sum(AR.total), func.sum(AR.present)).filter(
+            AR.granularity == "day", AR.student_id.isnot(None), AR.bucket_start >= first_day
+        )
+        activities = db.query(ACR.student_id, ACR.bucket_start, func.sum(ACR.total)).filter(
+            ACR.granularity == "day", ACR.student_id.isnot(None), ACR.bucket_start >= first_day
+        )
+        if student_ids is not None:
+            attendance = attendance.filter(AR.student_id.in_(student_ids))
+            activities = activities.filter(ACR.student_id.in_(student_ids))
+        for student_id, day, total, present in attendance.group_by(AR.student_id, AR.bucket_start):
+            yield 0, student_id, day, (total, present)
+        for student_id, day, total in activities.group_by(ACR.student_id, ACR.bucket_start):
+            yield 2, student_id, day, (total,)
+
+    def _fill(self, index: Dict[int, int], counts: np.ndarray, rows: Iterable, today: date) -> np.ndarray:
+        positions, values = [], []
+        for offset, student_id, day, counters in rows:
+            if day > today:
+                continue  # counted once the day comes round (see ensure_current)
+            row = index.get(student_id)
+            if row is None:
+                row = index[student_id] = len(index)
+            slot = day.toordinal() % self.days
+            for field, value in enumerate(counters, start=offset):
+                positions.append((row, slot, field))
+                values.append(value or 0)
+        if len(index) > len(counts):
+            counts = self._grown(counts, len(index))
+        if positions:
+            counts[tuple(np.array(positions).T)] = np.minimum(values, COUNTER_MAX)
+        return counts
+
+    def _grown(self, counts: np.ndarray, needed: int) -> np.ndarray:
+        grown = np.zeros((max(needed, 2 * len(counts), 64), self.days, len(FIELDS)), dtype=COUNTER_DTYPE)
+        grown[:len(counts)] = counts
+        return grown
+
+    def warm(self, db: Session, today: Optional[date] = None) -> Dict:
+        """Rebuild every buffer from the day rollups of the last ``days`` days"""
+        today = today or date.today()
+        started = time.perf_counter()
+        index: Dict[int, int] = {}
+        counts = np.zeros((0, self.days, len(FIELDS)), dtype=COUNTER_DTYPE)
+        counts = self._fill(index, counts, self._day_rows(db, today - timedelta(days=self.days - 1)), today)
+        with self._lock:
+            self._index, self._counts, self._today, self._bind = index, counts, today, db.get_bind()
+            self.warmed_at = {"day": today.isoformat(), "students": len(index),
+                              "seconds": round(time.perf_counter() - started, 3)}
+        return self.warmed_at
+
+    def ensure_current(self, db: Session):
+        """Warm on first use, once the day has changed and for another database"""
+        if self._today != date.today() or db.get_bind() is not self._bind:
+            self.warm(db)
+
+    def update(self, db: Session, *student_ids: Optional[int]):
+        """Reload the slots of students whose rows were just committed"""
+        ids = [student_id for student_id in set(student_ids) if student_id is not None]
+        if not ids or self._today is None or db.get_bind() is not self._bind:
+            return
+        with self._lock:
+            today = self._today
+            for student_id in ids:
+                row = self._index.get(student_id)
+                if row is not None:
+                    self._counts[row] = 0
+            rows = list(self._day_rows(db, today - timedelta(days=self.days - 1), ids))
+            self._counts = self._fill(self._index, self._counts, rows, today)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def covers(self, days: int, today: Optional[date] = None) -> bool:
+        """Whether an N-day window on ``today`` can be answered from the buffers"""
+        return self._today is not None and 0 <= days < self.days and (today or date.today()) == self._today
+
+    def _slots(self, days: int) -> List[int]:
+        if not self.covers(days, self._today):
+            raise ValueError(f"window of {days} days is outside the {self.days}-day buffers")
+        first = self._today.toordinal() - days
+        return [(first + offset) % self.days for offset in range(days + 1)]
+
+    def totals(self, student_id: int, days: int) -> Dict[str, int]:
+        """Counters of one student summed over the last ``days`` days, O(days)"""
+        with self._lock:
+            slots = self._slots(days)
+            row = self._index.get(student_id)
+            sums = [0] * len(FIELDS)
+            if row is not None:
+                buffer = self._counts[row]
+                for slot in slots:
+                    for position in range(len(FIELDS)):
+                        sums[position] += int(buffer[slot, position])
+        return dict(zip(FIELDS, sums))
+
+    def attendance_rate(self, student_id: int, days: int) -> Optional[float]:
+        """Percentage present over the last ``days`` days, None without attendance records"""
+        totals = self.totals(student_id, days)
+        return _rate(totals["attendance_present"], totals["attendance_total"])
+
+    def bulk(self, days: int, student_ids: Optional[List[int]] = None) -> Dict[int, Tuple[int, int, int]]:
+        """{student_id: (attendance_total, attendance_present, sessions)} for every student with counts in the window"""
+        with self._lock:
+            slots = self._slots(days)
+            index = self._index if student_ids is None else {
+                student_id: self._index[student_id] for student_id in student_ids if student_id in self._index
+            }
+            if not index:
+                return {}
+            rows = np.fromiter(index.values(), dtype=np.int64, count=len(index))
+            sums = self._counts[rows[:, None], slots].sum(axis=1, dtype=np.int64)
+        # Students whose rows are all outside the window (or deleted) have nothing to report
+        return {student_id: tuple(int(v) for v in sums[i])
+                for i, student_id in enumerate(index) if sums[i].any()}
+
+    def metric_values(self, metrics: List[str], days: int,
+                      student_ids: Optional[List[int]] = None) -> Dict[str, Dict[int, float]]:
+        """{metric: {student_id: value}} like the grouped rule query of one table and day window"""
+        values = {metric: {} for metric in metrics}
+        for student_id, totals in self.bulk(days, student_ids).items():
+            for metric in metrics:
+                table, derive = COUNTER_METRICS[metric]
+                if (totals[0] if table == "attendance" else totals[2]) > 0:
+                    values[metric][student_id] = derive(totals)
+        return values
+
+    def stats(self) -> Dict:
+        with self._lock:
+            students = len(self._index)
+            buffer_bytes = int(self._counts.nbytes)
+            index_bytes = sys.getsizeof(self._index) + students * 2 * 28  # int keys and values
+            per_student = self.days * len(FIELDS) * self._counts.itemsize
+        return {
+            "days": self.days,
+            "students": students,
+            "capacity": int(len(self._counts)),
+            "buffer_bytes": buffer_bytes,
+            "index_bytes": index_bytes,
+            "bytes_per_student": per_student,
+            "mb_per_10k_students": round((per_student * 10_000 + index_bytes / max(students, 1) * 10_000) / 1e6, 2),
+            "warmed": self.warmed_at
+        }
+
+
+# Shared counters of the app
+window_counters = WindowCounters()
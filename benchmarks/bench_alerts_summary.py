@@ -0,0 +1,81 @@
+"""Alert summary: per-student checks vs the set-based alert engine.
+
+Usage: python benchmarks/bench_alerts_summary.py [--students 500 2000]
+
+The loop is what ``/api/alerts/summary`` did before ``alert_engine`` (the
+old ``AlertService``): three checks per student, one query each, with the
+thresholds of the default rules. The engine reads attendance and sessions
+from the warmed ``window_counters`` (warm time reported separately) and runs
+one grouped assessment query. Both are timed on the same synthetic district
+with a 7-day window (calendar days, as the rules count them), and their
+per-student alerts are compared.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_data import build_database
+from Backend import alert_engine, models
+from Backend.window_counters import window_counters
+
+
+def loop_alerts(db, days=7):
+    since = datetime.combine((datetime.now() - timedelta(days=days)).date(), datetime.min.time())
+    alerts = {}
+    for student in db.query(models.Student).all():
+        student_alerts = []
+        attendance = db.query(models.Attendance).filter(
+            models.Attendance.student_id == student.id, models.Attendance.date >= since
+        ).all()
+        if attendance:
+            rate = sum(1 for a in attendance if a.present) / len(attendance) * 100
+            if rate < 70:
+                student_alerts.append({"type": "attendance_low"})
+        sessions = db.query(models.LearningActivity).filter(
+            models.LearningActivity.student_id == student.id, models.LearningActivity.start_time >= since
+        ).count()
+        if sessions < 3:
+            student_alerts.append({"type": "low_study_activity"})
+        assessments = db.query(models.Assessment).filter(
+            models.Assessment.student_id == student.id
+        ).order_by(models.Assessment.date.desc()).limit(5).all()
+        if assessments and sum(a.score / a.max_score * 100 for a in assessments) / len(assessments) < 50:
+            student_alerts.append({"type": "low_performance"})
+        alerts[student.id] = student_alerts
+    return alerts
+
+
+def run(students_list):
+    print(f"{'students':>8}  {'loop ms':>9}  {'warm ms':>8}  {'engine ms':>9}  {'speedup':>7}  {'alerts':>6}  same")
+    for students in students_list:
+        engine, SessionLocal, path = build_database(students, days_of_history=30)
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            expected = loop_alerts(db)
+            loop_ms = (time.perf_counter() - started) * 1e3
+            started = time.perf_counter()
+            window_counters.warm(db)
+            warm_ms = (time.perf_counter() - started) * 1e3
+            started = time.perf_counter()
+            actual = alert_engine.evaluate(db, days=7)
+            engine_ms = (time.perf_counter() - started) * 1e3
+        finally:
+            db.close()
+            engine.dispose()
+            os.remove(path)
+        same = {k: [a["type"] for a in v] for k, v in expected.items()} == \
+               {k: [a["type"] for a in v] for k, v in actual.items()}
+        total = sum(len(v) for v in actual.values())
+        print(f"{students:>8}  {loop_ms:>9.1f}  {warm_ms:>8.1f}  {engine_ms:>9.1f}  {loop_ms / engine_ms:>6.1f}x  {total:>6}  {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, nargs="+", default=[500, 2000])
+    args = parser.parse_args()
+    run(args.students)
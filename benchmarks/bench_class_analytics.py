@@ -0,0 +1,94 @@
+"""Class analytics: per-student loop vs BulkAnalyticsEngine.
+
+Usage: python benchmarks/bench_class_analytics.py [--sizes 1000 10000] [--legacy-limit 1000]
+
+The per-student loop is ``get_class_analytics`` as it was before the bulk
+engine, kept in ``baseline_analytics``: one uncached ``get_student_analytics``
+per student. It scans the history tables several times per student, so it is
+only run up to ``--legacy-limit``. The whole class payload (every aggregate,
+top performers, students needing attention) must match it, apart from the
+timestamps.
+"""
+import argparse
+import os
+import time
+
+from synthetic_data import QueryCounter, build_database
+
+from baseline_analytics import BaselineAnalytics
+from Backend.analytics import LearningAnalytics
+from Backend.analytics_cache import analytics_cache
+from Backend.leaderboard import leaderboard
+
+
+def strip_timestamps(payload):
+    if isinstance(payload, dict):
+        return {k: strip_timestamps(v) for k, v in payload.items() if k != "analytics_date"}
+    if isinstance(payload, list):
+        return [strip_timestamps(v) for v in payload]
+    return payload
+
+
+def first_difference(expected, actual, path="payload"):
+    """Where two payloads first differ, or None"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in list(expected) + [k for k in actual if k not in expected]:
+            if key not in expected or key not in actual:
+                return f"{path}.{key} missing on one side"
+            difference = first_difference(expected[key], actual[key], f"{path}.{key}")
+            if difference:
+                return difference
+        return None
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return f"{path}: {len(expected)} vs {len(actual)} items"
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            difference = first_difference(e, a, f"{path}[{i}]")
+            if difference:
+                return difference
+        return None
+    return None if expected == actual else f"{path}: {expected!r} vs {actual!r}"
+
+
+def run(size, legacy_limit, grade):
+    engine, SessionLocal, path = build_database(size)
+    counter = QueryCounter(engine)
+    # The shared indexes belong to the previous size's database
+    leaderboard.invalidate()
+    analytics_cache.clear()
+    analytics = LearningAnalytics()
+    baseline = BaselineAnalytics()
+    try:
+        db = SessionLocal()
+        counter.reset()
+        started = time.perf_counter()
+        bulk = analytics.get_class_analytics(db, grade=grade)
+        bulk_seconds = time.perf_counter() - started
+        bulk_queries = counter.count
+        print(f"{size:>7} students  bulk    {bulk_queries:>7} queries  {bulk_seconds:8.2f} s")
+
+        if size <= legacy_limit:
+            counter.reset()
+            started = time.perf_counter()
+            legacy = baseline.get_class_analytics(db, grade=grade)
+            legacy_seconds = time.perf_counter() - started
+            print(f"{size:>7} students  legacy  {counter.count:>7} queries  {legacy_seconds:8.2f} s"
+                  f"  ({legacy_seconds / bulk_seconds:.1f}x slower)")
+
+            difference = first_difference(strip_timestamps(legacy), strip_timestamps(bulk))
+            print(f"{'':>7}           payload matches legacy: {difference is None}"
+                  + (f"  (first difference: {difference})" if difference else ""))
+        db.close()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--legacy-limit", type=int, default=1000)
+    parser.add_argument("--grade", default=None)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.legacy_limit, args.grade)
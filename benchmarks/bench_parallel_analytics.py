@@ -0,0 +1,75 @@
+"""Class and subject analytics: serial vs process pool at several worker counts.
+
+Usage: python benchmarks/bench_parallel_analytics.py [--students 10000] [--workers 1 2 4 8]
+
+Each worker count is warmed up once (spawning workers imports the whole
+backend) and then timed over ``--repeat`` runs. Speedup is relative to the
+serial path; it cannot exceed the number of cores this machine has.
+"""
+import argparse
+import os
+import time
+
+from synthetic_data import SUBJECTS, build_database
+
+from Backend import parallel_analytics
+from Backend.analytics import LearningAnalytics
+from Backend.leaderboard import leaderboard
+
+
+def strip_timestamps(payload):
+    if isinstance(payload, dict):
+        return {k: strip_timestamps(v) for k, v in payload.items() if k != "analytics_date"}
+    if isinstance(payload, list):
+        return [strip_timestamps(v) for v in payload]
+    return payload
+
+
+def best_of(repeat, fn):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(students, worker_counts, repeat):
+    engine, SessionLocal, path = build_database(students)
+    analytics = LearningAnalytics()
+    print(f"{students} students, {os.cpu_count()} CPU(s)")
+    try:
+        db = SessionLocal()
+        leaderboard.rebuild(db)
+        baseline = {}
+        for workers in worker_counts:
+            # Untimed warm-up so pool start-up is not counted
+            analytics.get_class_analytics(db, workers=workers)
+
+            class_seconds, class_result = best_of(repeat, lambda: analytics.get_class_analytics(db, workers=workers))
+            subject_seconds, subject_result = best_of(
+                repeat, lambda: analytics.get_subjects_analytics(SUBJECTS, db, workers=workers)
+            )
+            if not baseline:
+                baseline = {"class": (class_seconds, strip_timestamps(class_result)),
+                            "subject": (subject_seconds, strip_timestamps(subject_result))}
+            matches = (strip_timestamps(class_result) == baseline["class"][1] and
+                       strip_timestamps(subject_result) == baseline["subject"][1])
+            print(f"  workers={workers:<3} class {class_seconds:7.2f} s ({baseline['class'][0] / class_seconds:4.1f}x)"
+                  f"   subjects {subject_seconds:7.2f} s ({baseline['subject'][0] / subject_seconds:4.1f}x)"
+                  f"   matches serial: {matches}")
+        db.close()
+    finally:
+        parallel_analytics.shutdown()
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.students, args.workers, args.repeat)
@@ -0,0 +1,69 @@
+"""Risk scoring: one predict_from_features call per student vs predict_batch.
+
+Usage: python benchmarks/bench_risk_batch.py [--rows 100 1000 10000] [--loop-limit 2000]
+
+Feature vectors are random but in realistic ranges. The per-student loop is
+what ``/api/risk/predict/all-students`` did before ``predict_batch``; it pays
+the scaler and forest dispatch once per row, so it is only run up to
+``--loop-limit`` rows. Reported is the latency per student.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from Backend.ml_model import RiskPredictionModel
+
+
+def random_features(model, rows, seed=42):
+    rng = np.random.default_rng(seed)
+    columns = {
+        "attendance_rate": rng.uniform(20, 100, rows),
+        "avg_score": rng.uniform(10, 100, rows),
+        "study_consistency": rng.uniform(0, 7, rows),
+        "activity_completion_rate": rng.uniform(0, 100, rows),
+    }
+    return [{feat: float(columns[feat][i]) for feat in model.features} for i in range(rows)]
+
+
+def run(rows_list, loop_limit):
+    # load_model looks for risk_model.pkl relative to the working directory
+    os.chdir(ROOT)
+    model = RiskPredictionModel()
+    if not model.load_model():
+        sys.exit("risk_model.pkl is required")
+
+    print(f"{'rows':>8}  {'loop us/student':>16}  {'batch us/student':>17}  {'speedup':>8}  matches")
+    for rows in rows_list:
+        feature_dicts = random_features(model, rows)
+
+        started = time.perf_counter()
+        predictions, probabilities = model.predict_batch(model.feature_matrix(feature_dicts))
+        batch_results = model.batch_results(feature_dicts, predictions, probabilities)
+        batch_us = (time.perf_counter() - started) / rows * 1e6
+
+        if rows <= loop_limit:
+            started = time.perf_counter()
+            loop_results = [model.predict_from_features(features) for features in feature_dicts]
+            loop_us = (time.perf_counter() - started) / rows * 1e6
+            matches = all(
+                loop["predicted_risk"] == batch["predicted_risk"] and
+                np.allclose(list(loop["probabilities"].values()), list(batch["probabilities"].values()))
+                for loop, batch in zip(loop_results, batch_results)
+            )
+            print(f"{rows:>8}  {loop_us:>16.1f}  {batch_us:>17.1f}  {loop_us / batch_us:>7.1f}x  {matches}")
+        else:
+            print(f"{rows:>8}  {'skipped':>16}  {batch_us:>17.1f}  {'':>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--loop-limit", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.rows, args.loop_limit)
@@ -0,0 +1,110 @@
+"""Risk scoring latency: sklearn RandomForestClassifier vs the compiled flat-array forest.
+
+Usage: python benchmarks/bench_risk_latency.py [--calls 2000] [--artifact risk_model.pkl]
+
+By default a forest is trained the way the training notebook does (rule
+labels on uniform synthetic features, 100 trees) so the trees have real
+depth; ``--artifact`` benchmarks a saved ``{'model','scaler','features'}``
+file instead. Single-row latency is measured per call (p50/p99 over
+``--calls`` calls), batch throughput over ``--batch`` rows, followed by a
+sweep of batch sizes showing where the compiled walk stops paying off. The
+probability check compares both evaluators on the batch rows.
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.compiled_forest import compile_forest
+
+
+def notebook_model(samples=1000, trees=100, seed=42):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(40, 100, samples), rng.uniform(30, 95, samples),
+        rng.uniform(1, 5, samples), rng.uniform(50, 100, samples)
+    ])
+    y = np.where((X[:, 0] < 50) | (X[:, 1] < 40), "high",
+                 np.where((X[:, 0] < 70) | (X[:, 1] < 60), "medium", "low"))
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=trees, random_state=seed).fit(scaler.transform(X), y)
+    return model, scaler
+
+
+def random_rows(rows, seed=7):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(20, 100, rows), rng.uniform(10, 100, rows), rng.uniform(0, 7, rows), rng.uniform(0, 100, rows)
+    ])
+
+
+def latencies_us(fn, rows):
+    timings = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        started = time.perf_counter()
+        fn(row[None, :])
+        timings[i] = time.perf_counter() - started
+    return timings * 1e6
+
+
+def run(calls, batch, artifact):
+    if artifact:
+        model_data = joblib.load(artifact)
+        model, scaler = model_data['model'], model_data['scaler']
+    else:
+        model, scaler = notebook_model()
+    started = time.perf_counter()
+    compiled = compile_forest(model, scaler)
+    export_ms = (time.perf_counter() - started) * 1e3
+    if compiled is None:
+        sys.exit("The model is not a forest that can be compiled")
+    print(f"{compiled.n_trees} trees, depth {compiled.depth}, {len(compiled.feature)} nodes, "
+          f"{compiled.nbytes / 1024:.0f} KiB of arrays, exported in {export_ms:.1f} ms")
+
+    def sklearn_proba(X):
+        return model.predict_proba(scaler.transform(X))
+
+    X = random_rows(batch)
+    expected, actual = sklearn_proba(X), compiled.predict_proba(X)
+    print(f"max |probability difference| {np.abs(expected - actual).max():.2e}, "
+          f"same class for {np.mean(expected.argmax(axis=1) == actual.argmax(axis=1)) * 100:.2f}% of rows")
+
+    rows = random_rows(calls, seed=11)
+    # Warm-up so first-call allocations are not counted
+    latencies_us(sklearn_proba, rows[:50])
+    latencies_us(compiled.predict_proba, rows[:50])
+    print(f"{'evaluator':>10}  {'p50 us':>8}  {'p99 us':>8}  {'batch us/row':>12}")
+    for name, fn in (("sklearn", sklearn_proba), ("compiled", compiled.predict_proba)):
+        single = latencies_us(fn, rows)
+        started = time.perf_counter()
+        fn(X)
+        per_row = (time.perf_counter() - started) / batch * 1e6
+        print(f"{name:>10}  {np.percentile(single, 50):>8.1f}  {np.percentile(single, 99):>8.1f}  {per_row:>12.2f}")
+
+    # Where the compiled walk stops paying off (RISK_COMPILED_MAX_ROWS)
+    print(f"{'batch rows':>10}  {'sklearn ms':>10}  {'compiled ms':>11}")
+    for size in (1, 16, 64, 256, 1024, 4096):
+        cells = []
+        for fn in (sklearn_proba, compiled.predict_proba):
+            fn(X[:size])
+            started = time.perf_counter()
+            for _ in range(5):
+                fn(X[:size])
+            cells.append((time.perf_counter() - started) / 5 * 1e3)
+        print(f"{size:>10}  {cells[0]:>10.2f}  {cells[1]:>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=10000)
+    parser.add_argument("--artifact", help="saved model artifact to benchmark instead of a notebook-style forest")
+    args = parser.parse_args()
+    run(args.calls, args.batch, args.artifact)
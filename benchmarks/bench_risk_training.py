@@ -0,0 +1,53 @@
+"""Risk model training time by row count and core count.
+
+Usage: python benchmarks/bench_risk_training.py [--rows 1000 10000 50000] [--cores 1 2 4 -1]
+
+Builds a synthetic district per row count (``synthetic_data.build_database``,
+one student per row), reads its features the way ``risk_training`` does and
+runs ``risk_training.train`` with every core count. Reported are the
+cross-validated search and final fit times; speedup is relative to the
+first core count. Use ``--grid small`` for a quick run (2 candidates).
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_data import build_database
+from Backend import risk_training
+
+SMALL_GRID = {"n_estimators": [100], "max_depth": [None, 10]}
+
+
+def run(rows_list, cores_list, grid, folds):
+    param_grid = SMALL_GRID if grid == "small" else risk_training.PARAM_GRID
+    print(f"{'rows':>7}  {'cores':>5}  {'search s':>9}  {'fit s':>7}  {'speedup':>7}  {'test acc':>8}")
+    for rows in rows_list:
+        engine, SessionLocal, path = build_database(rows, attendance_per_student=20, activities_per_student=10,
+                                                    assessments_per_student=4)
+        db = SessionLocal()
+        try:
+            X, y = risk_training.training_data(db)
+        finally:
+            db.close()
+            engine.dispose()
+            os.remove(path)
+
+        baseline = None
+        for n_jobs in cores_list:
+            metrics = risk_training.train(X, y, n_jobs=n_jobs, folds=folds, param_grid=param_grid)["metrics"]
+            elapsed = metrics["search_seconds"] + metrics["fit_seconds"]
+            baseline = baseline or elapsed
+            print(f"{rows:>7}  {metrics['cores']:>5}  {metrics['search_seconds']:>9.2f}  "
+                  f"{metrics['fit_seconds']:>7.2f}  {baseline / elapsed:>6.2f}x  {metrics['test_accuracy']:>8.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--cores", type=int, nargs="+", default=[1, 2, 4, -1])
+    parser.add_argument("--grid", choices=["small", "full"], default="full")
+    parser.add_argument("--folds", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.cores, args.grid, args.folds)
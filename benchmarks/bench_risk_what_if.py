@@ -0,0 +1,60 @@
+"""What-if sweep latency by grid size.
+
+Usage: python benchmarks/bench_risk_what_if.py [--sides 10 32 100] [--repeat 5]
+
+A notebook-style forest (see ``bench_risk_latency.notebook_model``) is
+published to a temporary model directory, then ``what_if.sweep`` varies
+attendance and average score over side x side grids. Reported is the
+median of ``--repeat`` runs for the sweep alone and including the JSON
+encoding of the response.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_risk_latency import notebook_model
+from Backend.ml_model import RiskPredictionModel
+from Backend.model_registry import ModelRegistry
+from Backend.risk_features import FEATURES
+from Backend import what_if
+
+BASE = {"attendance_rate": 45.0, "avg_score": 55.0, "study_consistency": 2.0, "activity_completion_rate": 70.0}
+
+
+def run(sides, repeat):
+    registry = ModelRegistry(tempfile.mkdtemp())
+    model, scaler = notebook_model()
+    registry.publish({"model": model, "scaler": scaler, "features": FEATURES})
+    risk = RiskPredictionModel(registry)
+
+    print(f"{'grid':>10}  {'points':>7}  {'sweep ms':>9}  {'with JSON ms':>12}")
+    for side in sides:
+        axes = [
+            {"feature": "attendance_rate", "values": np.linspace(30, 100, side)},
+            {"feature": "avg_score", "values": np.linspace(20, 100, side)},
+        ]
+        what_if.sweep(BASE, axes, risk)
+        sweep_ms, total_ms = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = what_if.sweep(BASE, axes, risk)
+            swept = time.perf_counter()
+            json.dumps(result)
+            sweep_ms.append((swept - started) * 1e3)
+            total_ms.append((time.perf_counter() - started) * 1e3)
+        print(f"{side:>4} x {side:<3}  {result['points']:>7}  {np.median(sweep_ms):>9.1f}  {np.median(total_ms):>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sides", type=int, nargs="+", default=[10, 32, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sides, args.repeat)
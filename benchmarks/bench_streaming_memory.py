@@ -0,0 +1,137 @@
+"""Peak memory of one long student history: ORM lists vs column arrays vs streaming.
+
+Usage: python benchmarks/bench_streaming_memory.py [--rows 10000 50000 200000]
+
+Each mode runs in a fresh interpreter so its peak RSS is not inflated by an
+earlier mode. Reported is how far the peak (VmHWM, reset before each step)
+rises above the resident size while computing one student's sections, for a
+student with ``--rows`` activities and ``--rows`` assessments. The
+assessment section is listed separately: its improvement trend holds one
+entry per assessment in every mode, so it cannot stay flat.
+
+    orm        full ORM object lists (.all()), as before the column-only queries
+    arrays     column-only rows turned into NumPy arrays (the default path)
+    streaming  yield_per batches fed to single-pass accumulators
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+MODES = ["orm", "arrays", "streaming"]
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise OSError(f"{field} not in /proc/self/status")
+
+
+def reset_peak_rss() -> int:
+    """Current RSS in kB, after resetting the peak so imports do not mask the work"""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return _status_kb("VmRSS")
+    except OSError:
+        # Linux reports ru_maxrss in kilobytes
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss_kb() -> int:
+    try:
+        return _status_kb("VmHWM")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(mode: str, path: str):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from Backend import analytics_kernels as kernels
+    from Backend import models
+    from Backend.analytics import LearningAnalytics
+    from datetime import datetime, timedelta
+
+    engine = create_engine(f"sqlite:///{path}")
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    analytics = LearningAnalytics()
+    student_id = 1
+    streaming = mode == "streaming"
+    started = time.perf_counter()
+
+    # Activity sections: learning progress and study patterns
+    before = reset_peak_rss()
+    if mode == "orm":
+        activities = db.query(models.LearningActivity).filter(
+            models.LearningActivity.student_id == student_id
+        ).all()
+        progress = kernels.LearningProgressAccumulator(datetime.now() - timedelta(days=7))
+        patterns = kernels.StudyPatternsAccumulator()
+        for activity in activities:
+            progress.add(activity.start_time, activity.completed, activity.score, activity.duration)
+            if activity.start_time is not None:
+                patterns.add(activity.start_time, activity.duration)
+        sections = [progress.result(), patterns.result()]
+        del activities
+    else:
+        sections = [
+            analytics._calculate_learning_progress(student_id, db, streaming=streaming),
+            analytics._analyze_study_patterns(student_id, db, streaming=streaming),
+        ]
+    activity_peak = peak_rss_kb() - before
+
+    # Assessment section; its improvement trend has one entry per dated row by design
+    before = reset_peak_rss()
+    if mode == "orm":
+        assessments = db.query(models.Assessment).filter(
+            models.Assessment.student_id == student_id
+        ).order_by(models.Assessment.id).all()
+        sections.append(kernels.assessment_scores(assessments))
+    else:
+        sections.append(analytics._calculate_assessment_scores(student_id, db, streaming=streaming))
+    assessment_peak = peak_rss_kb() - before
+
+    elapsed = time.perf_counter() - started
+    print(f"{activity_peak} {assessment_peak} {elapsed:.3f}")
+
+
+def run(rows_list):
+    from synthetic_data import build_database
+
+    print("peak RSS growth: activity sections / assessment section, and total time")
+    print(f"{'rows':>8}  " + "  ".join(f"{mode:>28}" for mode in MODES))
+    for rows in rows_list:
+        engine, _, path = build_database(1, attendance_per_student=10, activities_per_student=rows,
+                                         assessments_per_student=rows)
+        engine.dispose()
+        cells = []
+        try:
+            for mode in MODES:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", mode, "--db", path],
+                    check=True, capture_output=True, text=True
+                ).stdout.split()
+                activity_kb, assessment_kb, seconds = int(output[-3]), int(output[-2]), float(output[-1])
+                cells.append(f"{activity_kb / 1024:6.1f} / {assessment_kb / 1024:6.1f} MB {seconds:6.2f} s")
+        finally:
+            os.remove(path)
+        print(f"{rows:>8}  " + "  ".join(f"{cell:>28}" for cell in cells))
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000, 200000])
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.db)
+    else:
+        run(args.rows)
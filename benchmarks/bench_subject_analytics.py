@@ -0,0 +1,59 @@
+"""Subject analytics: per-student payloads vs the grouped subject query.
+
+Usage: python benchmarks/bench_subject_analytics.py [--students 10000] [--legacy-limit 500]
+"""
+import argparse
+import os
+import time
+
+from synthetic_data import SUBJECTS, QueryCounter, build_database
+
+from Backend.analytics import LearningAnalytics
+from Backend import models
+
+
+def legacy_subject_analytics(analytics, db, subject):
+    """The old path: full get_student_analytics per student to read one subject entry"""
+    rows = []
+    for student in db.query(models.Student).all():
+        progress = analytics.get_student_analytics(student.id, db).get("progress_by_subject", {}).get(subject)
+        if progress:
+            rows.append((student.id, progress["average_score"], progress["total_activities"]))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--legacy-limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine, SessionLocal, path = build_database(args.students)
+    counter = QueryCounter(engine)
+    analytics = LearningAnalytics()
+    db = SessionLocal()
+    try:
+        for subjects in ([SUBJECTS[0]], SUBJECTS):
+            timings = []
+            for _ in range(args.repeat):
+                counter.reset()
+                started = time.perf_counter()
+                result = analytics.get_subjects_analytics(subjects, db)
+                timings.append(time.perf_counter() - started)
+            print(f"{args.students} students, {len(subjects)} subject(s): "
+                  f"{counter.count} queries, best {min(timings) * 1000:.1f} ms")
+
+        if args.students <= args.legacy_limit:
+            counter.reset()
+            started = time.perf_counter()
+            legacy = legacy_subject_analytics(analytics, db, SUBJECTS[0])
+            elapsed = time.perf_counter() - started
+            print(f"legacy, 1 subject: {counter.count} queries, {elapsed * 1000:.1f} ms")
+            fast = analytics.get_subject_analytics(SUBJECTS[0], db)["student_performance"]
+            print("matches legacy:", sorted(legacy) == sorted(
+                (p["student_id"], p["average_score"], p["total_activities"]) for p in fast))
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(path)
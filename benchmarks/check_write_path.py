@@ -0,0 +1,212 @@
+"""Write path: maintained tables and in-memory indexes vs a rebuild.
+
+Usage: python benchmarks/check_write_path.py [--students 200]
+
+Drives the students, attendance and activities endpoints through create,
+update (including moving rows between students and changing a student's
+grade), delete and a burst of concurrent writers, and after every step
+compares what the write hooks maintain with what a rebuild from the raw
+rows gives:
+
+* ``attendance_rollups`` / ``activity_rollups`` vs ``rollups.rebuild_rollups``
+* ``student_aggregates`` vs ``aggregates.rebuild_student_aggregates``
+* the leaderboard vs a freshly built ``LeaderboardIndex``
+* ``window_counters`` vs freshly warmed counters
+* open alerts vs ``alert_engine.evaluate``
+* stored risk features vs ``risk_features.bulk_features``
+* cached student analytics vs a fresh computation (the baseline's recent
+  trend cuts the first day at the current time, the rollups cannot)
+
+Exits with status 1 when any step leaves a difference.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from bench_class_analytics import strip_timestamps
+from synthetic_data import build_database
+from Backend import aggregates, alert_engine, feature_store, models, risk_features, rollups
+from Backend.alert_inbox import alert_inbox
+from Backend.analytics import LearningAnalytics
+from Backend.analytics_cache import analytics_cache
+from Backend.database import get_db
+from Backend.leaderboard import LeaderboardIndex, leaderboard
+from Backend.routers import activities, attendance, students
+from Backend.window_counters import WindowCounters, window_counters
+
+
+def rollup_rows(db):
+    return {
+        model.__tablename__: sorted(
+            (row.granularity, row.bucket_start.isoformat(), row.student_id or 0, row.grade or "", row.subject,
+             *(round(getattr(row, measure) or 0, 6) for measure in rollups.MEASURES[model]))
+            for row in db.query(model)
+        )
+        for model in rollups.MEASURES
+    }
+
+
+def aggregate_rows(db):
+    rows = {}
+    for row in db.query(models.StudentAggregates):
+        counters = tuple(round(getattr(row, field) or 0, 6) for field in aggregates.COUNTER_FIELDS)
+        if any(counters):  # an all-zero row reads the same as no row
+            rows[row.student_id] = counters
+    return rows
+
+
+def leaderboard_pages(index, db):
+    grades = sorted({grade for (grade,) in db.query(models.Student.grade).distinct()}, key=str)
+    return {grade: index.page(db, 0, 10 ** 6, grade=grade) for grade in [None, *grades]}
+
+
+def open_alerts(db):
+    alerts = {}
+    for row in db.query(models.Alert).filter(models.Alert.resolved_at.is_(None)).order_by(models.Alert.id):
+        alerts.setdefault(row.student_id, set()).add((row.type, row.message))
+    return alerts
+
+
+def differences(db, analytics, watched):
+    """Names of the maintained structures that disagree with a rebuild"""
+    failed = []
+
+    # In-memory indexes first, while the tables are still the incremental ones
+    if leaderboard_pages(leaderboard, db) != leaderboard_pages(LeaderboardIndex(), db):
+        failed.append("leaderboard")
+    fresh_counters = WindowCounters(window_counters.days)
+    fresh_counters.warm(db)
+    if window_counters.bulk(window_counters.days - 1) != fresh_counters.bulk(window_counters.days - 1):
+        failed.append("window_counters")
+    evaluated = alert_engine.evaluate(db, days=alert_inbox.days)
+    expected_alerts = {sid: {(a["type"], a["message"]) for a in alerts}
+                       for sid, alerts in evaluated.items() if alerts}
+    if open_alerts(db) != expected_alerts:
+        failed.append("alerts")
+    stored_ids, stored = feature_store.bulk_features(db)
+    raw_ids, raw = risk_features.bulk_features(db)
+    if stored_ids != raw_ids or not np.array_equal(stored, raw):
+        failed.append("student_features")
+    for student_id in watched:
+        cached = analytics.get_student_analytics(student_id, db)
+        analytics_cache.invalidate(student_id)
+        if strip_timestamps(cached) != strip_timestamps(analytics.get_student_analytics(student_id, db)):
+            failed.append(f"analytics_cache[{student_id}]")
+
+    # Then the tables, which the rebuilds overwrite
+    incremental = rollup_rows(db)
+    rollups.rebuild_rollups(db)
+    rebuilt = rollup_rows(db)
+    failed += [table for table in incremental if incremental[table] != rebuilt[table]]
+    incremental = aggregate_rows(db)
+    aggregates.rebuild_student_aggregates(db)
+    if incremental != aggregate_rows(db):
+        failed.append("student_aggregates")
+    return failed
+
+
+def run(n_students):
+    engine, SessionLocal, path = build_database(n_students, days_of_history=40)
+    app = FastAPI()
+    for module in (students, attendance, activities):
+        app.include_router(module.router, prefix="/api")
+
+    def session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = session
+    client = TestClient(app)
+    analytics = LearningAnalytics()
+    db = SessionLocal()
+    try:
+        # Start from the state the app has after startup
+        analytics_cache.clear()
+        leaderboard.rebuild(db)
+        window_counters.warm(db)
+        feature_store.refresh(db, full=True)
+        alert_inbox.sync(db)
+
+        student_a, student_b = 3, 4
+        racing = (student_a, 5, 6)
+        now = datetime.now()
+        state = {}
+
+        def create():
+            new = client.post("/api/students/", json={"name": "New Student", "age": 11, "grade": "6",
+                                                       "village": "V", "school": "School 1"}).json()
+            state["student"] = new["id"]
+            for days_ago, present in ((0, True), (2, False), (10, True)):
+                record = client.post("/api/attendance/", json={
+                    "student_id": new["id"], "present": present, "subject": "Math",
+                    "date": (now - timedelta(days=days_ago)).isoformat()
+                }).json()
+                state.setdefault("attendance", []).append(record["id"])
+            activity = client.post("/api/activities/start", json={"student_id": new["id"], "syllabus_id": 1}).json()
+            state["activity"] = activity["id"]
+            client.post(f"/api/activities/{activity['id']}/complete", params={"score": 80})
+            client.post("/api/attendance/", json={"student_id": student_a, "present": False, "subject": "Science"})
+
+        def update():
+            client.put(f"/api/attendance/{state['attendance'][0]}", json={
+                "student_id": student_b, "present": False, "date": (now - timedelta(days=1)).isoformat()
+            })
+            client.put(f"/api/activities/{state['activity']}", json={"student_id": student_b, "score": 35})
+            client.put(f"/api/students/{student_a}", json={"name": "Renamed", "age": 12, "grade": "9",
+                                                           "village": "W", "school": "School 2"})
+
+        def delete():
+            client.delete(f"/api/students/{student_b}")
+            client.delete(f"/api/attendance/{state['attendance'][1]}")
+            client.delete(f"/api/activities/{state['activity']}")
+            client.delete(f"/api/students/{state['student']}")
+            # Rows left behind by a deleted student
+            client.delete(f"/api/attendance/{state['attendance'][2]}")
+
+        def concurrent(threads=8, requests=10):
+            # Writers racing on the same students' counters and buckets
+            def writer(thread):
+                for i in range(requests):
+                    student_id = racing[(thread + i) % len(racing)]
+                    client.post("/api/attendance/", json={"student_id": student_id, "present": i % 2 == 0,
+                                                          "subject": "Math"})
+                    client.post("/api/activities/start", json={"student_id": student_id, "syllabus_id": 1})
+
+            with ThreadPoolExecutor(threads) as pool:
+                list(pool.map(writer, range(threads)))
+
+        failures = 0
+        steps = (("create", create), ("update", update), ("delete", delete), ("concurrent", concurrent))
+        for name, step in steps:
+            # Cache the students about to be touched, as readers would between writes
+            watched = [sid for sid in (state.get("student"), student_b, *racing) if sid is not None]
+            for student_id in watched:
+                analytics.get_student_analytics(student_id, db)
+            step()
+            db.expire_all()
+            failed = differences(db, analytics, watched)
+            failures += bool(failed)
+            print(f"{name:>10}  {'ok' if not failed else 'DIFFERS: ' + ', '.join(failed)}")
+        return failures
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    args = parser.parse_args()
+    sys.exit(1 if run(args.students) else 0)
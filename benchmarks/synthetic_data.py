@@ -0,0 +1,102 @@
+"""Synthetic district databases for the benchmarks in this folder.
+
+Every benchmark builds its own throwaway SQLite file so the shipped
+``offline_learning.db`` is never touched.
+"""
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from Backend import aggregates, models, rollups
+from Backend.database import Base
+
+SUBJECTS = ["Mathematics", "Science", "English", "Social Studies"]
+GRADES = ["5", "6", "7", "8"]
+
+
+def build_database(n_students, attendance_per_student=60, activities_per_student=40,
+                   assessments_per_student=10, days_of_history=180, seed=42, path=None):
+    """Create and populate a SQLite database, returning (engine, SessionLocal, path)"""
+    rng = random.Random(seed)
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="bench_", suffix=".db")
+        os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now()
+
+    def when():
+        return now - timedelta(days=rng.uniform(0, days_of_history), hours=rng.uniform(0, 12))
+
+    with engine.begin() as conn:
+        conn.execute(models.Syllabus.__table__.insert(), [
+            {"id": i + 1, "subject": subject, "grade": grade, "chapter": f"Chapter {i + 1}",
+             "difficulty_level": rng.choice(["easy", "medium", "hard"]), "estimated_time": 60}
+            for i, (grade, subject) in enumerate((g, s) for g in GRADES for s in SUBJECTS)
+        ])
+        syllabus_ids = list(range(1, len(GRADES) * len(SUBJECTS) + 1))
+
+        conn.execute(models.Student.__table__.insert(), [
+            {"id": i, "name": f"Student {i}", "age": rng.randint(10, 15), "grade": rng.choice(GRADES),
+             "village": f"Village {i % 50}", "school": f"School {i % 20}"}
+            for i in range(1, n_students + 1)
+        ])
+
+        for student_id in range(1, n_students + 1):
+            presence = rng.uniform(0.4, 1.0)
+            skill = rng.uniform(30, 100)
+            conn.execute(models.Attendance.__table__.insert(), [
+                {"student_id": student_id, "date": when(), "present": rng.random() < presence,
+                 "subject": rng.choice(SUBJECTS + [None])}
+                for _ in range(attendance_per_student)
+            ])
+            activities = []
+            for _ in range(activities_per_student):
+                start = when()
+                completed = rng.random() < 0.75
+                duration = rng.randint(5, 90) if completed else None
+                activities.append({
+                    "student_id": student_id, "syllabus_id": rng.choice(syllabus_ids),
+                    "start_time": start, "completed": completed, "duration": duration,
+                    "end_time": start + timedelta(minutes=duration) if duration else None,
+                    "score": round(min(100, max(0, rng.gauss(skill, 15))), 1) if completed and rng.random() < 0.8 else None
+                })
+            conn.execute(models.LearningActivity.__table__.insert(), activities)
+            conn.execute(models.Assessment.__table__.insert(), [
+                {"student_id": student_id, "subject": rng.choice(SUBJECTS), "chapter": "Chapter 1",
+                 "score": round(min(50, max(0, rng.gauss(skill / 2, 8))), 1), "max_score": 50,
+                 "date": when(), "time_taken": rng.randint(10, 60)}
+                for _ in range(assessments_per_student)
+            ])
+
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # Backfill the maintained tables as a deployed database would have them
+    with SessionLocal() as db:
+        aggregates.rebuild_student_aggregates(db)
+        rollups.rebuild_rollups(db)
+
+    return engine, SessionLocal, path
+
+
+class QueryCounter:
+    """Counts SQL statements sent through an engine"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
@@ -14,22 +14,42 @@ async function initAnalyticsPage() {
     setupEventListeners();
 }
 
+// Read an NDJSON response line by line as it arrives
+async function readNdjson(response, onLine) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => onLine(JSON.parse(line)));
+    }
+    if (buffer.trim()) onLine(JSON.parse(buffer));
+}
+
 // Load analytics data from API
-async function loadAnalyticsData() {
+async function loadAnalyticsData(filters = {}) {
     try {
-        // Load multiple data sources in parallel
-        const [attendance, activities, students, assessments] = await Promise.all([
-            fetch('http://localhost:8000/attendance/today').then(r => r.ok ? r.json() : {}),
-            fetch('http://localhost:8000/activities/').then(r => r.ok ? r.json() : []),
-            fetch('http://localhost:8000/students/').then(r => r.ok ? r.json() : []),
-            fetch('http://localhost:8000/assessments/').then(r => r.ok ? r.json() : [])
-        ]);
+        // The server aggregates per student and streams one compact line each
+        const params = new URLSearchParams({ limit: 1000, ...filters });
+        const response = await fetch(`http://localhost:8000/api/analytics/class?${params}`);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+
+        const students = [];
+        let summary = {};
+        await readNdjson(response, line => {
+            if (line.type === 'student') students.push(line);
+            else if (line.type === 'summary') summary = line;
+        });
 
         analyticsData = {
-            attendance,
-            activities,
+            summary,
             students,
-            assessments,
             generatedAt: new Date().toISOString()
         };
 
@@ -44,24 +64,14 @@ async function loadAnalyticsData() {
 
 // Calculate key metrics
 function calculateMetrics() {
-    const { students, activities, assessments } = analyticsData;
-    
-    // Overall attendance
-    const attendanceRate = analyticsData.attendance.attendance_rate || 85;
-    document.getElementById('overall-attendance').textContent = `${attendanceRate}%`;
-    
-    // Average score
-    const totalScore = assessments.reduce((sum, a) => sum + (a.score || 0), 0);
-    const avgScore = assessments.length > 0 ? Math.round(totalScore / assessments.length) : 78;
-    document.getElementById('average-score').textContent = `${avgScore}%`;
+    const { summary, students } = analyticsData;
     
-    // Total study hours
-    const totalMinutes = activities.reduce((sum, a) => sum + (a.duration || 0), 0);
-    const totalHours = Math.round(totalMinutes / 60);
-    document.getElementById('total-study-hours').textContent = totalHours;
+    document.getElementById('overall-attendance').textContent = `${summary.average_attendance_rate || 0}%`;
+    document.getElementById('average-score').textContent = `${summary.average_score || 0}%`;
+    document.getElementById('total-study-hours').textContent = Math.round(summary.total_study_hours || 0);
     
     // Risk students count
-    const riskCount = Math.max(0, Math.floor(students.length * 0.1)); // 10% as risk
+    const riskCount = students.filter(s => s.risk_level === 'high').length;
     document.getElementById('risk-count').textContent = riskCount;
 }
 
@@ -220,25 +230,22 @@ function renderRiskStudents() {
     const container = document.getElementById('risk-students-list');
     if (!container) return;
 
-    const { students } = analyticsData;
-    const riskStudents = students.slice(0, 5).map((student, index) => ({
-        ...student,
-        riskLevel: ['low', 'medium', 'high'][index % 3],
-        attendance: 65 + (index * 5),
-        score: 60 + (index * 8)
-    }));
+    const riskOrder = { high: 3, medium: 2, low: 1 };
+    const riskStudents = [...analyticsData.students]
+        .sort((a, b) => (riskOrder[b.risk_level] || 0) - (riskOrder[a.risk_level] || 0))
+        .slice(0, 5);
 
     container.innerHTML = riskStudents.map(student => `
         <div class="student-list-item">
             <div>
-                <strong>${student.name}</strong>
+                <strong>${student.student_name}</strong>
                 <div class="student-meta">
                     <span>Grade ${student.grade} • ${student.village || 'Unknown Village'}</span>
                 </div>
             </div>
             <div>
-                <span class="risk-indicator risk-${student.riskLevel}"></span>
-                <span>${student.riskLevel.toUpperCase()}</span>
+                <span class="risk-indicator risk-${student.risk_level}"></span>
+                <span>${student.risk_level.toUpperCase()}</span>
             </div>
         </div>
     `).join('');
@@ -249,17 +256,17 @@ function renderTopPerformers() {
     const container = document.getElementById('top-performers');
     if (!container) return;
 
-    const { students } = analyticsData;
-    const topPerformers = students.slice(0, 5).map((student, index) => ({
-        ...student,
-        score: 85 + (index * 3),
-        improvement: 5 + index
-    }));
+    // Same weighting as the server: activity 0.4, assessment 0.3, attendance 0.3
+    const weighted = s => s.average_score * 0.4 + s.assessment_average * 0.3 + s.attendance_rate * 0.3;
+    const topPerformers = [...analyticsData.students]
+        .sort((a, b) => weighted(b) - weighted(a))
+        .slice(0, 5)
+        .map(student => ({ ...student, score: Math.round(weighted(student)) }));
 
     container.innerHTML = topPerformers.map(student => `
         <div class="student-list-item">
             <div>
-                <strong>${student.name}</strong>
+                <strong>${student.student_name}</strong>
                 <div class="student-meta">
                     <span>Grade ${student.grade}</span>
                 </div>
@@ -282,6 +289,7 @@ function renderMostImproved() {
     const { students } = analyticsData;
     const improvedStudents = students.slice(2, 7).map((student, index) => ({
         ...student,
+        name: student.student_name,
         improvement: 15 + (index * 5),
         previousScore: 50 + (index * 5),
         currentScore: 65 + (index * 8)
@@ -390,32 +398,33 @@ function exportAnalytics() {
 
 // Load sample data for demo
 function loadSampleAnalyticsData() {
+    const riskLevels = ['low', 'medium', 'high'];
+    const students = Array(15).fill().map((_, i) => ({
+        type: 'student',
+        student_id: i + 1,
+        student_name: `Student ${i + 1}`,
+        grade: '5',
+        village: ['Village A', 'Village B', 'Village C'][i % 3],
+        attendance_rate: 65 + (i * 2),
+        completion_rate: 60 + (i * 2),
+        average_score: 60 + (i * 2),
+        assessment_average: 55 + (i * 2),
+        total_study_time: 300 + (i * 30),
+        weekly_activities: i % 6,
+        risk_level: riskLevels[i % 3]
+    }));
+
     analyticsData = {
-        attendance: {
-            attendance_rate: 85,
-            days_present: 425,
-            days_total: 500
+        summary: {
+            type: 'summary',
+            total_students: students.length,
+            average_attendance_rate: 85,
+            average_completion_rate: 74,
+            average_score: 78,
+            total_study_hours: 120,
+            risk_distribution: { low: 5, medium: 5, high: 5 }
         },
-        activities: Array(50).fill().map((_, i) => ({
-            id: i + 1,
-            student_id: (i % 10) + 1,
-            duration: 30 + Math.floor(Math.random() * 60),
-            completed: Math.random() > 0.3,
-            score: Math.random() > 0.3 ? 60 + Math.floor(Math.random() * 40) : null
-        })),
-        students: Array(15).fill().map((_, i) => ({
-            id: i + 1,
-            name: `Student ${i + 1}`,
-            grade: '5',
-            village: ['Village A', 'Village B', 'Village C'][i % 3]
-        })),
-        assessments: Array(30).fill().map((_, i) => ({
-            id: i + 1,
-            student_id: (i % 10) + 1,
-            subject: ['Mathematics', 'Science', 'English', 'Social Studies'][i % 4],
-            score: 60 + Math.floor(Math.random() * 40),
-            date: new Date(Date.now() - Math.random() * 30 * 24 * 60 * 60 * 1000).toISOString()
-        })),
+        students,
         generatedAt: new Date().toISOString()
     };
     
@@ -455,9 +464,16 @@ function filterAnalytics() {
     
     console.log(`Filtering: Grade=${grade}, Village=${village}, Subject=${subject}`);
     
-    // In a real app, this would refetch filtered data from API
-    // For now, we'll just show a message
     showToast('Applying filters...', 'info');
+    
+    // Grade is filtered on the server; village narrows the streamed list locally
+    loadAnalyticsData(grade ? { grade } : {}).then(() => {
+        if (village) {
+            analyticsData.students = analyticsData.students.filter(s => s.village === village);
+        }
+        calculateMetrics();
+        renderAnalytics();
+    });
 }
 
 // Initialize when page loads